@@ -1,13 +1,14 @@
 import streamlit as st
 import numpy as np
-import numpy_financial as npf
 import pandas as pd
 import matplotlib.pyplot as plt
-
-import scipy as sp # Adicionado para garantir que está importado para Estatística
+from matplotlib.ticker import FuncFormatter
 
 import datetime # Adicionado para garantir que está importado para Datas/Obrigações
-from scipy import stats # Adicionado para garantir que está importado para Estatística
+import io
+import warnings
+
+import fincalc # Núcleo de cálculo (sem UI)
 
 # --- Configuração da Página ---
 st.set_page_config(layout="wide", page_title="Calculadora Financeira Educacional")
@@ -18,90 +19,112 @@ st.caption("Uma ferramenta para aprender e usar conceitos financeiros.")
 
 # --- Funções Auxiliares ---
 
-def plot_amortization(schedule_df):
-    """Gera um gráfico do saldo devedor ao longo do tempo."""
+AMORTIZATION_PLOT_POINTS = 1000 # Acima disto a série é reduzida (LTTB) antes de desenhar
+AMORTIZATION_MARKER_LIMIT = 120 # Marcadores só em séries curtas
+
+def currency_formatter(x, pos):
+    """Formata o eixo Y como moeda."""
+    return f'€{x:,.2f}'
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_amortization_chart(schedule_key, _periods, _balances):
+    """Desenha o gráfico do saldo e devolve a imagem PNG, em cache por `schedule_key`.
+
+    `_periods` e `_balances` não entram na chave (o prefixo `_` exclui-os do hash):
+    a mesma tabela dá sempre o mesmo gráfico.
+    """
+    periods, balances = fincalc.lttb(_periods, _balances, AMORTIZATION_PLOT_POINTS)
     fig, ax = plt.subplots()
-    ax.plot(schedule_df['Período'], schedule_df['Saldo Final'], marker='o', linestyle='-')
+    marker = 'o' if len(periods) <= AMORTIZATION_MARKER_LIMIT else None
+    ax.plot(periods, balances, marker=marker, linestyle='-')
     ax.set_xlabel("Período")
     ax.set_ylabel("Saldo Devedor (€)")
     ax.set_title("Evolução do Saldo Devedor")
     ax.grid(True)
-    # Formatar o eixo Y para moeda
-    from matplotlib.ticker import FuncFormatter
-    def currency_formatter(x, pos):
-        return f'€{x:,.2f}'
     ax.yaxis.set_major_formatter(FuncFormatter(currency_formatter))
-    st.pyplot(fig)
-
-# --- Função calculate_breakeven (CORRIGIDA da resposta anterior) ---
-def calculate_breakeven(known_vars):
-    target = known_vars['Target']
-    try:
-        p = known_vars['P']
-        vc = known_vars['VC']
-        fc = known_vars['FC']
-        pft = known_vars['PFT']
-        q = known_vars['Q']
-
-        required_for = {
-            'Q': ['FC', 'PFT', 'P', 'VC'],
-            'PFT': ['FC', 'Q', 'P', 'VC'],
-            'FC': ['PFT', 'Q', 'P', 'VC'],
-            'P': ['FC', 'PFT', 'Q', 'VC'],
-            'VC': ['FC', 'PFT', 'Q', 'P']
-        }
-
-        for var_name in required_for[target]:
-            if known_vars[var_name] is None:
-                return f"Erro: Input '{var_name}' não pode ser None para calcular '{target}'."
-            if not isinstance(known_vars[var_name], (int, float)):
-                 return f"Erro: Input '{var_name}' deve ser numérico."
-
-        if target == 'Q':
-            p = known_vars['P']
-            vc = known_vars['VC']
-            fc = known_vars['FC']
-            pft = known_vars['PFT']
-            margin_contribution = p - vc
-            if margin_contribution <= 0: return "Erro: Preço (P) deve ser maior que Custo Variável (VC)."
-            result = (fc + pft) / margin_contribution
-        elif target == 'PFT':
-            p = known_vars['P']
-            vc = known_vars['VC']
-            fc = known_vars['FC']
-            q = known_vars['Q']
-            margin_contribution = p - vc
-            result = (margin_contribution * q) - fc
-        elif target == 'FC':
-            p = known_vars['P']
-            vc = known_vars['VC']
-            pft = known_vars['PFT']
-            q = known_vars['Q']
-            margin_contribution = p - vc
-            result = (margin_contribution * q) - pft
-        elif target == 'P':
-            fc = known_vars['FC']
-            vc = known_vars['VC']
-            pft = known_vars['PFT']
-            q = known_vars['Q']
-            if q <= 0: return "Erro: Quantidade (Q) deve ser > 0."
-            result = (fc + (vc * q) + pft) / q
-        elif target == 'VC':
-            p = known_vars['P']
-            fc = known_vars['FC']
-            pft = known_vars['PFT']
-            q = known_vars['Q']
-            if q <= 0: return "Erro: Quantidade (Q) deve ser > 0."
-            result = ((p * q) - fc - pft) / q
-        else:
-            return "Erro: Variável alvo ('Target') desconhecida."
-        return result
-    except ZeroDivisionError:
-         return f"Erro: Divisão por zero ao calcular {target} (verifique se Q ou (P-VC) são zero onde aplicável)."
-    except TypeError as te:
-         return f"Erro de Tipo: Verifique se todos os inputs necessários são números válidos. Detalhe: {te}"
-    except Exception as e:
-         return f"Erro inesperado ao calcular {target}: {e}"
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    plt.close(fig) # Libertar a figura: só a imagem fica em cache
+    return buffer.getvalue()
+
+def plot_amortization(schedule_key, periods, balances):
+    """Mostra o gráfico do saldo devedor ao longo do tempo."""
+    st.image(render_amortization_chart(schedule_key, periods, balances))
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_npv_profile(flow_key, rate_min, rate_max, points, _flows):
+    """Curva NPV vs taxa, em cache pelo hash dos fluxos (`CashFlows.key`) e pela grelha de taxas."""
+    return _flows.profile(np.linspace(rate_min, rate_max, points))
+
+def mark_cash_flows_edited(name):
+    """Callback dos editores de fluxos: a próxima leitura volta a validar a tabela."""
+    st.session_state[f'{name}_version'] = st.session_state.get(f'{name}_version', 0) + 1
+
+def current_cash_flows(name, cf0, table):
+    """`CashFlows` da tabela `name`, reconstruído só quando CF0 muda ou a tabela é editada/carregada."""
+    version = (cf0, st.session_state.get(f'{name}_version', 0))
+    stored = st.session_state.get(f'{name}_flows')
+    if stored is None or stored[0] != version:
+        stored = (version, fincalc.build_cash_flows(cf0, table))
+        st.session_state[f'{name}_flows'] = stored
+    return stored[1]
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_breakeven_grid(base_items, target, x_var, x_range, y_var, y_range, points):
+    """Grelha de sensibilidade do breakeven, em cache pelo tuplo de entradas."""
+    return fincalc.breakeven_grid(dict(base_items), target, x_var, np.linspace(*x_range, points), y_var, np.linspace(*y_range, points))
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_sensitivity_heatmap(grid_key, _grid):
+    """Mapa de calor (PNG) da grelha; `grid_key` são as entradas de `cached_breakeven_grid`."""
+    fig, ax = plt.subplots(figsize=(8, 5.5))
+    extent = (_grid.x_values[0], _grid.x_values[-1], _grid.y_values[0], _grid.y_values[-1])
+    image = ax.imshow(_grid.values, origin='lower', extent=extent, aspect='auto', cmap='viridis')
+    fig.colorbar(image, ax=ax, label=_grid.target)
+    if _grid.target == 'PFT' and np.nanmin(_grid.values) < 0 < np.nanmax(_grid.values):
+        ax.contour(_grid.x_values, _grid.y_values, _grid.values, levels=[0.0], colors='white', linewidths=1.5)
+    ax.set_xlabel(_grid.x_var)
+    ax.set_ylabel(_grid.y_var)
+    ax.set_title(f"{_grid.target} em função de {_grid.x_var} e {_grid.y_var} (zonas em branco: sem solução)")
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_tornado_chart(base_items, target, shock):
+    """Gráfico tornado (PNG) de choques de ±`shock` em cada variável."""
+    rows, base_value = fincalc.breakeven_tornado(dict(base_items), target, shock)
+    rows = rows[::-1] # Maior amplitude no topo
+    fig, ax = plt.subplots(figsize=(8, 0.6 * len(rows) + 1.5))
+    labelled = set()
+    for position, row in enumerate(rows):
+        for value, color, label in ((row['Choque -'], 'tab:red', f"-{shock:.0%}"), (row['Choque +'], 'tab:green', f"+{shock:.0%}")):
+            if np.isfinite(value):
+                ax.barh(position, value - base_value, left=base_value, color=color, alpha=0.8, label=None if label in labelled else label)
+                labelled.add(label)
+    ax.axvline(base_value, color='black', linewidth=1)
+    ax.set_yticks(range(len(rows)), [row['Variável'] for row in rows])
+    ax.set_xlabel(target)
+    ax.set_title(f"Sensibilidade de {target} (base = {base_value:,.2f})")
+    ax.legend(loc='lower right')
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+def reset_depreciation_state(cost, salvage):
+    """Reinicia o histórico do cálculo ano-a-ano da depreciação."""
+    st.session_state.depr_state = {
+        'accumulated_depreciation': 0.0, 'last_yr_calculated': 0,
+        'current_rbv': cost, 'current_rdv': max(0.0, cost - salvage),
+        'last_inputs': {}
+    }
+
+def show_warnings(caught_warnings):
+    """Mostra na interface os avisos emitidos pelo pacote fincalc."""
+    for caught in caught_warnings:
+        st.warning(str(caught.message))
 
 # --- Seleção da Funcionalidade ---
 main_tabs = st.tabs([
@@ -165,7 +188,7 @@ with main_tabs[0]:
 with main_tabs[1]:
     st.header("Valor do Dinheiro no Tempo (TVM) e Amortização")
 
-    tvm_tabs = st.tabs(["Explicação", "Calculadora TVM", "Amortização"])
+    tvm_tabs = st.tabs(["Explicação", "Calculadora TVM", "Amortização", "Carteira de Empréstimos"])
 
     with tvm_tabs[0]:
         st.subheader("O que é o Valor do Dinheiro no Tempo?")
@@ -213,7 +236,6 @@ with main_tabs[1]:
             c_y_default = p_y
             c_y = st.number_input("C/Y (Composições por Ano)", min_value=1, value=c_y_default, step=1, help="Normalmente igual a P/Y.")
             pmt_mode = st.radio("Modo de Pagamento (BGN/END)", ('END', 'BGN'), index=0, help="END=Fim do período, BGN=Início do período")
-            when = 'begin' if pmt_mode == 'BGN' else 'end'
 
         st.divider()
 
@@ -227,9 +249,7 @@ with main_tabs[1]:
 
         if calc_col1.button("Calcular N"):
             try:
-                rate_per_period = (i_y / 100) / c_y # Ajuste para taxa periódica consistente com npf
-                rate_for_nper = (i_y / 100) / p_y # Usar p_y para consistência com pagamentos
-                result = npf.nper(rate_for_nper, pmt, pv, fv, when)
+                result = fincalc.solve_n(i_y, pv, pmt, fv, p_y, pmt_mode, c_y)
                 st.success(f"N = {result:.4f}")
                 st.session_state.last_tvm_result = {'N': result, 'I/Y': i_y, 'PV': pv, 'PMT': pmt, 'FV': fv, 'P/Y': p_y, 'C/Y': c_y, 'Mode': pmt_mode}
             except Exception as e:
@@ -238,8 +258,7 @@ with main_tabs[1]:
 
         if calc_col2.button("Calcular I/Y"):
             try:
-                rate_per_period = npf.rate(n, pmt, pv, fv, when)
-                result_annual = rate_per_period * p_y * 100
+                result_annual = fincalc.solve_iy(n, pv, pmt, fv, p_y, pmt_mode, c_y)
                 st.success(f"I/Y Anual = {result_annual:.4f} %")
                 st.session_state.last_tvm_result = {'N': n, 'I/Y': result_annual, 'PV': pv, 'PMT': pmt, 'FV': fv, 'P/Y': p_y, 'C/Y': c_y, 'Mode': pmt_mode}
             except Exception as e:
@@ -248,8 +267,7 @@ with main_tabs[1]:
 
         if calc_col3.button("Calcular PV"):
             try:
-                rate_per_period = (i_y / 100) / p_y
-                result = npf.pv(rate_per_period, n, pmt, fv, when)
+                result = fincalc.solve_pv(n, i_y, pmt, fv, p_y, pmt_mode, c_y)
                 st.success(f"PV = {result:.2f}")
                 st.session_state.last_tvm_result = {'N': n, 'I/Y': i_y, 'PV': result, 'PMT': pmt, 'FV': fv, 'P/Y': p_y, 'C/Y': c_y, 'Mode': pmt_mode}
             except Exception as e:
@@ -257,8 +275,7 @@ with main_tabs[1]:
 
         if calc_col4.button("Calcular PMT"):
             try:
-                rate_per_period = (i_y / 100) / p_y
-                result = npf.pmt(rate_per_period, n, pv, fv, when)
+                result = fincalc.solve_pmt(n, i_y, pv, fv, p_y, pmt_mode, c_y)
                 st.success(f"PMT = {result:.2f}")
                 st.session_state.last_tvm_result = {'N': n, 'I/Y': i_y, 'PV': pv, 'PMT': result, 'FV': fv, 'P/Y': p_y, 'C/Y': c_y, 'Mode': pmt_mode}
             except Exception as e:
@@ -266,8 +283,7 @@ with main_tabs[1]:
 
         if calc_col5.button("Calcular FV"):
             try:
-                rate_per_period = (i_y / 100) / p_y
-                result = npf.fv(rate_per_period, n, pmt, pv, when)
+                result = fincalc.solve_fv(n, i_y, pv, pmt, p_y, pmt_mode, c_y)
                 st.success(f"FV = {result:.2f}")
                 st.session_state.last_tvm_result = {'N': n, 'I/Y': i_y, 'PV': pv, 'PMT': pmt, 'FV': result, 'P/Y': p_y, 'C/Y': c_y, 'Mode': pmt_mode}
             except Exception as e:
@@ -301,8 +317,8 @@ with main_tabs[1]:
                  pmt_amort = float(tvm_data.get('PMT', 0))
                  n_amort = int(tvm_data.get('N', 0))
                  py_amort = int(tvm_data.get('P/Y', 1))
-                 # cy_amort = int(tvm_data.get('C/Y', 1)) # Pode ser necessário se C/Y != P/Y
-                 # mode_amort = tvm_data.get('Mode', 'END') # Pode ser necessário para lógica BGN
+                 cy_amort = int(tvm_data.get('C/Y', py_amort))
+                 mode_amort = tvm_data.get('Mode', 'END')
                  valid_amort_data = True
             except (ValueError, TypeError):
                  st.warning("Dados TVM inválidos ou incompletos para gerar amortização.")
@@ -314,7 +330,7 @@ with main_tabs[1]:
                  valid_amort_data = False
 
             if valid_amort_data:
-                rate_per_period_amort = (iy_amort / 100.0) / py_amort
+                rate_per_period_amort = fincalc.periodic_rate(iy_amort, py_amort, cy_amort)
 
                 amort_col1, amort_col2 = st.columns(2)
                 with amort_col1:
@@ -326,58 +342,14 @@ with main_tabs[1]:
                     if p1 > p2:
                         st.error("P1 não pode ser maior que P2.")
                     else:
-                        schedule = []
-                        current_balance = pv_amort
-                        total_principal_paid = 0.0
-                        total_interest_paid = 0.0
-                        balance_at_p2 = current_balance # Inicializar
-
-                        # Gerar toda a tabela até P2 para obter o saldo correcto
-                        for period in range(1, n_amort + 1):
-                            if current_balance <= 0 and abs(pmt_amort)>0: # Parar se saldo já é zero (exceto se PMT for 0)
-                                 if period <= p2: # Garantir que balance_at_p2 fica zero se acontecer antes
-                                     balance_at_p2 = 0.0
-                                 break
-
-                            interest_payment = current_balance * rate_per_period_amort
-                            principal_payment = pmt_amort - interest_payment
-
-                            # Evitar que o principal pago exceda o saldo (caso de último pagamento)
-                            if abs(principal_payment) > abs(current_balance):
-                                principal_payment = -current_balance # Pagar exatamente o saldo
-                                # Recalcular PMT para este último período? Não, assumimos PMT constante
-                                interest_payment = pmt_amort - principal_payment # Juro é o que sobra
-                                # Se pmt_amort for 0, isto não funciona bem, tratar separadamente
-
-                            new_balance = current_balance + principal_payment
-
-                            # Armazenar na tabela se estiver no intervalo P1-P2
-                            if p1 <= period <= p2:
-                                schedule.append({
-                                    'Período': period,
-                                    'Saldo Inicial': current_balance,
-                                    'Pagamento (PMT)': abs(pmt_amort),
-                                    'Juros Pagos': abs(interest_payment),
-                                    'Principal Pago': abs(principal_payment),
-                                    'Saldo Final': max(0, new_balance) # Mostrar zero se ficar ligeiramente negativo por arredondamento
-                                })
-                                total_principal_paid += abs(principal_payment)
-                                total_interest_paid += abs(interest_payment)
-
-                            # Atualizar saldo para próxima iteração
-                            current_balance = new_balance
-
-                            # Guardar o saldo no final do período P2
-                            if period == p2:
-                                balance_at_p2 = max(0, current_balance)
-
-                            # Parar a iteração cedo se já passamos P2 e só queremos totais
-                            if period >= p2 and period >= n_amort : break
-
-
-                        if schedule:
+                        # Tabela completa calculada uma vez e partilhada (cache LRU) pela tabela, sumário e gráfico
+                        full_schedule = fincalc.get_schedule(pv_amort, rate_per_period_amort, pmt_amort, n_amort, mode_amort)
+                        schedule = fincalc.schedule_slice(full_schedule, p1, p2)
+                        summary = fincalc.schedule_summary(full_schedule, p1, p2)
+
+                        if len(schedule['Período']) > 0:
                             st.subheader(f"Detalhes da Amortização (Períodos {p1} a {p2})")
-                            schedule_df = pd.DataFrame(schedule)
+                            schedule_df = pd.DataFrame(schedule).abs() # Mostrar montantes sem sinal
                             st.dataframe(schedule_df.style.format({
                                 'Saldo Inicial': '{:,.2f} €',
                                 'Pagamento (PMT)': '{:,.2f} €',
@@ -388,39 +360,78 @@ with main_tabs[1]:
 
                             st.subheader("Sumário do Intervalo")
                             summary_col1, summary_col2, summary_col3 = st.columns(3)
-                            summary_col1.metric("Saldo Final (após P2)", f"{balance_at_p2:,.2f} €")
-                            summary_col2.metric("Total Principal Pago (P1-P2)", f"{total_principal_paid:,.2f} €")
-                            summary_col3.metric("Total Juros Pagos (P1-P2)", f"{total_interest_paid:,.2f} €")
+                            summary_col1.metric("Saldo Final (após P2)", f"{abs(summary['BAL']):,.2f} €")
+                            summary_col2.metric("Total Principal Pago (P1-P2)", f"{abs(summary['PRN']):,.2f} €")
+                            summary_col3.metric("Total Juros Pagos (P1-P2)", f"{abs(summary['INT']):,.2f} €")
 
                             # Gráfico
                             st.subheader("Gráfico do Saldo Devedor")
-                            full_schedule_plot = []
-                            balance_plot = pv_amort
-                            for period_plot in range(1, n_amort + 1):
-                                if balance_plot <= 0 and abs(pmt_amort)>0:
-                                    # Adicionar ponto zero final se ainda não estiver
-                                    if not full_schedule_plot or full_schedule_plot[-1]['Saldo Final'] > 0:
-                                         full_schedule_plot.append({'Período': period_plot, 'Saldo Final': 0.0})
-                                    break
-                                interest_plot = balance_plot * rate_per_period_amort
-                                principal_plot = pmt_amort - interest_plot
-                                if abs(principal_plot) > abs(balance_plot):
-                                    principal_plot = -balance_plot
-                                balance_plot += principal_plot
-                                full_schedule_plot.append({'Período': period_plot, 'Saldo Final': max(0, balance_plot)})
-
-                            plot_df = pd.DataFrame(full_schedule_plot)
-                            if not plot_df.empty:
-                                 plot_amortization(plot_df)
+                            schedule_key = (pv_amort, rate_per_period_amort, pmt_amort, n_amort, mode_amort)
+                            if len(full_schedule.table['Período']) > 0:
+                                 plot_amortization(schedule_key, full_schedule.table['Período'], np.abs(full_schedule.table['Saldo Final']))
                             else:
                                  st.warning("Não foi possível gerar dados para o gráfico.")
 
+                            cache_stats = fincalc.schedule_cache.stats()
+                            st.caption(f"Cache de tabelas: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                                       f"{cache_stats['entries']} tabelas ({cache_stats['bytes'] / 1024:,.0f} KB).")
+
 
                         else:
                             st.warning("Nenhum período encontrado no intervalo P1-P2 especificado.")
+
+                # Exportação da tabela completa (1..N), gerada e escrita em blocos
+                with st.expander("Exportar Tabela Completa (CSV/Parquet)"):
+                    export_format = st.radio("Formato", fincalc.EXPORT_FORMATS, horizontal=True, key="amort_export_format",
+                                             format_func=str.upper)
+                    export_key = (pv_amort, rate_per_period_amort, pmt_amort, n_amort, mode_amort, export_format)
+                    if st.button("Preparar Ficheiro", key="amort_export_button"):
+                        buffer = io.BytesIO()
+                        chunks = fincalc.iter_schedule_chunks(pv_amort, rate_per_period_amort, pmt_amort, n_amort, mode_amort)
+                        export_stats = fincalc.write_chunks(chunks, buffer, export_format)
+                        st.session_state.amort_export = {'key': export_key, 'data': buffer.getvalue(), 'stats': export_stats}
+
+                    export = st.session_state.get('amort_export')
+                    if export and export['key'] == export_key:
+                        totals = fincalc.throughput(export['stats'])
+                        st.caption(f"{totals['rows']:,} linhas em {len(export['stats'])} blocos, "
+                                   f"{totals['seconds']:.3f} s ({totals['rows_per_second']:,.0f} linhas/s).")
+                        st.download_button(f"Descarregar {export_format.upper()}", export['data'],
+                                           file_name=f"amortizacao.{export_format}",
+                                           mime="text/csv" if export_format == 'csv' else "application/octet-stream")
         else:
             st.warning("Calcule primeiro uma variável TVM para ativar a funcionalidade de Amortização.")
 
+    with tvm_tabs[3]:
+        st.subheader("Fluxos Agregados de uma Carteira de Empréstimos")
+        st.markdown("""
+        Carregue um ficheiro (CSV ou Parquet) com um empréstimo por linha e as colunas **N**, **I/Y**, **PV** e,
+        opcionalmente, **PMT**, **P/Y**, **C/Y** e **BGN/END**. Os juros, o principal e o saldo de todos os
+        empréstimos são somados período a período, sem gerar a tabela de cada empréstimo.
+        * **Origem:** coluna com o período (inteiro) ou a data de origem de cada empréstimo (meses = períodos).
+        * **Agrupar por:** coluna usada para separar os totais (ex: segmento); "Coorte de origem" agrupa pelo mês de origem.
+        """)
+        loans_file = st.file_uploader("Ficheiro da carteira", type=["csv", "parquet"], key="portfolio_file")
+        if loans_file is not None:
+            loans_df = pd.read_parquet(loans_file) if loans_file.name.endswith(".parquet") else pd.read_csv(loans_file)
+            optional_columns = ["(nenhuma)"] + list(loans_df.columns)
+            pf_col1, pf_col2 = st.columns(2)
+            origination_col = pf_col1.selectbox("Origem", optional_columns, key="portfolio_origination")
+            group_col = pf_col2.selectbox("Agrupar por", optional_columns + ["Coorte de origem"], key="portfolio_group")
+
+            if st.button("Agregar Carteira"):
+                try:
+                    group_by = {"(nenhuma)": None, "Coorte de origem": "origination"}.get(group_col, group_col)
+                    if group_by == "origination" and origination_col == "(nenhuma)":
+                        raise ValueError("Escolha a coluna de origem para agrupar por coorte.")
+                    portfolio = fincalc.build_portfolio(loans_df, None if origination_col == "(nenhuma)" else origination_col, group_by)
+                    flows_df = pd.DataFrame(fincalc.portfolio_cashflows(portfolio))
+                    st.success(f"{portfolio.size:,} empréstimos agregados ({portfolio.nbytes / 1024:,.0f} KB em colunas).")
+                    st.line_chart(flows_df.pivot(index='Período', columns='Grupo', values='Saldo Final').abs())
+                    st.dataframe(flows_df)
+                except (ValueError, TypeError, KeyError) as e:
+                    st.error(f"Erro ao agregar a carteira: {e}")
+
 
 # --- Aba: Fluxo de Caixa (NPV & IRR) ---
 with main_tabs[2]:
@@ -473,6 +484,16 @@ with main_tabs[2]:
                 {"Fluxo (Cnn)": 4000.0, "Frequência (Fnn)": 1},
              ])
 
+        # Alternativa: carregar a tabela (Cnn, Fnn) de um ficheiro
+        cf_file = st.file_uploader("Carregar fluxos (CSV ou Parquet com colunas Cnn e Fnn)", type=["csv", "parquet"], key="cf_file")
+        if cf_file is not None and st.session_state.get('cf_file_id') != (cf_file.name, cf_file.size):
+            try:
+                st.session_state.cf_data = fincalc.read_cash_flow_table(cf_file, cf_file.name)
+                st.session_state.cf_file_id = (cf_file.name, cf_file.size) # Carregar só uma vez, para não apagar edições
+                mark_cash_flows_edited('cf')
+            except Exception as e:
+                st.error(f"Erro ao ler o ficheiro de fluxos: {e}")
+
         edited_df = st.data_editor(
             st.session_state.cf_data,
             num_rows="dynamic", # Permite adicionar/remover linhas
@@ -480,108 +501,272 @@ with main_tabs[2]:
                 "Fluxo (Cnn)": st.column_config.NumberColumn(format="%.2f", required=True),
                 "Frequência (Fnn)": st.column_config.NumberColumn(min_value=1, step=1, default=1, required=True)
             },
-            key="cf_editor_main"
+            key="cf_editor_main",
+            on_change=mark_cash_flows_edited, args=('cf',),
         )
         # Atualizar o estado se o dataframe for editado
         st.session_state.cf_data = edited_df
+        # Fluxos validados uma vez por edição e partilhados por NPV, IRR e perfil
+        cash_flows = current_cash_flows('cf', cf0, edited_df)
 
         # Input Taxa de Desconto
         discount_rate = st.number_input("I (Taxa de Desconto % por Período)", value=20.0, format="%.4f", help="Taxa usada para descontar os fluxos. Deve corresponder à periodicidade dos fluxos.", key="discount_rate_input")
 
         st.divider()
 
+        reinvest_rate = st.number_input("RI (Taxa de Reinvestimento % para MIRR)", value=discount_rate, format="%.4f", help="Taxa a que as entradas são reinvestidas no cálculo da MIRR; as saídas são descontadas à taxa I.", key="reinvest_rate_input")
+
         # Botões Calcular
-        cf_calc_col1, cf_calc_col2 = st.columns(2)
+        cf_calc_col1, cf_calc_col2, cf_calc_col3 = st.columns(3)
+
+        def cash_flows_ready():
+            """Mostra o aviso/erro de validação dos fluxos e indica se é possível calcular."""
+            if st.session_state.cf_data.empty:
+                st.warning("Tabela de fluxos de caixa está vazia.")
+            elif not cash_flows.valid:
+                st.error(cash_flows.error)
+            elif len(cash_flows.amounts) <= 1: # Precisa pelo menos CF0 e mais um
+                st.warning("Insira pelo menos um fluxo de caixa subsequente (C01).")
+            else:
+                return True
+            return False
 
         if cf_calc_col1.button("Calcular NPV", key="npv_button"):
             try:
-                cash_flows = [cf0]
-                valid_input = True
-                # Usar o dataframe do session_state que foi atualizado
-                current_cf_df = st.session_state.cf_data
-                if current_cf_df.empty:
-                     st.warning("Tabela de fluxos de caixa está vazia.")
-                     valid_input = False
-
-                for index, row in current_cf_df.iterrows():
-                    if not valid_input: break
-                    try:
-                         cf = float(row['Fluxo (Cnn)'])
-                         freq = int(row['Frequência (Fnn)'])
-                         if freq < 1 :
-                             st.error(f"Frequência inválida na linha {index+1}: {freq}. Deve ser >= 1.")
-                             valid_input = False
-                             break
-                         cash_flows.extend([cf] * freq)
-                    except (ValueError, TypeError):
-                        st.error(f"Valor inválido na linha {index+1}. Verifique 'Fluxo' e 'Frequência'.")
-                        valid_input = False
-                        break
-
-                if valid_input and len(cash_flows) > 1: # Precisa pelo menos CF0 e mais um
-                    rate = discount_rate / 100.0
-                    npv_result = npf.npv(rate, cash_flows)
+                if cash_flows_ready():
+                    # Fluxos agrupados (Cnn, Fnn): o NPV não expande as frequências
+                    npv_result = cash_flows.npv(discount_rate)
                     st.success(f"NPV = {npv_result:,.2f}")
-                elif valid_input:
-                     st.warning("Insira pelo menos um fluxo de caixa subsequente (C01).")
-
             except Exception as e:
                 st.error(f"Erro ao calcular NPV: {e}")
 
         if cf_calc_col2.button("Calcular IRR", key="irr_button"):
             try:
-                cash_flows = [cf0]
-                valid_input = True
-                current_cf_df = st.session_state.cf_data # Usar estado atualizado
-                if current_cf_df.empty:
-                     st.warning("Tabela de fluxos de caixa está vazia.")
-                     valid_input = False
-
-                for index, row in current_cf_df.iterrows():
-                    if not valid_input: break
-                    try:
-                        cf = float(row['Fluxo (Cnn)'])
-                        freq = int(row['Frequência (Fnn)'])
-                        if freq < 1 :
-                            st.error(f"Frequência inválida na linha {index+1}: {freq}. Deve ser >= 1.")
-                            valid_input = False
-                            break
-                        cash_flows.extend([cf] * freq)
-                    except (ValueError, TypeError):
-                         st.error(f"Valor inválido na linha {index+1}. Verifique 'Fluxo' e 'Frequência'.")
-                         valid_input = False
-                         break
-
-                if valid_input and len(cash_flows) > 1:
-                    sign_changes = sum(1 for i in range(len(cash_flows) - 1) if cash_flows[i] * cash_flows[i+1] < 0)
-                    if sign_changes == 0:
+                if cash_flows_ready():
+                    # Todas as IRR reais, calculadas sobre os fluxos agrupados
+                    irr_info = cash_flows.irr()
+                    if irr_info.sign_changes == 0:
                         st.error("Não é possível calcular IRR: Não há mudança de sinal nos fluxos de caixa (Error 5).")
+                    elif np.isnan(irr_info.irr):
+                        st.error("Não foi possível encontrar uma solução para IRR (pode ser devido a múltiplas IRRs ou problema de convergência - Error 7).")
                     else:
-                        # Usar try-except dentro do cálculo da IRR para capturar erros específicos
-                        try:
-                             irr_result = npf.irr(cash_flows)
-                             if np.isnan(irr_result): # Verificar se npf.irr retornou NaN
-                                 st.error("Não foi possível encontrar uma solução para IRR (pode ser devido a múltiplas IRRs ou problema de convergência - Error 7).")
-                             else:
-                                 st.success(f"IRR = {irr_result * 100:,.4f} %")
-                                 if sign_changes > 1:
-                                     st.warning("Múltiplas mudanças de sinal detetadas. A IRR apresentada pode ser uma de várias possíveis. Interprete com cautela.")
-                        except ValueError as irr_ve:
-                             # npf.irr pode levantar ValueError se não encontrar solução
-                             st.error(f"Erro ao calcular IRR: {irr_ve}. Verifique a sequência de fluxos.")
-
-                elif valid_input:
-                     st.warning("Insira pelo menos um fluxo de caixa subsequente (C01).")
-
+                        st.success(f"IRR = {irr_info.irr * 100:,.4f} %")
+                        if irr_info.sign_changes > 1:
+                            all_irrs = ", ".join(f"{root * 100:,.4f} %" for root in irr_info.roots)
+                            st.warning("Múltiplas mudanças de sinal detetadas. A IRR apresentada pode ser uma de várias possíveis. Interprete com cautela.")
+                            st.info(f"IRR encontradas: {all_irrs} (máximo possível pela regra de Descartes: {irr_info.sign_changes}).")
+                        st.caption(f"Iterações por raiz: {', '.join(str(i) for i in irr_info.iterations)}.")
             except Exception as e:
                  st.error(f"Erro inesperado ao preparar para calcular IRR: {e}")
 
+        if cf_calc_col3.button("Calcular MIRR / Payback / PI", key="metrics_button"):
+            try:
+                if cash_flows_ready():
+                    # Todas as métricas numa só passagem pelos grupos (Cnn, Fnn)
+                    metrics = cash_flows.metrics(discount_rate, reinvest_rate_percent=reinvest_rate)
+                    metric_col1, metric_col2 = st.columns(2)
+                    metric_col1.metric("MIRR", "-" if np.isnan(metrics.mirr) else f"{metrics.mirr * 100:,.4f} %")
+                    metric_col2.metric("Índice de Rendibilidade (PI)", "-" if np.isnan(metrics.profitability_index) else f"{metrics.profitability_index:,.4f}")
+                    metric_col1.metric("Payback (períodos)", "Não recupera" if np.isnan(metrics.payback) else f"{metrics.payback:,.2f}")
+                    metric_col2.metric("Payback Descontado (períodos)", "Não recupera" if np.isnan(metrics.discounted_payback) else f"{metrics.discounted_payback:,.2f}")
+            except Exception as e:
+                st.error(f"Erro ao calcular as métricas: {e}")
+
+        # Perfil do NPV: curva calculada uma vez por conjunto de fluxos (cache pelo hash)
+        with st.expander("Perfil do NPV e Taxa de Cruzamento"):
+            if not cash_flows.valid:
+                st.error(cash_flows.error)
+
+            if cash_flows.valid and len(cash_flows.amounts) > 1:
+                prof_col1, prof_col2, prof_col3 = st.columns(3)
+                profile_min = prof_col1.number_input("Taxa mínima (%)", value=0.0, step=5.0, key="profile_min")
+                profile_max = prof_col2.number_input("Taxa máxima (%)", value=50.0, step=5.0, key="profile_max")
+                profile_points = prof_col3.number_input("Pontos", min_value=10, max_value=2000, value=200, step=10, key="profile_points")
+
+                compare_projects = st.checkbox("Comparar com outro projeto (B)", key="profile_compare")
+                other_flows = None
+                if compare_projects:
+                    cf0_b = st.number_input("CF0 do Projeto B", value=-5000.0, format="%.2f", key="cf0_b_input")
+                    if 'cf_data_b' not in st.session_state:
+                        st.session_state.cf_data_b = pd.DataFrame([
+                            {"Fluxo (Cnn)": 2500.0, "Frequência (Fnn)": 3},
+                            {"Fluxo (Cnn)": 2000.0, "Frequência (Fnn)": 2},
+                        ])
+                    st.session_state.cf_data_b = st.data_editor(
+                        st.session_state.cf_data_b, num_rows="dynamic", key="cf_editor_b",
+                        on_change=mark_cash_flows_edited, args=('cf_b',),
+                        column_config={
+                            "Fluxo (Cnn)": st.column_config.NumberColumn(format="%.2f", required=True),
+                            "Frequência (Fnn)": st.column_config.NumberColumn(min_value=1, step=1, default=1, required=True),
+                        })
+                    other_flows = current_cash_flows('cf_b', cf0_b, st.session_state.cf_data_b)
+                    if not other_flows.valid:
+                        st.error(f"Projeto B: {other_flows.error}")
+
+                if profile_max <= profile_min or profile_min <= -100:
+                    st.warning("A taxa máxima deve ser maior que a mínima, e ambas maiores que -100%.")
+                else:
+                    profile_rates = np.linspace(profile_min, profile_max, int(profile_points))
+                    profile_df = pd.DataFrame({'Taxa (%)': profile_rates})
+                    profile_df['Projeto A'] = cached_npv_profile(
+                        cash_flows.key, profile_min, profile_max, int(profile_points), cash_flows)
+                    if other_flows is not None and other_flows.valid and len(other_flows.amounts) > 1:
+                        profile_df['Projeto B'] = cached_npv_profile(
+                            other_flows.key, profile_min, profile_max, int(profile_points), other_flows)
+                    st.line_chart(profile_df.set_index('Taxa (%)'))
+
+                    # O NPV na taxa escolhida é exato (O(grupos)) e não obriga a recalcular a curva
+                    slider_rate = st.slider("Taxa (%)", float(profile_min), float(profile_max), float(min(max(discount_rate, profile_min), profile_max)), key="profile_rate")
+                    st.metric("NPV do Projeto A", f"{cash_flows.npv(slider_rate):,.2f}")
+                    if 'Projeto B' in profile_df:
+                        st.metric("NPV do Projeto B", f"{other_flows.npv(slider_rate):,.2f}")
+                        crossover = fincalc.crossover_rates(cash_flows.amounts, cash_flows.freqs, other_flows.amounts, other_flows.freqs)
+                        if len(crossover.roots):
+                            st.info("Taxa(s) de cruzamento (NPV A = NPV B): " + ", ".join(f"{root * 100:,.4f} %" for root in crossover.roots))
+                        else:
+                            st.info("Os perfis de NPV dos dois projetos não se cruzam.")
+
+        # Simulação de Monte Carlo: distribuições nos fluxos Cnn e na taxa de desconto
+        with st.expander("Simulação de Monte Carlo (NPV / IRR)"):
+            if not cash_flows.valid or len(cash_flows.amounts) <= 1:
+                st.info("Defina fluxos de caixa válidos acima para simular.")
+            else:
+                st.caption("Desvio (%) é o desvio padrão em % do valor base (Normal, Lognormal); "
+                           "Mínimo e Máximo (%) são os limites da Triangular em % do valor base, com moda no valor base.")
+                sim_table = pd.DataFrame({
+                    'Grupo': ['CF0'] + [f"C{index:02d}" for index in range(1, len(cash_flows.amounts))],
+                    'Fluxo': cash_flows.amounts,
+                    'Frequência': cash_flows.freqs,
+                    'Distribuição': ['Fixo'] + ['Normal'] * (len(cash_flows.amounts) - 1),
+                    'Desvio (%)': [0.0] + [10.0] * (len(cash_flows.amounts) - 1),
+                    'Mínimo (%)': -20.0,
+                    'Máximo (%)': 20.0,
+                })
+                sim_table = st.data_editor(
+                    sim_table, key="sim_editor", hide_index=True,
+                    disabled=['Grupo', 'Fluxo', 'Frequência'],
+                    column_config={
+                        'Fluxo': st.column_config.NumberColumn(format="%.2f"),
+                        'Distribuição': st.column_config.SelectboxColumn(options=list(fincalc.DISTRIBUTION_LABELS), required=True),
+                        'Desvio (%)': st.column_config.NumberColumn(min_value=0.0),
+                        'Mínimo (%)': st.column_config.NumberColumn(max_value=0.0),
+                        'Máximo (%)': st.column_config.NumberColumn(min_value=0.0),
+                    })
+                sim_col1, sim_col2, sim_col3 = st.columns(3)
+                sim_rate_kind = sim_col1.selectbox("Distribuição da Taxa", fincalc.DISTRIBUTION_LABELS, index=1, key="sim_rate_kind")
+                sim_rate_spread = sim_col2.number_input("Desvio da Taxa (% do valor)", min_value=0.0, value=10.0, key="sim_rate_spread")
+                sim_rate_low, sim_rate_high = sim_col3.slider("Triangular da Taxa: Mín/Máx (%)", -100.0, 100.0, (-20.0, 20.0), key="sim_rate_range")
+                sim_col4, sim_col5, sim_col6 = st.columns(3)
+                sim_correlation = sim_col4.slider("Correlação entre fluxos", -0.5, 0.95, 0.0, step=0.05, key="sim_correlation")
+                sim_paths = sim_col5.number_input("Caminhos", min_value=1000, max_value=5_000_000, value=200_000, step=100_000, key="sim_paths")
+                sim_seed = sim_col6.number_input("Semente", min_value=0, value=0, step=1, key="sim_seed")
+                sim_irr = st.checkbox("Calcular também a distribuição da IRR", value=True, key="sim_irr")
+
+                if st.button("Simular", key="sim_button"):
+                    try:
+                        def distribution(label, spread, low, high):
+                            return fincalc.FlowDistribution(fincalc.DISTRIBUTIONS[fincalc.DISTRIBUTION_LABELS.index(label)], spread / 100.0, low / 100.0, high / 100.0)
+                        flow_dists = [distribution(row['Distribuição'], row['Desvio (%)'], row['Mínimo (%)'], row['Máximo (%)'])
+                                      for row in sim_table.to_dict('records')]
+                        simulation = fincalc.simulate_npv_irr(
+                            cash_flows.amounts, cash_flows.freqs, discount_rate, flow_dists,
+                            distribution(sim_rate_kind, sim_rate_spread, sim_rate_low, sim_rate_high),
+                            correlation=sim_correlation, paths=int(sim_paths), seed=int(sim_seed), compute_irr=sim_irr)
+                        sim_metric1, sim_metric2, sim_metric3 = st.columns(3)
+                        sim_metric1.metric("P(NPV < 0)", f"{simulation.prob_negative_npv * 100:,.2f} %")
+                        sim_metric2.metric("NPV Médio", f"{simulation.npv.mean():,.2f}")
+                        sim_metric3.metric("Tempo", f"{simulation.seconds:,.2f} s")
+                        st.dataframe(simulation.percentiles().style.format({'NPV': '{:,.2f}', 'IRR (%)': '{:,.4f}'}, na_rep='-'), hide_index=True)
+                        counts, edges = simulation.histogram(60)
+                        st.bar_chart(pd.DataFrame({'NPV': (edges[:-1] + edges[1:]) / 2, 'Caminhos': counts}).set_index('NPV'))
+                        if sim_irr:
+                            missing_irr = int(np.count_nonzero(np.isnan(simulation.irr)))
+                            if missing_irr:
+                                st.caption(f"{missing_irr:,} caminhos sem IRR (sem mudança de sinal ou sem raiz) ficam fora dos percentis da IRR.")
+                    except ValueError as ve:
+                        st.error(str(ve))
+                    except Exception as e:
+                        st.error(f"Erro na simulação: {e}")
+
+        # Avaliação de muitos projetos de uma só vez (NPV vetorizado, IRR em paralelo)
+        with st.expander("Avaliar Vários Projetos (ficheiro)"):
+            st.caption("Um projeto por linha: colunas CF0, CF1, ... (vazias no fim das linhas mais curtas), "
+                       "e opcionalmente 'Projeto' e 'Taxa (%)'. Sem 'Taxa (%)' usa-se a taxa de desconto acima.")
+            projects_file = st.file_uploader("Ficheiro de projetos", type=["csv", "parquet"], key="projects_file")
+            if projects_file is not None and st.button("Avaliar Projetos", key="projects_button"):
+                try:
+                    project_flows, project_rates, project_names = fincalc.read_projects(projects_file, projects_file.name)
+                    batch_rates = discount_rate if project_rates is None else project_rates
+                    batch = fincalc.evaluate_projects(project_flows, batch_rates)
+                    batch_metrics = fincalc.metrics_batch(project_flows, batch_rates)
+                    batch_df = batch.to_frame()
+                    batch_df.insert(0, 'Projeto', project_names)
+                    batch_df['IRR'] = batch_df['IRR'] * 100
+                    batch_df.insert(4, 'MIRR', batch_metrics.mirr * 100)
+                    batch_df.insert(5, 'Payback', batch_metrics.payback)
+                    batch_df.insert(6, 'Payback Descontado', batch_metrics.discounted_payback)
+                    batch_df.insert(7, 'PI', batch_metrics.profitability_index)
+                    st.success(f"{len(batch_df):,} projetos avaliados em {batch.seconds:.2f} s "
+                               f"({batch.projects_per_second:,.0f} projetos/s).")
+                    st.dataframe(batch_df.style.format({'NPV': '{:,.2f}', 'IRR': '{:,.4f} %', 'MIRR': '{:,.4f} %', 'Payback': '{:,.2f}',
+                                                        'Payback Descontado': '{:,.2f}', 'PI': '{:,.4f}'}, na_rep='-'))
+                except Exception as e:
+                    st.error(f"Erro ao avaliar os projetos: {e}")
+
+        # Fluxos com datas irregulares (XNPV / XIRR)
+        with st.expander("Fluxos com Datas (XNPV / XIRR)"):
+            st.caption("Cada fluxo é descontado pelos anos desde a primeira data, com a fração de ano da convenção escolhida: "
+                       "dias/365 (ACT), dias 30/360 / 360 (360) ou uma convenção de mercado (ACT/ACT ISDA e ICMA, ACT/360, "
+                       "ACT/365F, 30/360 US, 30E/360, 30E/360 ISDA). A taxa é anual efetiva.")
+            if 'dated_cf_data' not in st.session_state:
+                st.session_state.dated_cf_data = pd.DataFrame({
+                    'Data': [datetime.date(2024, 1, 1), datetime.date(2024, 3, 1), datetime.date(2024, 10, 30),
+                             datetime.date(2025, 2, 15), datetime.date(2025, 4, 1)],
+                    'Fluxo': [-10000.0, 2750.0, 4250.0, 3250.0, 2750.0],
+                })
+            dated_file = st.file_uploader("Carregar fluxos (CSV ou Parquet com colunas Data e Fluxo)", type=["csv", "parquet"], key="dated_cf_file")
+            if dated_file is not None and st.session_state.get('dated_cf_file_id') != (dated_file.name, dated_file.size):
+                try:
+                    st.session_state.dated_cf_data = fincalc.read_dated_flows(dated_file, dated_file.name)
+                    st.session_state.dated_cf_file_id = (dated_file.name, dated_file.size)
+                except Exception as e:
+                    st.error(f"Erro ao ler o ficheiro de fluxos: {e}")
+            dated_df = st.data_editor(
+                st.session_state.dated_cf_data,
+                num_rows="dynamic",
+                column_config={
+                    'Data': st.column_config.DateColumn(format="DD-MM-YYYY", required=True),
+                    'Fluxo': st.column_config.NumberColumn(format="%.2f", required=True),
+                },
+                key="dated_cf_editor",
+            )
+            st.session_state.dated_cf_data = dated_df
+            dated_col1, dated_col2 = st.columns(2)
+            dated_rate = dated_col1.number_input("Taxa de Desconto Anual (%)", value=9.0, format="%.4f", key="dated_rate_input")
+            dated_method = dated_col2.selectbox("Contagem de Dias", fincalc.DAY_COUNT_METHODS + fincalc.DAY_COUNT_CONVENTIONS, key="dated_method")
+            if st.button("Calcular XNPV e XIRR", key="dated_button"):
+                try:
+                    dated_clean = dated_df.dropna()
+                    dated_amounts = dated_clean['Fluxo'].to_numpy(dtype=float)
+                    dated_dates = pd.to_datetime(dated_clean['Data']).to_numpy()
+                    st.success(f"XNPV = {fincalc.xnpv(dated_rate, dated_amounts, dated_dates, dated_method):,.2f}")
+                    dated_irr = fincalc.xirr(dated_amounts, dated_dates, dated_method)
+                    if dated_irr.sign_changes == 0:
+                        st.error("Erro: É necessária pelo menos uma mudança de sinal nos fluxos de caixa para calcular a XIRR.")
+                    elif not dated_irr.converged:
+                        st.warning("Não foi possível encontrar a XIRR para estes fluxos.")
+                    else:
+                        st.success(f"XIRR = {dated_irr.rate * 100:,.4f} %")
+                        st.caption(f"{len(dated_amounts):,} fluxos, {dated_irr.iterations} iterações.")
+                except ValueError as e:
+                    st.error(f"Erro: {e}")
+
 
 # --- Aba: Conversão de Taxas ---
 with main_tabs[3]:
     st.header("Conversão de Taxas de Juro")
 
-    conv_tabs = st.tabs(["Explicação", "Calculadora"])
+    conv_tabs = st.tabs(["Explicação", "Calculadora", "Conversão em Massa"])
 
     with conv_tabs[0]:
         st.subheader("Taxa Nominal vs. Taxa Efetiva")
@@ -599,6 +784,7 @@ with main_tabs[3]:
         **Fórmulas (Conceptuais):**
         * `EFF = (1 + NOM / C/Y)^(C/Y) - 1`
         * `NOM = C/Y * ((1 + EFF)^(1 / C/Y) - 1)`
+        * Capitalização contínua (C/Y → ∞): `EFF = e^NOM - 1` e `NOM = ln(1 + EFF)`
         (As taxas NOM e EFF nas fórmulas são decimais, ex: 10% = 0.10)
         """)
 
@@ -613,6 +799,8 @@ with main_tabs[3]:
             eff_conv = st.number_input("EFF (Taxa Efetiva Anual %)", min_value=0.0, value=15.87, format="%.4f", help="Ex: 15.87 para 15.87%", key="eff_conv_input")
         with conv_col3:
             c_y_conv_input = st.number_input("C/Y (Capitalizações por Ano)", min_value=1, value=4, step=1, help="Ex: 4 para trimestral", key="cy_conv_input")
+            if st.checkbox("Capitalização contínua", key="cy_conv_continuous", help="Equivale a C/Y infinito: EFF = e^NOM - 1."):
+                c_y_conv_input = fincalc.CONTINUOUS
 
         st.divider()
         calc_conv_col1, calc_conv_col2 = st.columns(2)
@@ -622,7 +810,7 @@ with main_tabs[3]:
                 st.error("C/Y deve ser maior que zero.")
             else:
                 try:
-                    eff_calc = ((1 + (nom_conv / 100.0) / c_y_conv_input)**c_y_conv_input - 1) * 100.0
+                    eff_calc = fincalc.nominal_to_effective(nom_conv, c_y_conv_input)
                     st.success(f"EFF = {eff_calc:.4f} %")
                 except Exception as e:
                     st.error(f"Erro ao calcular EFF: {e}")
@@ -635,15 +823,34 @@ with main_tabs[3]:
              else:
                 try:
                     # Lidar com potencial expoente complexo se (1+eff/100) for negativo
-                    base = 1 + eff_conv / 100.0
-                    if base < 0:
-                         st.error("Não é possível calcular NOM para esta taxa efetiva negativa (resultaria em raiz de número negativo).")
-                    else:
-                         nom_calc = c_y_conv_input * (base**(1.0 / c_y_conv_input) - 1.0) * 100.0
-                         st.success(f"NOM = {nom_calc:.4f} %")
+                    nom_calc = fincalc.effective_to_nominal(eff_conv, c_y_conv_input)
+                    st.success(f"NOM = {nom_calc:.4f} %")
+                except ValueError as ve:
+                    st.error(str(ve))
                 except Exception as e:
                     st.error(f"Erro ao calcular NOM: {e}")
 
+    with conv_tabs[2]:
+        st.subheader("Conversão de Folhas de Taxas")
+        st.caption("Ficheiro CSV ou Parquet com as colunas 'Taxa (%)' (nominal anual) e 'C/Y' "
+                   "(1 = taxa efetiva, 'Contínua' = capitalização contínua) e, opcionalmente, 'P/Y' para a taxa por período.")
+        rates_file = st.file_uploader("Folha de taxas", type=["csv", "parquet"], key="rates_file")
+        bulk_col1, bulk_col2 = st.columns(2)
+        bulk_target = bulk_col1.number_input("Converter também para NOM com C/Y", min_value=1, value=12, step=1, key="rates_target_cy")
+        if bulk_col2.checkbox("Alvo com capitalização contínua", key="rates_target_continuous"):
+            bulk_target = fincalc.CONTINUOUS
+        if rates_file is not None and st.button("Converter Taxas", key="rates_button"):
+            try:
+                converted_rates = fincalc.convert_rate_table(fincalc.read_rate_table(rates_file, rates_file.name), target_c_y=bulk_target)
+                st.success(f"{len(converted_rates):,} taxas convertidas.")
+                st.dataframe(converted_rates)
+                st.download_button("Descarregar CSV", converted_rates.to_csv(index=False).encode('utf-8'),
+                                   file_name="taxas_convertidas.csv", mime="text/csv", key="rates_download")
+            except ValueError as ve:
+                st.error(str(ve))
+            except Exception as e:
+                st.error(f"Erro ao converter as taxas: {e}")
+
 
 # --- Aba: Margem de Lucro ---
 with main_tabs[4]:
@@ -692,7 +899,7 @@ with main_tabs[4]:
                 st.error("Preço de Venda (SEL) deve ser positivo para calcular Custo se a Margem não for zero.")
             else:
                 try:
-                    cst_calc = sel_m * (1.0 - mar_m / 100.0)
+                    cst_calc = fincalc.solve_cost(sel_m, mar_m)
                     st.success(f"Custo (CST) = {cst_calc:.2f}")
                 except Exception as e:
                     st.error(f"Erro ao calcular Custo: {e}")
@@ -704,7 +911,7 @@ with main_tabs[4]:
                   st.error("Custo (CST) não pode ser negativo.")
              else:
                  try:
-                    sel_calc = cst_m / (1.0 - mar_m / 100.0)
+                    sel_calc = fincalc.solve_selling_price(cst_m, mar_m)
                     st.success(f"Preço Venda (SEL) = {sel_calc:.2f}")
                  except ZeroDivisionError:
                       st.error("Margem não pode ser 100%.")
@@ -716,17 +923,47 @@ with main_tabs[4]:
                 st.error("Preço de Venda (SEL) não pode ser zero para calcular a Margem.")
             else:
                 try:
-                    mar_calc = ((sel_m - cst_m) / sel_m) * 100.0
+                    mar_calc = fincalc.solve_margin(sel_m, cst_m)
                     st.success(f"Margem (MAR) = {mar_calc:.2f} %")
                 except Exception as e:
                     st.error(f"Erro ao calcular Margem: {e}")
 
+        # Catálogos grandes: leitura, cálculo e escrita em blocos (memória constante)
+        with st.expander("Catálogo de Preços em Massa (ficheiro)"):
+            st.caption("Ficheiro CSV ou Parquet com as colunas CST, SEL e MAR (%) e quaisquer outras (ex: SKU), "
+                       "que são mantidas. Em modo automático cada linha resolve a única coluna vazia; "
+                       "as linhas inválidas ficam marcadas na coluna 'Erro'.")
+            catalog_file = st.file_uploader("Catálogo", type=["csv", "parquet"], key="catalog_file")
+            catalog_col1, catalog_col2 = st.columns(2)
+            catalog_target = catalog_col1.selectbox("Variável a resolver", ["Automático"] + list(fincalc.MARGIN_VARIABLES), key="catalog_target")
+            catalog_format = catalog_col2.selectbox("Formato de saída", fincalc.EXPORT_FORMATS, key="catalog_format")
+            if catalog_file is not None and st.button("Processar Catálogo", key="catalog_button"):
+                invalid_rows = [0]
+
+                def count_invalid(chunks):
+                    for chunk in chunks:
+                        invalid_rows[0] += int(np.count_nonzero(chunk['Erro'] != fincalc.MARGIN_ERROR_LABELS[fincalc.MARGIN_OK]))
+                        yield chunk
+
+                try:
+                    catalog_buffer = io.BytesIO()
+                    catalog_chunks = fincalc.iter_margin_chunks(
+                        catalog_file, catalog_file.name, None if catalog_target == "Automático" else catalog_target)
+                    catalog_stats = fincalc.write_chunks(count_invalid(catalog_chunks), catalog_buffer, catalog_format)
+                    catalog_summary = fincalc.throughput(catalog_stats)
+                    st.success(f"{catalog_summary['rows']:,} linhas em {len(catalog_stats)} blocos, "
+                               f"{catalog_summary['rows_per_second']:,.0f} linhas/s; {invalid_rows[0]:,} linhas inválidas.")
+                    st.download_button("Descarregar Resultado", catalog_buffer.getvalue(),
+                                       file_name=f"catalogo_margens.{catalog_format}", key="catalog_download")
+                except Exception as e:
+                    st.error(f"Erro ao processar o catálogo: {e}")
+
 
 # --- Aba: Ponto de Equilíbrio (Breakeven) ---
 with main_tabs[5]:
     st.header("Análise do Ponto de Equilíbrio (Breakeven)")
 
-    be_tabs = st.tabs(["Explicação", "Calculadora"])
+    be_tabs = st.tabs(["Explicação", "Calculadora", "Sensibilidade"])
 
     with be_tabs[0]:
         st.subheader("O que é o Ponto de Equilíbrio?")
@@ -772,32 +1009,93 @@ with main_tabs[5]:
         st.write("**Calcular Variável Desconhecida:**")
         calc_be_col1, calc_be_col2, calc_be_col3, calc_be_col4, calc_be_col5 = st.columns(5)
 
-        # Botões usam a função calculate_breakeven definida no TOPO do script
+        # Botões usam a função calculate_breakeven do pacote fincalc
         if calc_be_col1.button("Calcular FC", key="calc_fc_be"):
-            result = calculate_breakeven({'VC': vc_be, 'P': p_be, 'PFT': pft_be, 'Q': q_be, 'Target': 'FC', 'FC': None})
+            result = fincalc.calculate_breakeven({'VC': vc_be, 'P': p_be, 'PFT': pft_be, 'Q': q_be, 'Target': 'FC', 'FC': None})
             if isinstance(result, str): st.error(result)
             else: st.success(f"FC = {result:.2f}")
 
         if calc_be_col2.button("Calcular VC", key="calc_vc_be"):
-             result = calculate_breakeven({'FC': fc_be, 'P': p_be, 'PFT': pft_be, 'Q': q_be, 'Target': 'VC', 'VC': None})
+             result = fincalc.calculate_breakeven({'FC': fc_be, 'P': p_be, 'PFT': pft_be, 'Q': q_be, 'Target': 'VC', 'VC': None})
              if isinstance(result, str): st.error(result)
              else: st.success(f"VC = {result:.2f}")
 
         if calc_be_col3.button("Calcular P", key="calc_p_be"):
-            result = calculate_breakeven({'FC': fc_be, 'VC': vc_be, 'PFT': pft_be, 'Q': q_be, 'Target': 'P', 'P': None})
+            result = fincalc.calculate_breakeven({'FC': fc_be, 'VC': vc_be, 'PFT': pft_be, 'Q': q_be, 'Target': 'P', 'P': None})
             if isinstance(result, str): st.error(result)
             else: st.success(f"P = {result:.2f}")
 
         if calc_be_col4.button("Calcular PFT", key="calc_pft_be"):
-            result = calculate_breakeven({'FC': fc_be, 'VC': vc_be, 'P': p_be, 'Q': q_be, 'Target': 'PFT', 'PFT': None})
+            result = fincalc.calculate_breakeven({'FC': fc_be, 'VC': vc_be, 'P': p_be, 'Q': q_be, 'Target': 'PFT', 'PFT': None})
             if isinstance(result, str): st.error(result)
             else: st.success(f"PFT = {result:.2f}")
 
         if calc_be_col5.button("Calcular Q", key="calc_q_be"):
-            result = calculate_breakeven({'FC': fc_be, 'VC': vc_be, 'P': p_be, 'PFT': pft_be, 'Target': 'Q', 'Q': None})
+            result = fincalc.calculate_breakeven({'FC': fc_be, 'VC': vc_be, 'P': p_be, 'PFT': pft_be, 'Target': 'Q', 'Q': None})
             if isinstance(result, str): st.error(result)
             else: st.success(f"Q = {result:.2f}")
 
+        # Muitos cenários de preços de uma só vez (vetorizado, erros como códigos)
+        with st.expander("Cenários em Massa (ficheiro)"):
+            st.caption("Ficheiro CSV ou Parquet com as colunas P, VC, FC, PFT e Q. Em modo automático cada linha "
+                       "resolve a única coluna vazia.")
+            be_file = st.file_uploader("Ficheiro de cenários", type=["csv", "parquet"], key="be_file")
+            be_target = st.selectbox("Variável a resolver", ["Automático"] + list(fincalc.BREAKEVEN_VARIABLES), key="be_batch_target")
+            if be_file is not None and st.button("Resolver Cenários", key="be_batch_button"):
+                try:
+                    be_scenarios = pd.read_parquet(be_file) if be_file.name.lower().endswith('.parquet') else pd.read_csv(be_file)
+                    be_batch = fincalc.solve_breakeven_batch(be_scenarios, None if be_target == "Automático" else be_target)
+                    be_failed = int(np.count_nonzero(be_batch.failed))
+                    st.success(f"{len(be_batch.error):,} cenários resolvidos ({be_failed:,} com erro).")
+                    be_frame = be_batch.to_frame()
+                    st.dataframe(be_frame.head(10_000))
+                    st.download_button("Descarregar CSV", be_frame.to_csv(index=False).encode('utf-8'),
+                                       file_name="breakeven_cenarios.csv", mime="text/csv", key="be_batch_download")
+                except Exception as e:
+                    st.error(f"Erro ao resolver os cenários: {e}")
+
+    with be_tabs[2]:
+        st.subheader("Grelhas de Sensibilidade e Gráfico Tornado")
+        st.caption("Usa os valores da Calculadora como caso base. Cada grelha fica em cache pelas suas entradas: "
+                   "mudar o gráfico tornado não recalcula a grelha, e vice-versa.")
+        be_base = (('P', p_be), ('VC', vc_be), ('FC', fc_be), ('PFT', pft_be), ('Q', q_be))
+        be_base_dict = dict(be_base)
+
+        def axis_range(name, column, key):
+            """Limites de um eixo da grelha, por defeito ±50% do valor base."""
+            base_value = be_base_dict[name]
+            default = (base_value * 0.5, base_value * 1.5) if base_value else (-1000.0, 1000.0)
+            low = column.number_input(f"{name} mínimo", value=float(min(default)), format="%.2f", key=f"{key}_min")
+            high = column.number_input(f"{name} máximo", value=float(max(default)), format="%.2f", key=f"{key}_max")
+            return float(low), float(high)
+
+        sens_col1, sens_col2, sens_col3 = st.columns(3)
+        sens_target = sens_col1.selectbox("Variável resolvida", fincalc.BREAKEVEN_VARIABLES, index=4, key="sens_target")
+        grid_options = [name for name in fincalc.BREAKEVEN_VARIABLES if name != sens_target]
+        sens_x = sens_col2.selectbox("Eixo X", grid_options, index=0, key="sens_x")
+        y_options = [name for name in grid_options if name != sens_x]
+        sens_y = sens_col3.selectbox("Eixo Y", y_options, index=0, key="sens_y")
+        range_col1, range_col2, range_col3 = st.columns(3)
+        sens_x_range = axis_range(sens_x, range_col1, "sens_x_range")
+        sens_y_range = axis_range(sens_y, range_col2, "sens_y_range")
+        sens_points = range_col3.slider("Pontos por eixo", 20, 500, 200, step=10, key="sens_points")
+
+        if sens_x_range[1] <= sens_x_range[0] or sens_y_range[1] <= sens_y_range[0]:
+            st.warning("O máximo de cada eixo deve ser maior que o mínimo.")
+        else:
+            grid_key = (be_base, sens_target, sens_x, sens_x_range, sens_y, sens_y_range, int(sens_points))
+            sens_grid = cached_breakeven_grid(*grid_key)
+            st.image(render_sensitivity_heatmap(grid_key, sens_grid))
+            unsolved = np.count_nonzero(sens_grid.error)
+            if unsolved:
+                st.caption(f"{unsolved:,} de {sens_grid.error.size:,} pontos sem solução "
+                           f"({', '.join(sorted({fincalc.BREAKEVEN_ERROR_LABELS[code] for code in np.unique(sens_grid.error) if code}))}).")
+
+        st.divider()
+        tornado_shock = st.slider("Choque em cada variável (± %)", 1, 50, 10, key="tornado_shock")
+        # O valor base da variável resolvida não entra no cálculo nem na chave da cache
+        st.image(render_tornado_chart(tuple(item for item in be_base if item[0] != sens_target), sens_target, tornado_shock / 100.0))
+
 
 # --- Aba: Depreciação ---
 with main_tabs[6]:
@@ -812,7 +1110,7 @@ with main_tabs[6]:
         Existem vários métodos para calcular a despesa de depreciação anual.
 
         **Variáveis Principais:**
-        * **Método:** O método de cálculo da depreciação (SL, SYD, DB, DBX).
+        * **Método:** O método de cálculo da depreciação (SL, SYD, DB, DBX, MACRS, MACRS-MQ).
         * **LIF (Life):** A vida útil estimada do ativo em anos.
         * **M01 (Starting Month):** O mês em que o ativo começa a ser depreciado (ex: 1 para Janeiro, 3.5 para meio de Março).
         * **CST (Cost):** O custo original de aquisição do ativo.
@@ -832,7 +1130,8 @@ with main_tabs[6]:
         * **DB (Declining Balance / Saldo Decrescente):** Método acelerado que aplica uma taxa fixa ao valor contabilístico *restante* (RBV) de cada ano. Frequentemente usa-se o dobro da taxa da linha reta (DB 200%).
             * `Taxa DB = FactorDB / LIF` (FactorDB é geralmente 1.5 ou 2.0 para 150% ou 200%).
             * `Depreciação Anual = RBV_inicio_ano * Taxa DB`. A depreciação não pode levar RBV abaixo de SAL.
-        * **DBX (Declining Balance with Crossover):** Igual ao DB, mas muda automaticamente para Linha Reta quando esta última resultar numa depreciação anual maior. (Este método é mais complexo de implementar aqui).
+        * **DBX (Declining Balance with Crossover):** Igual ao DB, mas muda automaticamente para Linha Reta (sobre o valor ainda por depreciar e a vida restante) quando esta última resultar numa depreciação anual maior. O ano da mudança é calculado diretamente, sem comparar os dois métodos ano a ano, e o ativo fica no valor residual no último ano da vida.
+        * **MACRS (EUA):** Percentagens anuais fixas por classe de ativo (3, 5, 7, 10, 15 ou 20 anos), DB 200% (150% nas classes de 15 e 20 anos) com passagem a Linha Reta, sem valor residual. **MACRS** usa a convenção de meio-ano; **MACRS-MQ** a de meio-trimestre, com o trimestre dado por M01. As percentagens não são arredondadas como nas tabelas publicadas (diferenças até 0,01%).
 
         **Nota:** As calculadoras financeiras podem arredondar resultados intermédios com base nas casas decimais definidas, o que pode levar a pequenas diferenças vs. cálculos sem arredondamento intermédio.
         """)
@@ -853,11 +1152,11 @@ with main_tabs[6]:
         depr_col1, depr_col2 = st.columns(2)
 
         with depr_col1:
-            method_depr = st.selectbox("Método de Depreciação", ["SL", "SYD", "DB"], help="SL=Linha Reta, SYD=Soma dos Dígitos, DB=Saldo Decrescente", key="depr_method")
-            lif_depr = st.number_input("Vida Útil (LIF - anos)", min_value=1, value=5, step=1, key="depr_lif")
+            method_depr = st.selectbox("Método de Depreciação", list(fincalc.DEPRECIATION_METHODS), help="SL=Linha Reta, SYD=Soma dos Dígitos, DB=Saldo Decrescente, DBX=Saldo Decrescente com passagem a Linha Reta, MACRS=tabelas MACRS (meio-ano / meio-trimestre)", key="depr_method")
+            lif_depr = st.number_input("Vida Útil (LIF - anos)", min_value=1, value=5, step=1, help="Nos métodos MACRS é a classe: 3, 5, 7, 10, 15 ou 20 anos.", key="depr_lif")
             m01_depr = st.number_input("Mês Inicial (M01)", min_value=1.0, max_value=12.999, value=1.0, step=0.1, format="%.2f", help="Ex: 1.0 = Início Jan, 3.5 = Meio Março", key="depr_m01")
             db_factor = 0 # Inicializar
-            if method_depr == "DB":
+            if method_depr in ("DB", "DBX"):
                 db_factor_percent = st.number_input("Fator DB (%)", min_value=1.0, value=200.0, step=10.0, format="%.1f", help="Ex: 200.0 para Dobro Saldo Decrescente", key="depr_db_factor")
                 db_factor = db_factor_percent / 100.0
 
@@ -866,157 +1165,62 @@ with main_tabs[6]:
             sal_depr = st.number_input("Valor Residual (SAL)", min_value=0.0, value=1000.0, format="%.2f", key="depr_sal")
             yr_depr = st.number_input("Ano a Calcular (YR)", min_value=1, max_value=int(lif_depr) + 1, value=1, step=1, key="depr_yr")
 
-        # Guardar inputs atuais para poder fazer reset
+        # Inputs que definem a tabela de depreciação (o ano escolhido é só uma consulta à tabela)
         current_inputs = {
              'method': method_depr, 'lif': lif_depr, 'm01': m01_depr, 'cst': cst_depr,
-             'sal': sal_depr, 'db_factor': db_factor, 'yr': yr_depr
+             'sal': sal_depr, 'db_factor': db_factor
         }
 
         if sal_depr >= cst_depr:
             st.error("Valor Residual (SAL) não pode ser maior ou igual ao Custo (CST).")
 
+        # Tabela completa de todos os anos, calculada uma vez por combinação de inputs (cache LRU)
+        depr_schedule, depr_error = None, None
+        try:
+            depr_schedule = fincalc.get_depreciation_schedule(method_depr, lif_depr, m01_depr, cst_depr, sal_depr, db_factor)
+        except Exception as e:
+            depr_error = str(e)
 
-        # Função de cálculo da depreciação (movida para fora do botão para reutilização)
-        # --- Esta função foi definida anteriormente, não precisa redefinir ---
-        # def calculate_depreciation_for_year(...): ...
-
-
-        # Botão Calcular / Próximo Ano
-        calc_depr_col1, calc_depr_col2 = st.columns(2)
+        # Botões Calcular / Próximo Ano / Limpar
+        calc_depr_col1, calc_depr_col2, calc_depr_col3 = st.columns(3)
 
+        requested_year = None
         if calc_depr_col1.button(f"Calcular para Ano {yr_depr}", key="depr_calc_button"):
+            requested_year = yr_depr
+        if calc_depr_col2.button("Próximo Ano", key="depr_next_button"):
+            inputs_unchanged = st.session_state.depr_state.get('last_inputs') == current_inputs
+            requested_year = st.session_state.depr_state['last_yr_calculated'] + 1 if inputs_unchanged else 1
+
+        if requested_year is not None:
             # Verificar se inputs mudaram desde o último cálculo com sucesso
             if st.session_state.depr_state['last_yr_calculated'] > 0 and st.session_state.depr_state.get('last_inputs') != current_inputs:
                  st.warning("Inputs alterados. Histórico de cálculo reiniciado. A calcular do zero.")
-                 st.session_state.depr_state = { # Reset state
-                     'accumulated_depreciation': 0.0, 'last_yr_calculated': 0,
-                     'current_rbv': cst_depr, 'current_rdv': max(0.0, cst_depr - sal_depr),
-                     'last_inputs': {}
-                 }
-
-
-            accumulated_dep = 0.0
-            results = {}
-            error_msg = None
-            rbv_start_of_target_year = cst_depr # Inicializar
-
-            # Recalcular do início até ao ano YR para obter o estado correto
-            for y_calc in range(1, yr_depr + 1):
-                # --- Nova função interna para encapsular lógica ---
-                def calculate_single_year(year_num, method, life, m01_frac, cost, salvage, db_rate, current_accum_dep):
-                    depreciable_base = cost - salvage
-                    if depreciable_base <= 0: return {'DEP': 0.0, 'RBV': salvage, 'RDV': 0.0, 'AccDep': cost - salvage}
-
-                    first_year_factor = (13.0 - m01_frac) / 12.0
-                    if m01_frac == int(m01_frac): first_year_factor = (12.0 - int(m01_frac) + 1) / 12.0
-                    last_year_factor = 1.0 - first_year_factor # Simplificação
-
-                    dep_year = 0.0
-                    rbv_start = cost - current_accum_dep
-                    if rbv_start <= salvage: return {'DEP': 0.0, 'RBV': salvage, 'RDV': 0.0, 'AccDep': cost - salvage}
-
-                    if method == "SL":
-                        annual_dep_full = depreciable_base / life if life > 0 else 0
-                        if year_num == 1: dep_year = annual_dep_full * first_year_factor
-                        elif year_num == int(life) + 1 and last_year_factor > 0 : dep_year = annual_dep_full * last_year_factor
-                        elif year_num <= life: dep_year = annual_dep_full
-                        else: dep_year = 0.0
-                    elif method == "SYD":
-                        syd_total = life * (life + 1) / 2.0
-                        if syd_total == 0: return {'DEP': 0.0, 'RBV': rbv_start, 'RDV': max(0.0, rbv_start - salvage), 'AccDep': current_accum_dep}
-                        # Abordagem simplificada para M01 - pode não ser perfeita
-                        def syd_dep_full(k, base, total, life_int):
-                             if k < 1 or k > life_int or total == 0: return 0
-                             return base * (life_int - k + 1) / total
-
-                        dep_full_prev = syd_dep_full(year_num - 1, depreciable_base, syd_total, int(life))
-                        dep_full_curr = syd_dep_full(year_num, depreciable_base, syd_total, int(life))
-
-                        year_start_fraction = (m01_frac - 1.0) / 12.0 if m01_frac > 1 else 0
-                        year_end_fraction = 1.0 - year_start_fraction
-
-                        if year_num == 1:
-                             dep_year = dep_full_curr * first_year_factor
-                        elif year_num <= life :
-                             dep_year = (dep_full_prev * year_start_fraction) + (dep_full_curr * year_end_fraction)
-                        elif year_num == int(life) + 1 and last_year_factor > 0:
-                             dep_year = dep_full_prev * last_year_factor
-                        else: dep_year = 0.0
-
-                    elif method == "DB":
-                        db_rate_eff = db_rate / life if life > 0 else 0
-                        dep_provisional = rbv_start * db_rate_eff
-                        if year_num == 1: dep_year = dep_provisional * first_year_factor
-                        elif year_num <= life: dep_year = dep_provisional
-                        else: dep_year = 0.0
-
-                    # Ajuste final para não depreciar abaixo do valor residual
-                    if rbv_start - dep_year < salvage:
-                        dep_year = max(0.0, rbv_start - salvage)
-
-                    new_accum_dep = current_accum_dep + dep_year
-                    new_rbv = cost - new_accum_dep
-                    new_rdv = max(0.0, new_rbv - salvage)
-
-                    return {'DEP': dep_year, 'RBV': new_rbv, 'RDV': new_rdv, 'AccDep': new_accum_dep}
-                # --- Fim da função interna ---
-
-                # Chamar a função interna
-                if y_calc == yr_depr: # Guardar RBV no início do ano alvo
-                     rbv_start_of_target_year = cst_depr - accumulated_dep
-
-                year_result = calculate_single_year(y_calc, method_depr, lif_depr, m01_depr, cst_depr, sal_depr, db_factor, accumulated_dep)
-
-                if "error" in year_result:
-                     error_msg = year_result["error"]
-                     break
-                # Atualizar depreciação acumulada para a próxima iteração
-                accumulated_dep = year_result['AccDep']
-                # Guardar o resultado do ano alvo
-                if y_calc == yr_depr:
-                     results = year_result
-
-            # --- Fim do loop de cálculo ---
+                 reset_depreciation_state(cst_depr, sal_depr)
 
-            if error_msg:
-                 st.error(f"Erro ao calcular para o ano {y_calc if 'y_calc' in locals() else yr_depr}: {error_msg}")
-                 # Limpar estado se houve erro
-                 st.session_state.depr_state = {
-                     'accumulated_depreciation': 0.0, 'last_yr_calculated': 0,
-                     'current_rbv': cst_depr, 'current_rdv': max(0.0, cst_depr - sal_depr),
-                     'last_inputs': {}
-                 }
+            results = depr_schedule.year_result(requested_year) if depr_schedule is not None else {}
+            if depr_error:
+                 st.error(f"Erro ao calcular para o ano {requested_year}: {depr_error}")
+                 reset_depreciation_state(cst_depr, sal_depr) # Limpar estado se houve erro
             elif results:
                 st.session_state.depr_state['accumulated_depreciation'] = results['AccDep']
-                st.session_state.depr_state['last_yr_calculated'] = yr_depr
+                st.session_state.depr_state['last_yr_calculated'] = requested_year
                 st.session_state.depr_state['current_rbv'] = results['RBV']
                 st.session_state.depr_state['current_rdv'] = results['RDV']
                 st.session_state.depr_state['last_inputs'] = current_inputs # Guardar inputs que deram este resultado
 
-                st.success(f"Resultados para o Ano {yr_depr}:")
+                st.success(f"Resultados para o Ano {requested_year}:")
                 res_col1, res_col2, res_col3 = st.columns(3)
                 res_col1.metric("Depreciação (DEP)", f"{results['DEP']:,.2f} €")
                 res_col2.metric("Valor Contabilístico Rest. (RBV)", f"{results['RBV']:,.2f} €")
                 res_col3.metric("Valor Depreciável Rest. (RDV)", f"{results['RDV']:,.2f} €")
             else:
-                 # Se results ficou vazio (ex: yr_depr=0?), mostrar aviso
                  st.warning("Não foi possível calcular. Verifique os inputs.")
-                 st.session_state.depr_state = { # Reset state
-                     'accumulated_depreciation': 0.0, 'last_yr_calculated': 0,
-                     'current_rbv': cst_depr, 'current_rdv': max(0.0, cst_depr - sal_depr),
-                     'last_inputs': {}
-                 }
+                 reset_depreciation_state(cst_depr, sal_depr)
 
 
         # Botão para limpar estado
-        if calc_depr_col2.button("Limpar Histórico de Cálculo", key="depr_clear_button"):
-             st.session_state.depr_state = {
-                'accumulated_depreciation': 0.0,
-                'last_yr_calculated': 0,
-                'current_rbv': cst_depr, # Reset RBV para Custo inicial
-                'current_rdv': max(0.0, cst_depr - sal_depr), # Reset RDV para base depreciável
-                'last_inputs': {}
-             }
+        if calc_depr_col3.button("Limpar Histórico de Cálculo", key="depr_clear_button"):
+             reset_depreciation_state(cst_depr, sal_depr) # RBV volta ao custo inicial e RDV à base depreciável
              st.rerun() # Recarrega para refletir a limpeza
 
 
@@ -1024,6 +1228,39 @@ with main_tabs[6]:
         if st.session_state.depr_state['last_yr_calculated'] > 0:
             st.caption(f"Último cálculo: Ano {st.session_state.depr_state['last_yr_calculated']}, Dep. Acumulada: {st.session_state.depr_state['accumulated_depreciation']:,.2f} €, RBV Final: {st.session_state.depr_state['current_rbv']:,.2f} €")
 
+        if depr_schedule is not None:
+            with st.expander("Tabela de Depreciação Completa"):
+                st.dataframe(
+                    depr_schedule.to_frame().style.format({column: '{:,.2f}' for column in fincalc.DEPRECIATION_COLUMNS[1:]}),
+                    hide_index=True,
+                )
+
+
+        with st.expander("Registo de Ativos em Massa (ficheiro)"):
+            st.caption("Ficheiro CSV ou Parquet com um ativo por linha e as colunas Método (SL, SYD, DB, DBX, MACRS, MACRS-MQ), CST, SAL, LIF e M01; "
+                       "opcionalmente 'Fator DB (%)' (200 por omissão), 'Categoria' e 'Ano Inicial' (ano de vida do ativo "
+                       "no primeiro ano da projeção). As restantes colunas (ex: Ativo) são mantidas e as linhas inválidas "
+                       "ficam marcadas na coluna 'Erro'.")
+            register_file = st.file_uploader("Registo de ativos", type=["csv", "parquet"], key="register_file")
+            register_col1, register_col2 = st.columns(2)
+            register_years = register_col1.number_input("Anos de projeção", min_value=1, max_value=100, value=fincalc.DEFAULT_PROJECTION_YEARS, step=1, key="register_years")
+            register_format = register_col2.selectbox("Formato de saída", fincalc.EXPORT_FORMATS, index=1, key="register_format")
+            if register_file is not None and st.button("Projetar Registo", key="register_button"):
+                try:
+                    register_buffer = io.BytesIO()
+                    register_totals = []
+                    register_chunks = fincalc.iter_register_chunks(register_file, register_file.name, int(register_years), totals=register_totals)
+                    register_stats = fincalc.write_chunks(register_chunks, register_buffer, register_format)
+                    register_summary = fincalc.throughput(register_stats)
+                    st.success(f"{register_summary['rows']:,} ativos em {len(register_stats)} blocos, "
+                               f"{register_summary['rows_per_second']:,.0f} ativos/s.")
+                    st.write("**Totais por Categoria**")
+                    st.dataframe(fincalc.merge_category_totals(register_totals).style.format({'DEP': '{:,.2f}', 'RBV': '{:,.2f}', 'RDV': '{:,.2f}'}), hide_index=True)
+                    st.download_button("Descarregar Projeção", register_buffer.getvalue(),
+                                       file_name=f"projecao_depreciacao.{register_format}", key="register_download")
+                except Exception as e:
+                    st.error(f"Erro ao processar o registo de ativos: {e}")
+
 
 # --- Aba: Datas ---
 with main_tabs[7]:
@@ -1043,6 +1280,7 @@ with main_tabs[7]:
         * **Método Dia (Day-Count Method):** Como os dias são contados:
             * **ACT (Actual/Actual):** Usa o número real de dias em cada mês e considera anos bissextos.
             * **360 (30/360):** Assume que todos os meses têm 30 dias (total 360 dias por ano). Usado em alguns cálculos de juros de obrigações/mercado monetário.
+            * A calculadora de DBD usa só ACT e 360, como a calculadora financeira. As convenções de mercado (ACT/ACT ISDA e ICMA, ACT/360, ACT/365F, 30/360 US, 30E/360 e 30E/360 ISDA) estão em "Convenções de Contagem de Dias", que mostra os dias e a fração de ano entre DT1 e DT2 em cada uma.
 
         **Funcionalidades:**
         1.  **Calcular DBD:** Dados DT1 e DT2, calcula o número de dias entre elas usando o método ACT ou 360.
@@ -1053,6 +1291,7 @@ with main_tabs[7]:
         * Algumas calculadoras financeiras (ex: BA II Plus) operam entre 1 de Janeiro de 1980 e 31 de Dezembro de 2079. Esta aplicação usa as capacidades do Python, que tem um alcance maior.
         * Ao calcular uma data (DT1 ou DT2), o dia da semana é mostrado.
         * O método 360 tem regras específicas para lidar com dias 31.
+        * Em "Dias Úteis e Feriados" conta dias úteis, soma DBD dias úteis a DT1 e ajusta datas (Following, Modified Following, Preceding) com o calendário TARGET ou só fins de semana, mais feriados de um ficheiro.
         """)
 
     with date_tabs[1]:
@@ -1077,20 +1316,6 @@ with main_tabs[7]:
         st.write("**Calcular Variável Desconhecida:**")
         calc_date_col1, calc_date_col2, calc_date_col3 = st.columns(3)
 
-        # Funções Auxiliares Datas
-        def days_360(date1, date2):
-            d1, m1, y1 = date1.day, date1.month, date1.year
-            d2, m2, y2 = date2.day, date2.month, date2.year
-
-            # Regras 30/360 US (simplificadas, conforme guia)
-            if d1 == 31: d1 = 30
-            if d2 == 31 and d1 == 30: d2 = 30
-
-            if d1 < 0 or d2 < 0 or m1 < 0 or m2 < 0: # Basic check
-                 raise ValueError("Componentes da data inválidos para cálculo 360")
-
-            return (y2 - y1) * 360 + (m2 - m1) * 30 + (d2 - d1)
-
         # --- Botões de Cálculo ---
         if calc_date_col1.button("Calcular DBD", key="calc_dbd_button"):
             if dt1_date is None or dt2_date is None:
@@ -1106,7 +1331,7 @@ with main_tabs[7]:
                 else: # 360
                     try:
                          # Note: days_360 pode retornar negativo se dt1 > dt2
-                         dbd_calc = days_360(dt1_date, dt2_date)
+                         dbd_calc = fincalc.days_360(dt1_date, dt2_date)
                          st.success(f"DBD (360) = {dbd_calc} dias")
                     except Exception as e:
                          st.error(f"Erro 360: {e}")
@@ -1154,6 +1379,33 @@ with main_tabs[7]:
                  except Exception as e:
                       st.error(f"Erro ao calcular DT1: {e}")
 
+        with st.expander("Convenções de Contagem de Dias"):
+            st.caption("Dias e fração de ano entre DT1 e DT2 nas convenções de mercado. No ACT/ACT ICMA os períodos de cupão contam-se a partir de DT1.")
+            convention_frequency = st.selectbox("Cupões por Ano (ACT/ACT ICMA)", [1, 2, 4, 12], index=1, key="convention_frequency")
+            if dt1_date is not None and dt2_date is not None:
+                st.dataframe(fincalc.day_count_table(dt1_date, dt2_date, convention_frequency).style.format({'Fração de Ano': '{:.6f}'}), hide_index=True)
+
+        with st.expander("Dias Úteis e Feriados"):
+            st.caption("Dias úteis de DT1 (incluída) a DT2 (excluída), DT1 + DBD dias úteis e ajuste de DT1 e DT2 a dias úteis. Os feriados de um ficheiro juntam-se aos do calendário escolhido.")
+            bd_col1, bd_col2 = st.columns(2)
+            calendar_name = bd_col1.selectbox("Calendário", list(fincalc.CALENDAR_HOLIDAYS), index=1, key="business_calendar")
+            holidays_file = bd_col2.file_uploader("Feriados (CSV ou Parquet com coluna Data)", type=["csv", "parquet"], key="holidays_file")
+            try:
+                extra_holidays = fincalc.read_holidays(holidays_file, holidays_file.name) if holidays_file is not None else ()
+                business = fincalc.get_business_calendar(calendar_name, extra_holidays)
+                if dt1_date is not None and dt2_date is not None:
+                    bd_col1.metric("Dias Úteis entre DT1 e DT2", f"{business.business_days_between(dt1_date, dt2_date):,}")
+                    bd_col2.metric(f"DT1 + {dbd_date} Dias Úteis", str(business.add_business_days(dt1_date, dbd_date)))
+                    st.dataframe(pd.DataFrame({
+                        'Data': ['DT1', 'DT2'],
+                        'Dia Útil': ['Sim' if business.is_business_day(day) else 'Não' for day in (dt1_date, dt2_date)],
+                        **{rule: [str(business.adjust(day, rule)) for day in (dt1_date, dt2_date)] for rule in fincalc.BUSINESS_DAY_RULES},
+                    }), hide_index=True)
+            except ValueError as e:
+                st.error(f"Erro: {e}")
+            except Exception as e:
+                st.error(f"Erro ao ler o ficheiro de feriados: {e}")
+
 # --- Aba: Obrigações (Bonds) ---
 with main_tabs[8]: # Ajuste o índice se necessário
     st.header("Análise de Obrigações (Bonds)")
@@ -1185,236 +1437,12 @@ with main_tabs[8]: # Ajuste o índice se necessário
         """)
 
     with bond_tabs[1]:
-        from scipy.optimize import newton # Importar o solver
-        import datetime
-
         st.subheader("Calculadora de Obrigações")
 
-        # --- Funções Auxiliares Específicas para Obrigações ---
-
         @st.cache_data # Cache para evitar recalcular datas repetidamente
         def get_coupon_dates_list(rdt: datetime.date, sdt: datetime.date, coupons_per_year: int):
             """ Gera lista de datas de cupão relevantes à volta de sdt """
-            if coupons_per_year <= 0: return []
-            coupon_dates = []
-            current_dt = rdt
-            interval_months = 12 / coupons_per_year
-            # Retroceder para gerar datas anteriores e futuras
-            limit_date_past = sdt - datetime.timedelta(days=max(400, 400 / coupons_per_year)) # Olhar ~1 período+ para trás
-            limit_date_future = rdt + datetime.timedelta(days=1) # Incluir RDT
-
-            while current_dt >= limit_date_past:
-                coupon_dates.append(current_dt)
-                year, month = current_dt.year, current_dt.month
-                new_month_float = month - interval_months
-                new_year = year
-                while new_month_float <= 0:
-                    new_month_float += 12
-                    new_year -= 1
-
-                new_month = int(new_month_float)
-                # Tentar manter o dia, ajustar se inválido
-                day = current_dt.day
-                try:
-                    # Lidar com dia 29, 30, 31 em meses mais curtos
-                    last_day_of_new_month = pd.Timestamp(year=new_year, month=new_month, day=1).days_in_month
-                    day = min(day, last_day_of_new_month)
-                    current_dt = datetime.date(new_year, new_month, day)
-                except ValueError:
-                     # Fallback extremo, parar se data inválida
-                     break
-                # Evitar loop infinito
-                if len(coupon_dates) > 200: break # Limite arbitrário
-
-            coupon_dates.sort()
-            # Filtrar para ter apenas datas relevantes (um pouco antes de SDT até RDT)
-            relevant_dates = [dt for dt in coupon_dates if dt <= limit_date_future and dt >= limit_date_past]
-             # Garantir que RDT está na lista se for uma data de cupão teórica
-            if rdt not in relevant_dates:
-                 # Verificar se RDT coincide com uma data teórica
-                 is_rdt_coupon_date = False
-                 test_dt = relevant_dates[-1] if relevant_dates else rdt
-                 while test_dt < rdt:
-                      year, month = test_dt.year, test_dt.month
-                      new_month_float = month + interval_months
-                      new_year = year
-                      while new_month_float > 12:
-                           new_month_float -= 12
-                           new_year += 1
-                      new_month = int(new_month_float)
-                      day = test_dt.day
-                      try:
-                           last_day_of_new_month = pd.Timestamp(year=new_year, month=new_month, day=1).days_in_month
-                           day = min(day, last_day_of_new_month)
-                           test_dt = datetime.date(new_year, new_month, day)
-                           if test_dt == rdt:
-                                is_rdt_coupon_date = True
-                                break
-                      except ValueError: break
-                 if is_rdt_coupon_date and rdt not in relevant_dates:
-                      relevant_dates.append(rdt)
-                      relevant_dates.sort()
-
-
-            return relevant_dates
-
-        def days_360(date1: datetime.date, date2: datetime.date) -> int:
-            """ Calcula dias entre datas usando 30/360 (aproximação do guia) """
-            d1, m1, y1 = date1.day, date1.month, date1.year
-            d2, m2, y2 = date2.day, date2.month, date2.year
-            # Regras simplificadas 30/360
-            if d1 == 31: d1 = 30
-            if d2 == 31 and d1 == 30: d2 = 30
-            # Adicionar verificação para fim de Fevereiro (regra comum, não explícita no guia)
-            is_feb_end1 = (m1 == 2 and d1 == pd.Timestamp(date1).days_in_month)
-            is_feb_end2 = (m2 == 2 and d2 == pd.Timestamp(date2).days_in_month)
-            if is_feb_end1 and is_feb_end2: # Ambos fim de Fev
-                 d2 = 30
-            if is_feb_end1: # Apenas d1 fim de Fev
-                 d1 = 30
-
-            # Cálculo básico
-            return (y2 - y1) * 360 + (m2 - m1) * 30 + (d2 - d1)
-
-        def days_between(date1: datetime.date, date2: datetime.date, method: str) -> int:
-            """ Calcula dias entre datas usando método ACT ou 360 """
-            if method == "ACT":
-                return (date2 - date1).days
-            elif method == "360":
-                # days_360 retorna negativo se date1 > date2
-                return days_360(date1, date2)
-            else:
-                raise ValueError("Método de contagem de dias inválido")
-
-        def calculate_accrued_interest(sdt, cpn_rate, coupons_per_year, day_count_method, coupon_dates_list):
-            """ Calcula Juros Corridos (AI) """
-            if cpn_rate == 0 or coupons_per_year == 0: return 0.0
-
-            prev_coupon_date = None
-            next_coupon_date = None
-            for dt in reversed(coupon_dates_list): # Procurar para trás
-                if dt <= sdt:
-                    prev_coupon_date = dt
-                    break
-            for dt in coupon_dates_list: # Procurar para a frente
-                 if dt > sdt:
-                      next_coupon_date = dt
-                      break
-
-            if not prev_coupon_date or not next_coupon_date:
-                # Pode acontecer se SDT for antes da primeira data de cupão gerada ou após RDT
-                # Tentar encontrar o período teórico
-                # Simplificação: retornar 0 se não encontrar período claro
-                st.warning(f"Não foi possível determinar o período de cupão para SDT={sdt}. AI pode estar incorreto.")
-                return 0.0 # Ou levantar um erro mais específico
-
-            try:
-                days_accrued = days_between(prev_coupon_date, sdt, day_count_method)
-                days_in_period = days_between(prev_coupon_date, next_coupon_date, day_count_method)
-
-                if days_in_period <= 0:
-                     st.warning(f"Período de cupão inválido ({days_in_period} dias) entre {prev_coupon_date} e {next_coupon_date}. AI pode estar incorreto.")
-                     return 0.0 # Evitar divisão por zero
-
-                coupon_amount_per_period = (cpn_rate / 100.0) / coupons_per_year * 100.0 # Assume 100 par
-                ai = (days_accrued / days_in_period) * coupon_amount_per_period
-                return ai
-            except Exception as e:
-                st.error(f"Erro no cálculo de AI: {e}")
-                return None
-
-        def calculate_bond_price_dirty(yield_rate_annual, sdt, rdt, cpn_rate, rv_percent, coupons_per_year, day_count_method, coupon_dates_list):
-            """ Calcula o Preço Sujo (Dirty Price = PV dos fluxos futuros @ yield) - Aproximado """
-            if coupons_per_year == 0: # Caso de Zero Coupon Bond (simplificado)
-                 yld_decimal = yield_rate_annual / 100.0
-                 days_to_maturity = days_between(sdt, rdt, day_count_method)
-                 # Usar composição anual ACT/365 para simplificar
-                 years_to_maturity = days_between(sdt, rdt, "ACT") / 365.0
-                 if (1 + yld_decimal) <= 0: return None # Evitar erro
-                 dirty_price = (rv_percent / 100.0 * 100.0) / ((1 + yld_decimal)**years_to_maturity)
-                 return dirty_price
-
-            yld_per_period = (yield_rate_annual / 100.0) / coupons_per_year
-            pv_total = 0.0
-            par_value = 100.0 # Assumir par = 100
-
-            # Encontrar datas futuras e período atual
-            future_coupon_dates = [dt for dt in coupon_dates_list if dt > sdt and dt <= rdt]
-            prev_coupon_date = next((dt for dt in reversed(coupon_dates_list) if dt <= sdt), None)
-            next_coupon_date = next((dt for dt in coupon_dates_list if dt > sdt), None)
-
-            if not next_coupon_date: # SDT é na ou após a última data de cupão antes de RDT?
-                 next_coupon_date = rdt # O próximo fluxo relevante é o reembolso
-
-            if not prev_coupon_date:
-                 # Se não há cupão anterior, pode ser um bond novo ou período inicial estranho
-                 # Simplificação: Usar SDT como início do período para cálculo de dias? Não ideal.
-                 # Tentar estimar uma data anterior teórica
-                 intervalo_dias = 365 / coupons_per_year
-                 prev_coupon_date = next_coupon_date - datetime.timedelta(days=intervalo_dias)
-
-
-            # Calcular dias DSC e E (usando ACT para períodos fracionários no desconto)
-            try:
-                # Usar ACT para o desconto fracionário é mais comum, mesmo se AI usa 360
-                dsc = days_between(sdt, next_coupon_date, "ACT")
-                e = days_between(prev_coupon_date, next_coupon_date, "ACT")
-                if e <= 0: e = 365.0 / coupons_per_year # Fallback se datas inválidas
-                w = dsc / e # Fração do período até próximo cupão
-            except Exception:
-                 st.warning("Erro ao calcular dias para desconto fracionário. Usando w=1.")
-                 w = 1.0 # Simplificação se cálculo de dias falhar
-
-            # Desconto base por período
-            v = 1.0 / (1.0 + yld_per_period)
-
-            # 1. Descontar Cupões Futuros
-            coupon_amount = (cpn_rate / 100.0) / coupons_per_year * par_value
-            if coupon_amount > 0:
-                 for i, coupon_date in enumerate(future_coupon_dates):
-                      # O expoente é k-1 + w (onde k=1 para next_coupon_date)
-                      exponent = i + w
-                      pv_coupon = coupon_amount * (v ** exponent)
-                      pv_total += pv_coupon
-
-            # 2. Descontar Valor de Reembolso (RV)
-            # RV ocorre na data RDT. Se RDT for uma data de cupão, i = N-1 para essa data.
-            # Encontrar o índice 'N' correspondente a RDT
-            n_periods = 0
-            temp_dt = next_coupon_date
-            i = 0
-            while temp_dt <= rdt:
-                 n_periods = i + w # Expoente de desconto para RDT
-                 if temp_dt == rdt: break
-                 i += 1
-                 # Avançar para a próxima data de cupão teórica
-                 year, month = temp_dt.year, temp_dt.month
-                 interval_months = 12 / coupons_per_year
-                 new_month_float = month + interval_months
-                 new_year = year
-                 while new_month_float > 12:
-                      new_month_float -= 12
-                      new_year += 1
-                 new_month = int(new_month_float)
-                 day = temp_dt.day
-                 try:
-                      last_day_of_new_month = pd.Timestamp(year=new_year, month=new_month, day=1).days_in_month
-                      day = min(day, last_day_of_new_month)
-                      temp_dt = datetime.date(new_year, new_month, day)
-                 except ValueError: break # Parar se data inválida
-                 # Limite segurança
-                 if i > 200 * coupons_per_year : break
-
-
-            if n_periods == 0: # Se RDT <= next_coupon_date
-                  n_periods = w # Descontar apenas fração
-
-            redemption_amount = rv_percent / 100.0 * par_value
-            pv_redemption = redemption_amount * (v ** n_periods)
-            pv_total += pv_redemption
-
-            return pv_total # Este é o Preço Sujo (Dirty Price)
-
+            return fincalc.get_coupon_dates_list(rdt, sdt, coupons_per_year)
 
         # --- Interface Streamlit ---
         bond_col1, bond_col2, bond_col3 = st.columns(3)
@@ -1459,17 +1487,20 @@ with main_tabs[8]: # Ajuste o índice se necessário
                   st.error("Yield (YLD) deve ser fornecido.")
              else:
                  try:
-                     # 1. Calcular Juros Corridos
-                     ai_calc = calculate_accrued_interest(sdt_b, cpn_b, coupons_per_year_b, day_count_b, coupon_dates)
+                     with warnings.catch_warnings(record=True) as bond_warnings:
+                         warnings.simplefilter("always", fincalc.BondWarning)
+                         # 1. Calcular Juros Corridos
+                         ai_calc = fincalc.calculate_accrued_interest(sdt_b, cpn_b, coupons_per_year_b, day_count_b, coupon_dates)
+                         # 2. Calcular Preço Sujo
+                         dirty_price_calc = fincalc.calculate_bond_price_dirty(yld_b_input, sdt_b, rdt_b, cpn_b, rv_b, coupons_per_year_b, day_count_b, coupon_dates)
+                     show_warnings(bond_warnings)
+
                      if ai_calc is not None:
                           ai_result_text.info(f"Juros Corridos (AI) ≈ {ai_calc:.4f} %")
                      else:
                           ai_result_text.warning("AI não pôde ser calculado.")
                           ai_calc = 0 # Assumir 0 se não calculável
 
-                     # 2. Calcular Preço Sujo
-                     dirty_price_calc = calculate_bond_price_dirty(yld_b_input, sdt_b, rdt_b, cpn_b, rv_b, coupons_per_year_b, day_count_b, coupon_dates)
-
                      if dirty_price_calc is not None:
                           # 3. Calcular Preço Limpo (PRI)
                           pri_calc = dirty_price_calc - ai_calc
@@ -1490,32 +1521,22 @@ with main_tabs[8]: # Ajuste o índice se necessário
             else:
                  try:
                      # 1. Calcular Juros Corridos (necessário para a função objetivo)
-                     ai_calc = calculate_accrued_interest(sdt_b, cpn_b, coupons_per_year_b, day_count_b, coupon_dates)
+                     with warnings.catch_warnings(record=True) as bond_warnings:
+                         warnings.simplefilter("always", fincalc.BondWarning)
+                         ai_calc = fincalc.calculate_accrued_interest(sdt_b, cpn_b, coupons_per_year_b, day_count_b, coupon_dates)
+                     show_warnings(bond_warnings)
                      if ai_calc is None:
                           st.error("Não foi possível calcular AI, necessário para YLD.")
                           # Não continuar sem AI
                      else:
                           ai_result_text.info(f"Juros Corridos (AI) ≈ {ai_calc:.4f} %")
 
-                          # 2. Definir função objetivo para o solver
-                          def target_yield_function(yield_rate_annual_decimal, sdt, rdt, cpn, rv, coup_per_yr, day_count, coupon_list, target_clean_price, known_ai):
-                              # Yield anual decimal como input
-                              dirty_price = calculate_bond_price_dirty(yield_rate_annual_decimal * 100.0, sdt, rdt, cpn, rv, coup_per_yr, day_count, coupon_list)
-                              if dirty_price is None:
-                                   # Tentar devolver um valor grande para indicar erro ao solver
-                                   return 1e10 # Ou raise ValueError?
-                              calculated_clean_price = dirty_price - known_ai
-                              return calculated_clean_price - target_clean_price
-
-                          # 3. Chamar o solver (Newton)
-                          # Estimativa inicial: taxa de cupão ou yield anterior? Usar cupão.
-                          initial_yield_guess = cpn_b / 100.0
-                          args_for_solver = (sdt_b, rdt_b, cpn_b, rv_b, coupons_per_year_b, day_count_b, coupon_dates, pri_b_input, ai_calc)
-
+                          # 2. Chamar o solver (Newton), com a taxa de cupão como estimativa inicial
                           try:
-                              # Usar maxiter e tol para controlo
-                              solved_yield_decimal = newton(target_yield_function, initial_yield_guess, args=args_for_solver, tol=1e-6, maxiter=100)
-                              solved_yield_percent = solved_yield_decimal * 100.0
+                              with warnings.catch_warnings(record=True) as bond_warnings:
+                                  warnings.simplefilter("always", fincalc.BondWarning)
+                                  solved_yield_percent = fincalc.solve_bond_yield(pri_b_input, sdt_b, rdt_b, cpn_b, rv_b, coupons_per_year_b, day_count_b, coupon_dates, ai_calc)
+                              show_warnings(bond_warnings)
                               calc_result_text.success(f"Yield (YLD) ≈ {solved_yield_percent:.4f} %")
                           except (RuntimeError, ValueError) as solver_error:
                                # Tentar Brentq se Newton falhar? Requer bracket.
@@ -1606,117 +1627,7 @@ with main_tabs[9]:
         if st.button("Calcular Estatísticas", key="stat_calc_button"):
             # Usar estado atualizado
             data = st.session_state.stats_data.copy().dropna() # Remover linhas com NaN
-            results = {}
-            error_msg = None
-
-            if data.empty:
-                 error_msg = "Não há dados válidos para analisar."
-
-            try:
-                if not error_msg:
-                    n_total = 0
-                    if stat_method == "1-V":
-                        if not pd.api.types.is_numeric_dtype(data['Y']):
-                             error_msg = "Erro (1-V): Coluna Y (frequência) deve ser numérica."
-                        elif not data['Y'].ge(0).all():
-                            error_msg = "Erro (1-V): Frequências (Y) devem ser não-negativas."
-                        elif data['Y'].sum() <= 0:
-                             error_msg = "Erro (1-V): Soma das frequências (Y) deve ser positiva."
-                        else:
-                            try:
-                                 # Arredondar frequências para inteiros para usar repeat
-                                 freqs = data['Y'].round().astype(int)
-                                 if not freqs.ge(0).all(): raise ValueError("Frequências negativas após arredondar.")
-                                 x_data_expanded = np.repeat(data['X'].values, freqs.values)
-                                 n_total = len(x_data_expanded)
-                            except (ValueError, TypeError) as e_rep:
-                                 error_msg = f"Erro (1-V) ao processar frequências: {e_rep}"
-                                 x_data_expanded = np.array([]) # Esvaziar para evitar erros abaixo
-
-                            if n_total > 0 and not error_msg:
-                                 results['n'] = n_total
-                                 results['Mean X'] = np.mean(x_data_expanded)
-                                 results['Sum X'] = np.sum(x_data_expanded)
-                                 results['Sum X2'] = np.sum(x_data_expanded**2)
-                                 if n_total > 1: results['Sx'] = np.std(x_data_expanded, ddof=1)
-                                 else: results['Sx'] = 0
-                                 results['σx'] = np.std(x_data_expanded, ddof=0)
-                            elif not error_msg:
-                                 error_msg = "Erro (1-V): Não há dados válidos após considerar frequências."
-
-                    else: # Métodos 2-Variáveis
-                        x_data = data['X'].astype(float).values
-                        y_data = data['Y'].astype(float).values
-                        n_total = len(x_data)
-                        results['n'] = n_total
-
-                        if n_total < 2:
-                            error_msg = f"Erro ({stat_method}): São necessários pelo menos 2 pontos de dados para regressão."
-                        else:
-                            results['Mean X'] = np.mean(x_data)
-                            results['Mean Y'] = np.mean(y_data)
-                            results['Sum X'] = np.sum(x_data)
-                            results['Sum Y'] = np.sum(y_data)
-                            results['Sum X2'] = np.sum(x_data**2)
-                            results['Sum Y2'] = np.sum(y_data**2)
-                            results['Sum XY'] = np.sum(x_data * y_data)
-                            results['Sx'] = np.std(x_data, ddof=1)
-                            results['Sy'] = np.std(y_data, ddof=1)
-                            results['σx'] = np.std(x_data, ddof=0)
-                            results['σy'] = np.std(y_data, ddof=0)
-
-                            x_reg, y_reg = x_data, y_data
-                            valid_transform = True
-                            try:
-                                if stat_method == "Ln":
-                                    if not (x_data > 0).all(): raise ValueError("Todos os X devem ser > 0.")
-                                    x_reg = np.log(x_data)
-                                elif stat_method == "EXP":
-                                    if not (y_data > 0).all(): raise ValueError("Todos os Y devem ser > 0.")
-                                    y_reg = np.log(y_data)
-                                elif stat_method == "PWR":
-                                     if not ((x_data > 0).all() and (y_data > 0).all()): raise ValueError("Todos X e Y devem ser > 0.")
-                                     x_reg = np.log(x_data)
-                                     y_reg = np.log(y_data)
-                            except ValueError as ve:
-                                error_msg = f"Erro ({stat_method}): {ve}"
-                                valid_transform = False
-                            except Exception as e_log:
-                                error_msg = f"Erro ({stat_method}) na transformação Log: {e_log}"
-                                valid_transform = False
-
-
-                            if valid_transform:
-                                # Verificar constantes após transformação
-                                if np.allclose(x_reg, x_reg[0]) or np.allclose(y_reg, y_reg[0]):
-                                      error_msg = f"Erro ({stat_method}): Os dados (possivelmente transformados) são constantes."
-                                else:
-                                    try:
-                                        # Usar nan_policy='omit' para ignorar NaNs se houver
-                                        slope, intercept, r_value, p_value, std_err = stats.linregress(x_reg, y_reg)
-
-                                        if stat_method == "EXP":
-                                            results['a (intercept)'] = np.exp(intercept)
-                                            results['b (slope)'] = np.exp(slope)
-                                        elif stat_method == "PWR":
-                                            results['a (intercept)'] = np.exp(intercept)
-                                            results['b (slope)'] = slope
-                                        else: # LIN, Ln
-                                            results['a (intercept)'] = intercept
-                                            results['b (slope)'] = slope
-
-                                        results['r (correlation)'] = r_value
-                                        results['_raw_slope'] = slope
-                                        results['_raw_intercept'] = intercept
-
-                                    except ValueError as ve:
-                                        error_msg = f"Erro ({stat_method}) na regressão: {ve}. Verifique dados."
-                                    except Exception as e_reg:
-                                        error_msg = f"Erro ({stat_method}) inesperado na regressão: {e_reg}."
-
-            except Exception as e:
-                 error_msg = f"Erro geral no processamento dos dados: {e}"
-
+            results, error_msg = fincalc.compute_statistics(data, stat_method)
 
             # Mostrar Resultados ou Erro
             if error_msg:
@@ -1772,27 +1683,9 @@ with main_tabs[9]:
             with predict_col1:
                 x_prime = st.number_input("Valor X' para prever Y'", format="%.4f", value=6.0, key="x_prime_input")
                 if st.button("Prever Y' (dado X')", key="predict_y_button"):
-                    res = st.session_state.stat_results
-                    method = st.session_state.stat_method
-                    y_pred = None
-                    valid_pred = True
-                    error_pred = None
                     try:
-                        raw_a = res['_raw_intercept']
-                        raw_b = res['_raw_slope']
-                        a_adj = res['a (intercept)'] # 'a' ajustado para EXP/PWR
-                        b_adj = res['b (slope)']   # 'b' ajustado para EXP/PWR
-
-                        if method == "LIN": y_pred = a_adj + b_adj * x_prime
-                        elif method == "Ln":
-                             if x_prime <= 0: error_pred = "X' deve ser > 0."; valid_pred = False
-                             else: y_pred = a_adj + b_adj * np.log(x_prime)
-                        elif method == "EXP": y_pred = a_adj * (b_adj ** x_prime)
-                        elif method == "PWR":
-                             if x_prime <= 0: error_pred = "X' deve ser > 0."; valid_pred = False
-                             else: y_pred = a_adj * (x_prime ** b_adj)
-
-                        if valid_pred and y_pred is not None: st.success(f"Y' ≈ {y_pred:.4f}")
+                        y_pred, error_pred = fincalc.predict_y(st.session_state.stat_results, st.session_state.stat_method, x_prime)
+                        if y_pred is not None: st.success(f"Y' ≈ {y_pred:.4f}")
                         elif error_pred: st.error(error_pred)
                         else: st.warning("Não foi possível prever Y'.")
                     except Exception as e: st.error(f"Erro previsão Y': {e}")
@@ -1800,43 +1693,11 @@ with main_tabs[9]:
             with predict_col2:
                 y_prime = st.number_input("Valor Y' para prever X'", format="%.4f", value=22.0, key="y_prime_input")
                 if st.button("Prever X' (dado Y')", key="predict_x_button"):
-                    res = st.session_state.stat_results
-                    method = st.session_state.stat_method
-                    x_pred = None
-                    valid_pred = True
-                    error_pred = None
                     try:
-                        raw_a = res['_raw_intercept']
-                        raw_b = res['_raw_slope']
-                        a_adj = res['a (intercept)']
-                        b_adj = res['b (slope)']
-
-                        if abs(raw_b if method in ["LIN", "Ln"] else b_adj) < 1e-10: # Verificar inclinação relevante
-                             error_pred = "Inclinação (b) ≈ 0. Não é possível prever X'."; valid_pred = False
-
-                        if valid_pred:
-                            if method == "LIN": x_pred = (y_prime - a_adj) / b_adj
-                            elif method == "Ln":
-                                # Y = a + b*ln(X) => X = exp((Y - a) / b)
-                                x_pred = np.exp((y_prime - a_adj) / b_adj)
-                            elif method == "EXP":
-                                # Y = a * b^X => b^X = Y/a => X*ln(b) = ln(Y/a) => X = ln(Y/a) / ln(b)
-                                if y_prime <= 0 or a_adj <= 0 or b_adj <= 0 or b_adj == 1:
-                                     error_pred = "Inputs inválidos para EXP (Y'>0, a>0, b>0, b!=1)."; valid_pred = False
-                                else: x_pred = np.log(y_prime / a_adj) / np.log(b_adj)
-                            elif method == "PWR":
-                                # Y = a * X^b => X^b = Y/a => b*ln(X) = ln(Y/a) => ln(X) = ln(Y/a)/b => X = exp(ln(Y/a)/b)
-                                if y_prime <= 0 or a_adj <= 0:
-                                     error_pred = "Inputs inválidos para PWR (Y'>0, a>0)."; valid_pred = False
-                                elif abs(b_adj) < 1e-10:
-                                     error_pred = "Inclinação (b) ≈ 0. Não é possível prever X'."; valid_pred = False
-                                else: x_pred = np.exp(np.log(y_prime / a_adj) / b_adj)
-
-
-                        if valid_pred and x_pred is not None: st.success(f"X' ≈ {x_pred:.4f}")
+                        x_pred, error_pred = fincalc.predict_x(st.session_state.stat_results, st.session_state.stat_method, y_prime)
+                        if x_pred is not None: st.success(f"X' ≈ {x_pred:.4f}")
                         elif error_pred: st.error(error_pred)
                         else: st.warning("Não foi possível prever X'.")
-
                     except Exception as e: st.error(f"Erro previsão X': {e}")
 
 
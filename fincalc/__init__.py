@@ -0,0 +1,204 @@
+"""Núcleo de cálculo da Calculadora Financeira Educacional.
+
+Funções puras (sem Streamlit nem gráficos) para TVM, amortização, fluxos de
+caixa, conversão de taxas, margem, breakeven, depreciação, datas, obrigações e
+estatística. Podem ser usadas em scripts e processos batch; a aplicação
+Streamlit (`finance_calc_learn.py`) é apenas a interface sobre este pacote.
+
+SciPy e pandas só são importados dentro das funções que deles precisam.
+"""
+from .amortization import (
+    CachedSchedule,
+    amortization_summary,
+    amortization_table,
+    balance_at,
+    balance_path,
+    cumulative_interest,
+    cumulative_principal,
+    get_schedule,
+    payoff_period,
+    schedule_cache,
+    schedule_slice,
+    schedule_summary,
+)
+from .bonds import (
+    BondWarning,
+    calculate_accrued_interest,
+    calculate_bond_price_dirty,
+    get_coupon_dates_list,
+    solve_bond_yield,
+)
+from .breakeven import (
+    BREAKEVEN_ERROR_LABELS,
+    BREAKEVEN_INVALID_Q,
+    BREAKEVEN_MISSING,
+    BREAKEVEN_OK,
+    BREAKEVEN_VARIABLES,
+    BREAKEVEN_ZERO_MARGIN,
+    BreakevenBatchResult,
+    SensitivityGrid,
+    breakeven_grid,
+    breakeven_tornado,
+    calculate_breakeven,
+    solve_breakeven_batch,
+)
+from .business_days import (
+    BUSINESS_DAY_RULES,
+    CALENDAR_END,
+    CALENDAR_HOLIDAYS,
+    CALENDAR_START,
+    BusinessCalendar,
+    business_calendar,
+    calendar_cache,
+    easter_sunday,
+    get_business_calendar,
+    read_holidays,
+    target_holidays,
+)
+from .cache import LRUCache
+from .cashflow import (
+    CASH_FLOW_COLUMNS,
+    CashFlowMetrics,
+    CashFlows,
+    IRRResult,
+    build_cash_flows,
+    cash_flow_hash,
+    cash_flow_metrics,
+    count_sign_changes,
+    crossover_rates,
+    difference_flows,
+    expand_cash_flows,
+    group_cash_flows,
+    irr,
+    irr_grouped,
+    npv,
+    npv_grouped,
+    npv_profile,
+    read_cash_flow_table,
+)
+from .dated import DATED_FLOW_COLUMNS, XIRRResult, read_dated_flows, xirr, xnpv
+from .daycount import (
+    DAY_COUNT_CONVENTIONS,
+    DAY_COUNT_METHODS,
+    DayTable,
+    day_count,
+    day_count_table,
+    days_360,
+    days_360_array,
+    days_between,
+    days_between_array,
+    year_fraction,
+    year_fractions,
+)
+from .depreciation import (
+    DEPRECIATION_COLUMNS,
+    DEPRECIATION_METHODS,
+    TABLE_METHODS,
+    DepreciationSchedule,
+    calculate_depreciation_for_year,
+    accumulated_depreciation,
+    calculate_single_year,
+    depreciation_cache,
+    depreciation_schedule,
+    get_depreciation_schedule,
+    last_depreciation_year,
+)
+from .depreciation_tables import (
+    DEPRECIATION_TABLES,
+    MACRS_CLASSES,
+    MACRS_FACTORS,
+    RateTable,
+    declining_to_straight_line,
+    table_convention,
+)
+from .downsample import lttb
+from .export import (
+    DEFAULT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    ChunkStats,
+    iter_file_chunks,
+    iter_portfolio_chunks,
+    iter_schedule_chunks,
+    throughput,
+    write_chunks,
+)
+from .margin import (
+    MARGIN_ERROR_LABELS,
+    MARGIN_FULL,
+    MARGIN_INVALID_SEL,
+    MARGIN_MISSING,
+    MARGIN_NEGATIVE_COST,
+    MARGIN_OK,
+    MARGIN_VARIABLES,
+    MarginBatchResult,
+    iter_margin_chunks,
+    solve_cost,
+    solve_margin,
+    solve_margin_batch,
+    solve_selling_price,
+)
+from .montecarlo import (
+    DISTRIBUTION_LABELS,
+    DISTRIBUTIONS,
+    FlowDistribution,
+    SimulationResult,
+    simulate_npv_irr,
+)
+from .portfolio import LoanPortfolio, build_portfolio, portfolio_cashflows
+from .projects import (
+    PROJECT_STATUS_LABELS,
+    ProjectBatchResult,
+    benchmark_projects,
+    evaluate_projects,
+    irr_batch,
+    metrics_batch,
+    npv_batch,
+    pad_projects,
+    random_projects,
+    read_projects,
+)
+from .rates import (
+    CONTINUOUS,
+    RATE_TABLE_COLUMNS,
+    convert_rate,
+    convert_rate_table,
+    effective_to_nominal,
+    log_growth,
+    nominal_to_effective,
+    parse_compounding,
+    rate_from_log_growth,
+    read_rate_table,
+)
+from .register import (
+    DEFAULT_PROJECTION_YEARS,
+    REGISTER_COLUMNS,
+    REGISTER_ERROR_LABELS,
+    REGISTER_INVALID,
+    REGISTER_MISSING,
+    REGISTER_OK,
+    REGISTER_UNKNOWN_METHOD,
+    RegisterProjection,
+    iter_register_chunks,
+    merge_category_totals,
+    project_register,
+    random_register,
+)
+from .statistics import compute_statistics, predict_x, predict_y
+from .tvm import (
+    RATE_BRACKETED,
+    RATE_INVALID,
+    RATE_NEWTON,
+    RATE_NO_SOLUTION,
+    RATE_STATUS_LABELS,
+    RateSolution,
+    TVMBatchResult,
+    annual_rate,
+    periodic_rate,
+    solve_fv,
+    solve_iy,
+    solve_n,
+    solve_pmt,
+    solve_pv,
+    solve_rate,
+    solve_tvm_batch,
+)
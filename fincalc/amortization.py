@@ -0,0 +1,182 @@
+"""Tabelas de amortização de empréstimos com prestação constante.
+
+Todos os valores são obtidos em forma fechada a partir da fórmula do saldo
+após k pagamentos, sem percorrer os períodos um a um:
+
+* END: `B(k) = PV * (1+r)^k + PMT * ((1+r)^k - 1) / r`
+* BGN: `B(k) = PV * (1+r)^(k-1) + PMT * ((1+r)^k - 1) / r` (k >= 1)
+
+Os valores seguem a convenção de sinais TVM (os juros e o principal pagos têm
+o sinal de PMT). Se a prestação liquidar o saldo antes de N, o último
+pagamento é reduzido ao necessário e os períodos seguintes ficam a zero.
+As funções aceitam escalares ou arrays (ex: um array de empréstimos).
+
+`get_schedule` guarda a tabela completa numa cache LRU partilhada
+(`schedule_cache`), para que a tabela, o sumário e o gráfico de uma mesma
+execução (e das execuções seguintes) não a recalculem.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from .cache import LRUCache
+from .tvm import _annuity_factor
+
+AMORTIZATION_COLUMNS = ('Período', 'Saldo Inicial', 'Pagamento (PMT)', 'Juros Pagos', 'Principal Pago', 'Saldo Final')
+
+
+def _is_begin(mode):
+    return np.asarray(mode) == 'BGN'
+
+
+def _raw_balance(pv, rate, pmt, k, begin):
+    """Saldo após o pagamento k, sem considerar a liquidação antecipada."""
+    growth = np.exp(k * np.log1p(rate))
+    annuity = _annuity_factor(rate, k)
+    end_balance = pv * growth + pmt * annuity
+    bgn_balance = pv * growth / (1 + rate) + pmt * annuity
+    return np.where(begin, np.where(k > 0, bgn_balance, pv), end_balance)
+
+
+def payoff_period(pv, rate, pmt, mode='END'):
+    """Período em que o saldo fica liquidado (inf se a prestação nunca o liquidar)."""
+    begin = _is_begin(mode)
+    with np.errstate(all='ignore'):
+        safe_rate = np.where(rate == 0, 1.0, rate)
+        ratio = pv * safe_rate / pmt
+        ratio = np.where(begin, ratio / (1 + safe_rate), ratio)
+        periods = np.where(rate == 0, -pv / pmt, -np.log1p(ratio) / np.log1p(safe_rate))
+        # Tolerância para arredondamentos quando PMT liquida exatamente em N períodos
+        periods = np.where(np.isfinite(periods) & (periods >= 0), np.ceil(periods - 1e-9), np.inf)
+    return periods
+
+
+def _interest_base(pv, rate, pmt, k, begin):
+    """Saldo sobre o qual são calculados os juros pagos no pagamento k."""
+    base = _raw_balance(pv, rate, pmt, np.maximum(k - 1, 0), begin)
+    # Em BGN o primeiro pagamento ocorre em t=0 e não inclui juros
+    return np.where(begin & (k <= 1), 0.0, base)
+
+
+def balance_at(pv, rate, pmt, k, mode='END'):
+    """BAL: saldo após o pagamento k (k = 0 devolve PV)."""
+    begin = _is_begin(mode)
+    k = np.asarray(k, dtype=float)
+    with np.errstate(all='ignore'):
+        k_star = payoff_period(pv, rate, pmt, mode)
+        return np.where(k >= k_star, 0.0, _raw_balance(pv, rate, pmt, k, begin))
+
+
+def cumulative_principal(pv, rate, pmt, k, mode='END'):
+    """Principal pago acumulado nos pagamentos 1..k."""
+    return balance_at(pv, rate, pmt, k, mode) - pv
+
+
+def cumulative_interest(pv, rate, pmt, k, mode='END'):
+    """Juros pagos acumulados nos pagamentos 1..k."""
+    begin = _is_begin(mode)
+    k = np.asarray(k, dtype=float)
+    with np.errstate(all='ignore'):
+        k_star = payoff_period(pv, rate, pmt, mode)
+        # Pagamentos completos antes da liquidação: juros = pagamentos - principal
+        full = np.maximum(np.minimum(k, k_star - 1), 0)
+        interest_full = full * pmt - (_raw_balance(pv, rate, pmt, full, begin) - pv)
+        final_interest = np.where(k_star >= 1, -rate * _interest_base(pv, rate, pmt, k_star, begin), 0.0)
+        return np.where(k >= k_star, interest_full + final_interest, interest_full)
+
+
+def amortization_summary(pv, rate, pmt, p1, p2, mode='END'):
+    """BAL, PRN e INT do intervalo P1-P2 em tempo constante.
+
+    Devolve um dicionário com 'BAL' (saldo após P2), 'PRN' (principal pago
+    entre P1 e P2) e 'INT' (juros pagos entre P1 e P2).
+    """
+    p1 = np.asarray(p1, dtype=float)
+    p2 = np.asarray(p2, dtype=float)
+    balance_p2 = balance_at(pv, rate, pmt, p2, mode)
+    principal = balance_p2 - balance_at(pv, rate, pmt, p1 - 1, mode)
+    interest = cumulative_interest(pv, rate, pmt, p2, mode) - cumulative_interest(pv, rate, pmt, p1 - 1, mode)
+    return {'BAL': balance_p2, 'PRN': principal, 'INT': interest}
+
+
+def amortization_table(pv, rate, pmt, n, p1=1, p2=None, mode='END'):
+    """Tabela de amortização dos períodos P1..P2 como dicionário de arrays NumPy.
+
+    As chaves são as colunas de `AMORTIZATION_COLUMNS`. Os períodos após a
+    liquidação do saldo não são incluídos.
+    """
+    begin = _is_begin(mode)
+    p2 = n if p2 is None else p2
+    k_star = payoff_period(pv, rate, pmt, mode)
+    last = int(min(p2, n, k_star))
+    periods = np.arange(p1, last + 1, dtype=float)
+
+    with np.errstate(all='ignore'):
+        start_balance = _raw_balance(pv, rate, pmt, periods - 1, begin)
+        interest = -rate * _interest_base(pv, rate, pmt, periods, begin)
+        principal = np.where(periods < k_star, pmt - interest, -start_balance)
+        end_balance = np.where(periods >= k_star, 0.0, _raw_balance(pv, rate, pmt, periods, begin))
+
+    return {
+        'Período': periods.astype(int),
+        'Saldo Inicial': start_balance,
+        'Pagamento (PMT)': principal + interest,
+        'Juros Pagos': interest,
+        'Principal Pago': principal,
+        'Saldo Final': end_balance,
+    }
+
+
+def balance_path(pv, rate, pmt, n, mode='END'):
+    """Períodos e saldo devedor no fim de cada período, usado no gráfico de amortização."""
+    last = int(min(n, payoff_period(pv, rate, pmt, mode)))
+    periods = np.arange(1, last + 1)
+    return periods, balance_at(pv, rate, pmt, periods, mode)
+
+
+# --- Cache partilhada de tabelas completas ---
+
+schedule_cache = LRUCache(max_entries=64, max_bytes=128 * 1024 * 1024)
+
+
+class CachedSchedule(NamedTuple):
+    """Tabela completa (períodos 1..N) com os acumulados usados nos sumários."""
+    table: dict
+    cumulative_principal: np.ndarray
+    cumulative_interest: np.ndarray
+
+
+def _build_schedule(pv, rate, pmt, n, mode):
+    table = amortization_table(pv, rate, pmt, n, mode=mode)
+    # Acumulados com um zero inicial: o intervalo P1-P2 é acum[P2] - acum[P1-1]
+    cumulative_principal = np.concatenate(([0.0], np.cumsum(table['Principal Pago'])))
+    cumulative_interest = np.concatenate(([0.0], np.cumsum(table['Juros Pagos'])))
+    for array in (*table.values(), cumulative_principal, cumulative_interest):
+        array.flags.writeable = False # Partilhado entre sessões: só de leitura
+    return CachedSchedule(table, cumulative_principal, cumulative_interest)
+
+
+def get_schedule(pv, rate, pmt, n, mode='END'):
+    """Tabela completa do empréstimo, lida da cache (chave: PV, taxa, PMT, N, modo)."""
+    key = (float(pv), float(rate), float(pmt), int(n), mode)
+    return schedule_cache.get_or_compute(key, lambda: _build_schedule(*key))
+
+
+def schedule_slice(schedule, p1, p2):
+    """Linhas P1..P2 de uma tabela em cache (sem cópia dos dados)."""
+    return {column: values[p1 - 1:p2] for column, values in schedule.table.items()}
+
+
+def schedule_summary(schedule, p1, p2):
+    """BAL, PRN e INT do intervalo P1-P2 a partir dos acumulados em cache, em O(1).
+
+    Os períodos após a liquidação antecipada contam como zero.
+    """
+    last = len(schedule.table['Período'])
+    end, start = min(p2, last), min(p1 - 1, last)
+    balance = schedule.table['Saldo Final'][end - 1] if end > 0 else 0.0
+    return {
+        'BAL': balance,
+        'PRN': schedule.cumulative_principal[end] - schedule.cumulative_principal[start],
+        'INT': schedule.cumulative_interest[end] - schedule.cumulative_interest[start],
+    }
@@ -0,0 +1,205 @@
+"""Análise de obrigações: datas de cupão, juros corridos (AI), preço e yield.
+
+As situações ambíguas (ex: período de cupão não encontrado) são sinalizadas com
+`BondWarning` através do módulo `warnings`, para que a interface as possa mostrar.
+"""
+import datetime
+import warnings
+
+from .daycount import days_between as _days_between, days_in_month
+
+
+class BondWarning(UserWarning):
+    """Aviso de cálculo aproximado ou possivelmente incorreto numa obrigação."""
+
+
+def _shift_months(dt, months):
+    """Desloca a data `months` meses (positivo ou negativo), ajustando o dia ao fim do mês."""
+    new_month_float = dt.month + months
+    new_year = dt.year
+    while new_month_float <= 0:
+        new_month_float += 12
+        new_year -= 1
+    while new_month_float > 12:
+        new_month_float -= 12
+        new_year += 1
+    new_month = int(new_month_float)
+    # Lidar com dia 29, 30, 31 em meses mais curtos
+    day = min(dt.day, days_in_month(new_year, new_month))
+    return datetime.date(new_year, new_month, day)
+
+
+def days_between(date1, date2, method):
+    """Dias entre datas usando ACT ou 360 (com a regra de fim de Fevereiro)."""
+    return _days_between(date1, date2, method, feb_end=True)
+
+
+def get_coupon_dates_list(rdt, sdt, coupons_per_year):
+    """Gera lista de datas de cupão relevantes à volta de sdt."""
+    if coupons_per_year <= 0: return []
+    coupon_dates = []
+    current_dt = rdt
+    interval_months = 12 / coupons_per_year
+    # Retroceder para gerar datas anteriores e futuras
+    limit_date_past = sdt - datetime.timedelta(days=max(400, 400 / coupons_per_year)) # Olhar ~1 período+ para trás
+    limit_date_future = rdt + datetime.timedelta(days=1) # Incluir RDT
+
+    while current_dt >= limit_date_past:
+        coupon_dates.append(current_dt)
+        try:
+            current_dt = _shift_months(current_dt, -interval_months)
+        except ValueError:
+            # Fallback extremo, parar se data inválida
+            break
+        # Evitar loop infinito
+        if len(coupon_dates) > 200: break # Limite arbitrário
+
+    coupon_dates.sort()
+    # Filtrar para ter apenas datas relevantes (um pouco antes de SDT até RDT)
+    relevant_dates = [dt for dt in coupon_dates if dt <= limit_date_future and dt >= limit_date_past]
+    # Garantir que RDT está na lista se for uma data de cupão teórica
+    if rdt not in relevant_dates:
+        is_rdt_coupon_date = False
+        test_dt = relevant_dates[-1] if relevant_dates else rdt
+        while test_dt < rdt:
+            try:
+                test_dt = _shift_months(test_dt, interval_months)
+            except ValueError:
+                break
+            if test_dt == rdt:
+                is_rdt_coupon_date = True
+                break
+        if is_rdt_coupon_date and rdt not in relevant_dates:
+            relevant_dates.append(rdt)
+            relevant_dates.sort()
+
+    return relevant_dates
+
+
+def calculate_accrued_interest(sdt, cpn_rate, coupons_per_year, day_count_method, coupon_dates_list):
+    """Calcula Juros Corridos (AI), em % do valor nominal. Devolve None em caso de erro."""
+    if cpn_rate == 0 or coupons_per_year == 0: return 0.0
+
+    prev_coupon_date = None
+    next_coupon_date = None
+    for dt in reversed(coupon_dates_list): # Procurar para trás
+        if dt <= sdt:
+            prev_coupon_date = dt
+            break
+    for dt in coupon_dates_list: # Procurar para a frente
+        if dt > sdt:
+            next_coupon_date = dt
+            break
+
+    if not prev_coupon_date or not next_coupon_date:
+        # Pode acontecer se SDT for antes da primeira data de cupão gerada ou após RDT
+        # Simplificação: retornar 0 se não encontrar período claro
+        warnings.warn(f"Não foi possível determinar o período de cupão para SDT={sdt}. AI pode estar incorreto.", BondWarning)
+        return 0.0
+
+    try:
+        days_accrued = days_between(prev_coupon_date, sdt, day_count_method)
+        days_in_period = days_between(prev_coupon_date, next_coupon_date, day_count_method)
+
+        if days_in_period <= 0:
+            warnings.warn(f"Período de cupão inválido ({days_in_period} dias) entre {prev_coupon_date} e {next_coupon_date}. AI pode estar incorreto.", BondWarning)
+            return 0.0 # Evitar divisão por zero
+
+        coupon_amount_per_period = (cpn_rate / 100.0) / coupons_per_year * 100.0 # Assume 100 par
+        return (days_accrued / days_in_period) * coupon_amount_per_period
+    except Exception as e:
+        warnings.warn(f"Erro no cálculo de AI: {e}", BondWarning)
+        return None
+
+
+def calculate_bond_price_dirty(yield_rate_annual, sdt, rdt, cpn_rate, rv_percent, coupons_per_year, day_count_method, coupon_dates_list):
+    """Calcula o Preço Sujo (Dirty Price = PV dos fluxos futuros @ yield) - Aproximado."""
+    if coupons_per_year == 0: # Caso de Zero Coupon Bond (simplificado)
+        yld_decimal = yield_rate_annual / 100.0
+        # Usar composição anual ACT/365 para simplificar
+        years_to_maturity = days_between(sdt, rdt, "ACT") / 365.0
+        if (1 + yld_decimal) <= 0: return None # Evitar erro
+        return (rv_percent / 100.0 * 100.0) / ((1 + yld_decimal)**years_to_maturity)
+
+    yld_per_period = (yield_rate_annual / 100.0) / coupons_per_year
+    pv_total = 0.0
+    par_value = 100.0 # Assumir par = 100
+
+    # Encontrar datas futuras e período atual
+    future_coupon_dates = [dt for dt in coupon_dates_list if dt > sdt and dt <= rdt]
+    prev_coupon_date = next((dt for dt in reversed(coupon_dates_list) if dt <= sdt), None)
+    next_coupon_date = next((dt for dt in coupon_dates_list if dt > sdt), None)
+
+    if not next_coupon_date: # SDT é na ou após a última data de cupão antes de RDT?
+        next_coupon_date = rdt # O próximo fluxo relevante é o reembolso
+
+    if not prev_coupon_date:
+        # Se não há cupão anterior, estimar uma data anterior teórica
+        intervalo_dias = 365 / coupons_per_year
+        prev_coupon_date = next_coupon_date - datetime.timedelta(days=intervalo_dias)
+
+    # Calcular dias DSC e E (usando ACT para períodos fracionários no desconto)
+    try:
+        # Usar ACT para o desconto fracionário é mais comum, mesmo se AI usa 360
+        dsc = days_between(sdt, next_coupon_date, "ACT")
+        e = days_between(prev_coupon_date, next_coupon_date, "ACT")
+        if e <= 0: e = 365.0 / coupons_per_year # Fallback se datas inválidas
+        w = dsc / e # Fração do período até próximo cupão
+    except Exception:
+        warnings.warn("Erro ao calcular dias para desconto fracionário. Usando w=1.", BondWarning)
+        w = 1.0 # Simplificação se cálculo de dias falhar
+
+    # Desconto base por período
+    v = 1.0 / (1.0 + yld_per_period)
+
+    # 1. Descontar Cupões Futuros
+    coupon_amount = (cpn_rate / 100.0) / coupons_per_year * par_value
+    if coupon_amount > 0:
+        for i, coupon_date in enumerate(future_coupon_dates):
+            # O expoente é k-1 + w (onde k=1 para next_coupon_date)
+            exponent = i + w
+            pv_total += coupon_amount * (v ** exponent)
+
+    # 2. Descontar Valor de Reembolso (RV)
+    # Encontrar o índice 'N' correspondente a RDT
+    n_periods = 0
+    temp_dt = next_coupon_date
+    i = 0
+    interval_months = 12 / coupons_per_year
+    while temp_dt <= rdt:
+        n_periods = i + w # Expoente de desconto para RDT
+        if temp_dt == rdt: break
+        i += 1
+        # Avançar para a próxima data de cupão teórica
+        try:
+            temp_dt = _shift_months(temp_dt, interval_months)
+        except ValueError: break # Parar se data inválida
+        # Limite segurança
+        if i > 200 * coupons_per_year : break
+
+    if n_periods == 0: # Se RDT <= next_coupon_date
+        n_periods = w # Descontar apenas fração
+
+    redemption_amount = rv_percent / 100.0 * par_value
+    pv_total += redemption_amount * (v ** n_periods)
+
+    return pv_total # Este é o Preço Sujo (Dirty Price)
+
+
+def solve_bond_yield(target_clean_price, sdt, rdt, cpn_rate, rv_percent, coupons_per_year, day_count_method, coupon_dates_list, known_ai):
+    """Yield anual (%) que iguala o preço limpo calculado a `target_clean_price`.
+
+    Usa o método de Newton (scipy) com a taxa de cupão como estimativa inicial.
+    Levanta RuntimeError/ValueError se o solver não convergir.
+    """
+    from scipy.optimize import newton # Importado aqui para não pesar no import do pacote
+
+    def target_yield_function(yield_rate_annual_decimal):
+        dirty_price = calculate_bond_price_dirty(yield_rate_annual_decimal * 100.0, sdt, rdt, cpn_rate, rv_percent, coupons_per_year, day_count_method, coupon_dates_list)
+        if dirty_price is None:
+            return 1e10 # Valor grande para indicar erro ao solver
+        return (dirty_price - known_ai) - target_clean_price
+
+    initial_yield_guess = cpn_rate / 100.0
+    solved_yield_decimal = newton(target_yield_function, initial_yield_guess, tol=1e-6, maxiter=100)
+    return solved_yield_decimal * 100.0
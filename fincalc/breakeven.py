@@ -0,0 +1,234 @@
+"""Análise do ponto de equilíbrio (breakeven).
+
+`calculate_breakeven` resolve um cenário e devolve um valor ou uma mensagem
+de erro; `solve_breakeven_batch` resolve muitos cenários de uma só vez, com
+operações NumPy sobre colunas, e devolve os erros como códigos numéricos.
+`breakeven_grid` e `breakeven_tornado` usam-na para a análise de
+sensibilidade (grelhas 2-D e choques em cada variável).
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+BREAKEVEN_VARIABLES = ('P', 'VC', 'FC', 'PFT', 'Q')
+BREAKEVEN_OK = 0
+BREAKEVEN_MISSING = 1
+BREAKEVEN_ZERO_MARGIN = 2
+BREAKEVEN_INVALID_Q = 3
+BREAKEVEN_ERROR_LABELS = (
+    'OK',
+    'Dados em falta',
+    'Preço (P) deve ser maior que Custo Variável (VC)',
+    'Quantidade (Q) deve ser > 0',
+)
+
+
+def calculate_breakeven(known_vars):
+    """Resolve a variável `Target` em P * Q = FC + VC * Q + PFT.
+
+    Devolve o valor calculado (float) ou uma mensagem de erro (str).
+    """
+    target = known_vars['Target']
+    try:
+        p = known_vars['P']
+        vc = known_vars['VC']
+        fc = known_vars['FC']
+        pft = known_vars['PFT']
+        q = known_vars['Q']
+
+        required_for = {
+            'Q': ['FC', 'PFT', 'P', 'VC'],
+            'PFT': ['FC', 'Q', 'P', 'VC'],
+            'FC': ['PFT', 'Q', 'P', 'VC'],
+            'P': ['FC', 'PFT', 'Q', 'VC'],
+            'VC': ['FC', 'PFT', 'Q', 'P']
+        }
+
+        for var_name in required_for[target]:
+            if known_vars[var_name] is None:
+                return f"Erro: Input '{var_name}' não pode ser None para calcular '{target}'."
+            if not isinstance(known_vars[var_name], (int, float)):
+                 return f"Erro: Input '{var_name}' deve ser numérico."
+
+        if target == 'Q':
+            p = known_vars['P']
+            vc = known_vars['VC']
+            fc = known_vars['FC']
+            pft = known_vars['PFT']
+            margin_contribution = p - vc
+            if margin_contribution <= 0: return "Erro: Preço (P) deve ser maior que Custo Variável (VC)."
+            result = (fc + pft) / margin_contribution
+        elif target == 'PFT':
+            p = known_vars['P']
+            vc = known_vars['VC']
+            fc = known_vars['FC']
+            q = known_vars['Q']
+            margin_contribution = p - vc
+            result = (margin_contribution * q) - fc
+        elif target == 'FC':
+            p = known_vars['P']
+            vc = known_vars['VC']
+            pft = known_vars['PFT']
+            q = known_vars['Q']
+            margin_contribution = p - vc
+            result = (margin_contribution * q) - pft
+        elif target == 'P':
+            fc = known_vars['FC']
+            vc = known_vars['VC']
+            pft = known_vars['PFT']
+            q = known_vars['Q']
+            if q <= 0: return "Erro: Quantidade (Q) deve ser > 0."
+            result = (fc + (vc * q) + pft) / q
+        elif target == 'VC':
+            p = known_vars['P']
+            fc = known_vars['FC']
+            pft = known_vars['PFT']
+            q = known_vars['Q']
+            if q <= 0: return "Erro: Quantidade (Q) deve ser > 0."
+            result = ((p * q) - fc - pft) / q
+        else:
+            return "Erro: Variável alvo ('Target') desconhecida."
+        return result
+    except ZeroDivisionError:
+         return f"Erro: Divisão por zero ao calcular {target} (verifique se Q ou (P-VC) são zero onde aplicável)."
+    except TypeError as te:
+         return f"Erro de Tipo: Verifique se todos os inputs necessários são números válidos. Detalhe: {te}"
+    except Exception as e:
+         return f"Erro inesperado ao calcular {target}: {e}"
+
+
+class BreakevenBatchResult(NamedTuple):
+    """Resultado de `solve_breakeven_batch`.
+
+    `values` tem as cinco variáveis (P, VC, FC, PFT, Q) já completadas,
+    `solved` a variável resolvida em cada linha e `error` o código de erro
+    (`BREAKEVEN_OK`, `BREAKEVEN_MISSING`, `BREAKEVEN_ZERO_MARGIN` ou
+    `BREAKEVEN_INVALID_Q`), com a descrição em `BREAKEVEN_ERROR_LABELS`.
+    """
+    values: dict
+    solved: np.ndarray
+    error: np.ndarray
+
+    @property
+    def failed(self):
+        return self.error != BREAKEVEN_OK
+
+    def to_frame(self):
+        """Devolve os resultados como DataFrame (uma linha por cenário)."""
+        import pandas as pd
+        frame = pd.DataFrame(self.values)
+        frame['Resolvido'] = self.solved
+        frame['Erro'] = np.asarray(BREAKEVEN_ERROR_LABELS, dtype=object)[self.error]
+        return frame
+
+
+def solve_breakeven_batch(data, target=None):
+    """Resolve P * Q = FC + VC * Q + PFT para cada linha de `data`, de forma vetorizada.
+
+    `data` é um DataFrame ou um dicionário de arrays (ou escalares, com
+    broadcasting) com as colunas P, VC, FC, PFT e Q. Se `target` for indicado
+    essa variável é resolvida em todas as linhas; caso contrário, cada linha
+    resolve a única variável que tiver em falta (NaN). Todas as fórmulas são
+    avaliadas sobre as colunas inteiras e a de cada linha é escolhida por
+    máscara, sem ramos Python por linha. Nunca levanta exceções por linha.
+    """
+    names = [name for name in BREAKEVEN_VARIABLES if name in data]
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(data[name], dtype=float)) for name in names])
+    size = arrays[0].shape[0] if arrays else 0
+    columns = dict(zip(names, arrays))
+    values = {name: np.array(columns[name], dtype=float) if name in columns else np.full(size, np.nan)
+              for name in BREAKEVEN_VARIABLES}
+
+    missing = np.column_stack([np.isnan(values[name]) for name in BREAKEVEN_VARIABLES])
+    if target is not None:
+        if target not in BREAKEVEN_VARIABLES:
+            raise ValueError(f"Variável alvo desconhecida: {target}")
+        target_index = np.full(size, BREAKEVEN_VARIABLES.index(target))
+        missing[:, target_index[0]] = False
+        complete = ~missing.any(axis=1)
+    else:
+        complete = missing.sum(axis=1) == 1
+        target_index = np.argmax(missing, axis=1)
+
+    p, vc, fc, pft, q = (values[name] for name in BREAKEVEN_VARIABLES)
+    margin = p - vc
+    with np.errstate(all='ignore'):
+        candidates = np.stack([
+            (fc + vc * q + pft) / q,   # P
+            (p * q - fc - pft) / q,    # VC
+            margin * q - pft,          # FC
+            margin * q - fc,           # PFT
+            (fc + pft) / margin,       # Q
+        ])
+    solved = candidates[target_index, np.arange(size)]
+
+    divides_by_q = (target_index == 0) | (target_index == 1)
+    error = np.select(
+        [~complete, (target_index == 4) & ~(margin > 0), divides_by_q & ~(q > 0)],
+        [BREAKEVEN_MISSING, BREAKEVEN_ZERO_MARGIN, BREAKEVEN_INVALID_Q],
+        BREAKEVEN_OK,
+    )
+    ok = error == BREAKEVEN_OK
+    for index, name in enumerate(BREAKEVEN_VARIABLES):
+        rows = ok & (target_index == index)
+        values[name][rows] = solved[rows]
+    solved_names = np.where(complete, np.asarray(BREAKEVEN_VARIABLES, dtype=object)[target_index], '')
+    return BreakevenBatchResult(values=values, solved=solved_names, error=error)
+
+
+# --- Análise de sensibilidade ---
+
+class SensitivityGrid(NamedTuple):
+    """Valores de `target` numa grelha `y_values` x `x_values` (linhas = y), NaN onde há erro."""
+    target: str
+    x_var: str
+    x_values: np.ndarray
+    y_var: str
+    y_values: np.ndarray
+    values: np.ndarray
+    error: np.ndarray
+
+
+def breakeven_grid(base, target, x_var, x_values, y_var, y_values):
+    """Resolve `target` para todas as combinações de `x_var` e `y_var`, com as restantes fixas em `base`.
+
+    `base` é um dicionário com P, VC, FC, PFT e Q (o valor de `target` é
+    ignorado). A grelha é resolvida de uma só vez por `solve_breakeven_batch`
+    sobre a malha (broadcasting de x em linha e y em coluna).
+    """
+    if x_var == y_var or target in (x_var, y_var):
+        raise ValueError("As variáveis da grelha têm de ser diferentes entre si e da variável resolvida.")
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = np.asarray(y_values, dtype=float)
+    shape = (len(y_values), len(x_values))
+    data = {name: np.broadcast_to(float(base[name]), shape) for name in BREAKEVEN_VARIABLES if name != target}
+    data[x_var] = np.broadcast_to(x_values[None, :], shape)
+    data[y_var] = np.broadcast_to(y_values[:, None], shape)
+    result = solve_breakeven_batch({name: column.ravel() for name, column in data.items()}, target)
+    values = np.where(result.failed, np.nan, result.values[target]).reshape(shape)
+    return SensitivityGrid(target, x_var, x_values, y_var, y_values, values, result.error.reshape(shape))
+
+
+def breakeven_tornado(base, target, shock=0.1):
+    """Variação de `target` com choques de -`shock` e +`shock` (relativos) em cada uma das outras variáveis.
+
+    Devolve uma lista de dicionários (variável, valor com choque negativo,
+    valor com choque positivo, amplitude), da maior para a menor amplitude,
+    e o valor base de `target`. Variáveis com valor base zero não variam.
+    """
+    inputs = [name for name in BREAKEVEN_VARIABLES if name != target]
+    # Linha 0: base; depois, para cada variável, choque negativo e positivo
+    data = {name: np.full(1 + 2 * len(inputs), float(base[name])) for name in inputs}
+    for index, name in enumerate(inputs):
+        data[name][1 + 2 * index] *= 1 - shock
+        data[name][2 + 2 * index] *= 1 + shock
+    result = solve_breakeven_batch(data, target)
+    values = np.where(result.failed, np.nan, result.values[target])
+    rows = [{
+        'Variável': name,
+        'Choque -': float(values[1 + 2 * index]),
+        'Choque +': float(values[2 + 2 * index]),
+        'Amplitude': float(abs(values[2 + 2 * index] - values[1 + 2 * index])),
+    } for index, name in enumerate(inputs)]
+    rows.sort(key=lambda row: -np.nan_to_num(row['Amplitude'], nan=-1.0))
+    return rows, float(values[0])
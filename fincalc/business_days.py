@@ -0,0 +1,181 @@
+"""Calendários de dias úteis: contagem, soma de dias úteis e ajuste de datas.
+
+Um `BusinessCalendar` guarda, para cada dia de 1980-01-01 a 2079-12-31 (o
+intervalo da calculadora de datas), se é dia útil (bitmap) e as somas
+acumuladas desse bitmap: `count[i]` é o número de dias úteis antes do dia i
+e `positions[k]` o índice do k-ésimo dia útil (com o ajuste Modified
+Following de cada dia também pré-calculado). Com elas, "dias úteis entre
+datas", "somar N dias úteis" e os ajustes Following, Modified Following e
+Preceding são uma ou duas consultas por data, sobre arrays `datetime64`
+inteiros, sem percorrer os dias. Os feriados vêm de um calendário
+incluído (TARGET) ou de um ficheiro CSV/Parquet.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from .cache import LRUCache
+
+CALENDAR_START = np.datetime64('1980-01-01', 'D')
+CALENDAR_END = np.datetime64('2079-12-31', 'D')
+WEEKEND = (5, 6) # Sábado e domingo (segunda-feira = 0)
+BUSINESS_DAY_RULES = ('Following', 'Modified Following', 'Preceding')
+HOLIDAY_COLUMN = 'Data'
+
+
+def _as_day_numbers(dates):
+    return np.asarray(dates, dtype='datetime64[D]').view(np.int64)
+
+
+class BusinessCalendar(NamedTuple):
+    """Bitmap de dias úteis a partir de `first_day` (dias desde 1970-01-01) e as suas somas acumuladas."""
+    name: str
+    first_day: int
+    business: np.ndarray
+    count: np.ndarray
+    positions: np.ndarray
+    modified_following: np.ndarray
+
+    def _index(self, dates):
+        index = _as_day_numbers(dates) - self.first_day
+        if index.size and (index.min() < 0 or index.max() >= len(self.business)):
+            raise ValueError(f"Datas fora do calendário de dias úteis ({CALENDAR_START} a {CALENDAR_END}).")
+        return index
+
+    def _dates(self, rank):
+        """Datas dos dias úteis de ordem `rank` (ValueError se saírem do calendário)."""
+        rank = np.asarray(rank)
+        if rank.size and (rank.min() < 0 or rank.max() >= len(self.positions)):
+            raise ValueError(f"O resultado sai do calendário de dias úteis ({CALENDAR_START} a {CALENDAR_END}).")
+        return (np.take(self.positions, rank).astype(np.int64) + self.first_day).astype('datetime64[D]')[()]
+
+    def is_business_day(self, dates):
+        """True nos dias úteis."""
+        return np.take(self.business, self._index(dates))[()]
+
+    def business_days_between(self, date1, date2):
+        """Dias úteis de `date1` (incluída) a `date2` (excluída); negativo se date1 > date2."""
+        return (np.take(self.count, self._index(date2)).astype(np.int64)
+                - np.take(self.count, self._index(date1)))[()]
+
+    def add_business_days(self, dates, days):
+        """Data `days` dias úteis depois (ou antes, se negativo) de cada data; com 0 a data não muda.
+
+        A partir de um dia não útil, +1 é o dia útil seguinte e -1 o anterior.
+        """
+        index = self._index(dates)
+        days = np.asarray(days, dtype=np.int64)
+        # Ordem do último dia útil até à data (para avançar) ou do primeiro a partir dela (para recuar)
+        rank = np.where(days > 0, np.take(self.count, index + 1).astype(np.int64) - 1, np.take(self.count, index)) + days
+        rank = np.where(days == 0, 0, rank)
+        return np.where(days == 0, np.asarray(dates, dtype='datetime64[D]'), self._dates(rank))[()]
+
+    def adjust(self, dates, rule='Following'):
+        """Ajusta as datas que não são dias úteis segundo a regra de `BUSINESS_DAY_RULES`.
+
+        * Following: dia útil seguinte;
+        * Modified Following: dia útil seguinte, ou o anterior se o seguinte mudar de mês;
+        * Preceding: dia útil anterior.
+        """
+        if rule not in BUSINESS_DAY_RULES:
+            raise ValueError(f"Regra de ajuste desconhecida: {rule}")
+        index = self._index(dates)
+        if rule == 'Preceding':
+            return self._dates(np.take(self.count, index + 1).astype(np.int64) - 1)
+        if rule == 'Following':
+            return self._dates(np.take(self.count, index))
+        return self._dates(np.take(self.modified_following, index))
+
+
+def business_calendar(holidays=(), weekend=WEEKEND, name=''):
+    """Calendário de dias úteis de 1980 a 2079: todos os dias exceto `weekend` e os `holidays` (datas)."""
+    first_day = int(CALENDAR_START.view(np.int64))
+    days = np.arange(first_day, int(CALENDAR_END.view(np.int64)) + 1)
+    # 1970-01-01 foi uma quinta-feira (3)
+    business = ~np.isin((days + 3) % 7, weekend)
+    holidays = _as_day_numbers(holidays).ravel() - first_day
+    business[holidays[(holidays >= 0) & (holidays < len(days))]] = False
+    count = np.concatenate(([0], np.cumsum(business))).astype(np.int32)
+    positions = np.flatnonzero(business).astype(np.int32)
+    # Modified Following de cada dia: o seguinte (ordem count[i]) se for do mesmo mês, senão o anterior
+    months = days.astype('datetime64[D]').astype('datetime64[M]')
+    following = np.minimum(count[:-1], len(positions) - 1)
+    same_month = (count[:-1] < len(positions)) & (months[positions[following]] == months)
+    modified_following = np.where(same_month, count[:-1], count[1:] - 1).astype(np.int32)
+    for array in (business, count, positions, modified_following):
+        array.flags.writeable = False
+    return BusinessCalendar(name, first_day, business, count, positions, modified_following)
+
+
+def _dates_in_year(year, month, day):
+    """Data `day`/`month` de cada ano (arrays)."""
+    months = (year - 1970) * 12 + (month - 1)
+    return months.astype('datetime64[M]').astype('datetime64[D]') + (day - 1)
+
+
+def easter_sunday(years):
+    """Domingo de Páscoa (calendário gregoriano) de cada ano, pelo algoritmo de Meeus/Jones/Butcher."""
+    year = np.asarray(years, dtype=np.int64)
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    day = (h + l - 7 * m + 33 * month + 19) % 32
+    return _dates_in_year(year, month, day)
+
+
+def target_holidays(years):
+    """Dias de fecho do TARGET, com a história do calendário.
+
+    1 de janeiro e 25 de dezembro em todos os anos (antes de 1999, quando o
+    TARGET ainda não existia, ficam só estes); Sexta-Feira Santa,
+    Segunda-Feira de Páscoa, 1 de maio e 26 de dezembro a partir de 2000;
+    31 de dezembro de 1999 a 2001.
+    """
+    year = np.asarray(years, dtype=np.int64)
+    recent = year[year >= 2000]
+    easter = easter_sunday(recent)
+    transition = year[(year >= 1999) & (year <= 2001)]
+    return np.sort(np.concatenate([
+        _dates_in_year(year, 1, 1), _dates_in_year(year, 12, 25),
+        easter - 2, easter + 1, _dates_in_year(recent, 5, 1), _dates_in_year(recent, 12, 26),
+        _dates_in_year(transition, 12, 31),
+    ]))
+
+
+# Calendários incluídos: nome -> feriados dos anos pedidos
+CALENDAR_HOLIDAYS = {
+    'Fins de semana': lambda years: np.array([], dtype='datetime64[D]'),
+    'TARGET': target_holidays,
+}
+calendar_cache = LRUCache(max_entries=16, max_bytes=16 * 1024 * 1024)
+
+
+def get_business_calendar(name='TARGET', holidays=()):
+    """Calendário `name` de `CALENDAR_HOLIDAYS` com os feriados extra `holidays`, em cache."""
+    if name not in CALENDAR_HOLIDAYS:
+        raise ValueError(f"Calendário desconhecido: {name}")
+    extra = tuple(np.unique(_as_day_numbers(holidays)).tolist())
+    key = (name, extra)
+
+    def build():
+        years = np.arange(CALENDAR_START.astype(object).year, CALENDAR_END.astype(object).year + 1)
+        days = np.concatenate([CALENDAR_HOLIDAYS[name](years), np.array(extra, dtype='datetime64[D]')])
+        return business_calendar(days, name=name)
+    return calendar_cache.get_or_compute(key, build)
+
+
+def read_holidays(source, file_name=None):
+    """Feriados de um ficheiro CSV ou Parquet (coluna 'Data', ou a primeira coluna), como array `datetime64[D]`."""
+    import pandas as pd
+    name = file_name or str(getattr(source, 'name', source))
+    table = pd.read_parquet(source) if name.lower().endswith('.parquet') else pd.read_csv(source)
+    if table.shape[1] == 0:
+        raise ValueError("O ficheiro de feriados não tem colunas.")
+    column = table[HOLIDAY_COLUMN] if HOLIDAY_COLUMN in table else table.iloc[:, 0]
+    dates = pd.to_datetime(column, errors='coerce').dropna()
+    return np.unique(dates.to_numpy(dtype='datetime64[D]'))
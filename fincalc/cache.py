@@ -0,0 +1,97 @@
+"""Cache LRU limitado em número de entradas e em memória, com contadores.
+
+Usado para guardar resultados caros (ex: tabelas de amortização completas)
+entre execuções do script Streamlit, que corre sempre no mesmo processo.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def nbytes_of(value):
+    """Estimativa do tamanho em memória de um valor (arrays NumPy, dicts, tuplos)."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(nbytes_of(v) for v in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(nbytes_of(v) for v in value)
+    return 64 # Escalares e objetos pequenos
+
+
+class LRUCache:
+    """Cache LRU com limite de entradas (`max_entries`) e de bytes (`max_bytes`).
+
+    Quando um dos limites é ultrapassado, as entradas usadas há mais tempo são
+    removidas. Valores maiores que `max_bytes` são devolvidos mas não guardados.
+    `stats()` devolve os contadores de hits, misses e evictions.
+    """
+
+    def __init__(self, max_entries=128, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock() # Streamlit corre cada sessão numa thread
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, nbytes=None):
+        nbytes = nbytes_of(value) if nbytes is None else nbytes
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._bytes -= evicted_bytes
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Devolve o valor em cache ou calcula-o com `compute()` e guarda-o."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Contadores para dimensionar a cache: hits, misses, evictions, entradas e bytes."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
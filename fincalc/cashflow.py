@@ -0,0 +1,531 @@
+"""Análise de fluxos de caixa desiguais: NPV e IRR.
+
+Os fluxos podem ser tratados expandidos (um valor por período) ou agrupados
+como na calculadora: montantes Cnn e frequências Fnn (número de períodos
+consecutivos com o mesmo montante). `npv_grouped` trabalha diretamente sobre
+os grupos, somando cada um como uma série geométrica, em O(grupos), e
+`irr_grouped` encontra todas as IRR reais com o mesmo tipo de somas.
+`npv_profile` avalia o NPV para muitas taxas de uma só vez e
+`crossover_rates` encontra as taxas em que dois projetos têm o mesmo NPV.
+`cash_flow_metrics` calcula MIRR, paybacks e índice de rendibilidade numa
+só passagem pelos grupos.
+
+`build_cash_flows` valida a tabela da interface uma só vez (sem percorrer
+linhas) e devolve um objeto `CashFlows` imutável com os arrays e o hash
+do conteúdo, que serve todas as métricas.
+"""
+import hashlib
+from typing import NamedTuple, Optional
+
+import numpy as np
+import numpy_financial as npf
+
+from .solvers import safeguarded_newton
+
+CASH_FLOW_COLUMNS = ('Fluxo (Cnn)', 'Frequência (Fnn)')
+
+
+def expand_cash_flows(cf0, cf_table):
+    """Expande CF0 e a tabela (Cnn, Fnn) numa lista de fluxos período a período.
+
+    `cf_table` é o DataFrame editado na aba NPV/IRR, com as colunas
+    'Fluxo (Cnn)' e 'Frequência (Fnn)'. Levanta ValueError com a linha inválida.
+    """
+    amounts, freqs = group_cash_flows(cf0, cf_table)
+    return np.repeat(amounts, freqs).tolist()
+
+
+def group_cash_flows(cf0, cf_table):
+    """CF0 e a tabela (Cnn, Fnn) como arrays de montantes e frequências, sem expandir.
+
+    O primeiro grupo é CF0 com frequência 1. Levanta ValueError com a linha
+    inválida, com as mesmas mensagens de `expand_cash_flows`.
+    """
+    import pandas as pd
+    amounts = pd.to_numeric(cf_table[CASH_FLOW_COLUMNS[0]], errors='coerce').to_numpy(dtype=float)
+    freqs = pd.to_numeric(cf_table[CASH_FLOW_COLUMNS[1]], errors='coerce').to_numpy(dtype=float)
+    invalid = np.flatnonzero(np.isnan(amounts) | ~np.isfinite(freqs))
+    if invalid.size:
+        raise ValueError(f"Valor inválido na linha {cf_table.index[invalid[0]]+1}. Verifique 'Fluxo' e 'Frequência'.")
+    freqs = np.trunc(freqs)
+    too_small = np.flatnonzero(freqs < 1)
+    if too_small.size:
+        position = too_small[0]
+        raise ValueError(f"Frequência inválida na linha {cf_table.index[position]+1}: {int(freqs[position])}. Deve ser >= 1.")
+    return np.concatenate(([float(cf0)], amounts)), np.concatenate(([1], freqs.astype(np.int64)))
+
+
+class CashFlows(NamedTuple):
+    """Fluxos agrupados já validados, imutáveis, partilhados por todas as métricas.
+
+    `amounts` e `freqs` são arrays só de leitura (CF0 primeiro, com
+    frequência 1), `key` é o hash do conteúdo (chave de cache) e `error` a
+    mensagem de validação (None se a tabela for válida; nesse caso os
+    arrays só contêm CF0).
+    """
+    amounts: np.ndarray
+    freqs: np.ndarray
+    key: str
+    error: Optional[str] = None
+
+    @property
+    def valid(self):
+        return self.error is None
+
+    @property
+    def periods(self):
+        """Número de períodos depois de CF0."""
+        return int(self.freqs.sum()) - 1
+
+    def expand(self):
+        """Um fluxo por período (array)."""
+        return np.repeat(self.amounts, self.freqs)
+
+    def npv(self, rate_percent):
+        return npv_grouped(rate_percent, self.amounts, self.freqs)
+
+    def irr(self):
+        return irr_grouped(self.amounts, self.freqs)
+
+    def profile(self, rates_percent):
+        return npv_profile(self.amounts, self.freqs, rates_percent)
+
+    def metrics(self, rate_percent, finance_rate_percent=None, reinvest_rate_percent=None):
+        return cash_flow_metrics(self.amounts, self.freqs, rate_percent, finance_rate_percent, reinvest_rate_percent)
+
+
+def build_cash_flows(cf0, cf_table):
+    """Valida CF0 e a tabela (Cnn, Fnn) uma única vez e devolve `CashFlows`.
+
+    Não levanta exceções: um erro de validação fica em `error`, com as
+    mensagens de `group_cash_flows`.
+    """
+    error = None
+    try:
+        amounts, freqs = group_cash_flows(cf0, cf_table)
+    except ValueError as e:
+        amounts, freqs, error = np.array([float(cf0)]), np.array([1], dtype=np.int64), str(e)
+    amounts, freqs = amounts.astype(float), freqs.astype(np.int64)
+    amounts.flags.writeable = False
+    freqs.flags.writeable = False
+    return CashFlows(amounts, freqs, cash_flow_hash(amounts, freqs), error)
+
+
+def read_cash_flow_table(source, file_name=None):
+    """Lê uma tabela (Cnn, Fnn) de um ficheiro CSV ou Parquet (caminho ou ficheiro aberto).
+
+    Usa as colunas 'Fluxo (Cnn)' e 'Frequência (Fnn)' se existirem; caso
+    contrário, as duas primeiras colunas. Sem coluna de frequência, cada
+    fluxo conta uma vez.
+    """
+    import pandas as pd
+    name = file_name or str(getattr(source, 'name', source))
+    table = pd.read_parquet(source) if name.lower().endswith('.parquet') else pd.read_csv(source)
+    if all(column in table for column in CASH_FLOW_COLUMNS):
+        table = table[list(CASH_FLOW_COLUMNS)]
+    elif len(table.columns) >= 2:
+        table = table.iloc[:, :2].set_axis(CASH_FLOW_COLUMNS, axis=1)
+    elif len(table.columns) == 1:
+        table = table.set_axis(CASH_FLOW_COLUMNS[:1], axis=1).assign(**{CASH_FLOW_COLUMNS[1]: 1})
+    else:
+        raise ValueError("O ficheiro não tem colunas de fluxos de caixa.")
+    return table.reset_index(drop=True)
+
+
+def npv_grouped(rate_percent, amounts, freqs):
+    """NPV de fluxos agrupados (montante, frequência), sem os expandir.
+
+    O grupo j, com montante C e frequência F a começar no período t, vale
+    `C * v^t * (1 - v^F) / (1 - v)` com `v = 1 / (1 + i)` (ou `C * F` com
+    i = 0). Igual a `npv` sobre os fluxos expandidos, a menos de arredondamentos.
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    freqs = np.asarray(freqs, dtype=float)
+    starts = np.concatenate(([0.0], np.cumsum(freqs)[:-1]))
+    log_growth = np.log1p(rate_percent / 100.0)
+    if log_growth == 0:
+        return float(np.dot(amounts, freqs))
+    discount = np.exp(-starts * log_growth)
+    run_factor = np.expm1(-freqs * log_growth) / np.expm1(-log_growth)
+    return float(np.dot(amounts, discount * run_factor))
+
+
+def npv(rate_percent, cash_flows):
+    """NPV dos fluxos à taxa de desconto por período (em %)."""
+    return float(npf.npv(rate_percent / 100.0, cash_flows))
+
+
+def count_sign_changes(cash_flows):
+    """Número de mudanças de sinal consecutivas na sequência de fluxos."""
+    return sum(1 for i in range(len(cash_flows) - 1) if cash_flows[i] * cash_flows[i+1] < 0)
+
+
+def irr(cash_flows):
+    """IRR (decimal) dos fluxos expandidos. Devolve NaN se não existir solução.
+
+    Usa `irr_grouped` (com frequência 1 por fluxo); com várias IRR devolve a
+    mais próxima de zero, como `npf.irr`.
+    """
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    return irr_grouped(cash_flows, np.ones(len(cash_flows))).irr
+
+
+# --- IRR sobre fluxos agrupados ---
+#
+# Com x = log(1 + i), o NPV é uma soma de séries geométricas em exp(-x). Para
+# x >= 0 cada grupo vale C * soma(exp(-k*x)) para k = t..t+F-1; para x < 0 o
+# NPV é multiplicado por exp(T*x) (T = último período), o que dá somas do
+# mesmo tipo em -x com expoentes T-k >= 0. Assim nenhuma exponencial cresce
+# e as duas formas têm as mesmas raízes e o mesmo sinal.
+
+# Primeiro ponto da grelha de procura das IRR, como fração do limite de Cauchy
+_GRID_FIRST_STEP = 1e-6
+# Divisões dos intervalos da grelha até provar que cada um tem no máximo uma IRR
+_IRR_MAX_SPLITS = 60
+_IRR_MAX_CELLS = 65_536
+_IRR_NOISE = 1e-12 # Erro relativo de arredondamento admitido no NPV e na derivada
+
+
+def _geometric_sum(start, count, z):
+    """soma(exp(-k*z)) para k = start..start+count-1 (z >= 0) e a sua derivada em z."""
+    decay = np.exp(-start * z)
+    small = z * count < 1e-4
+    safe_z = np.where(small, 1.0, z)
+    # Série sem `start`: A(z) = (1 - e^(-count*z)) / (1 - e^(-z)) e a sua derivada
+    den = np.expm1(-safe_z)
+    num = np.expm1(-count * safe_z)
+    ratio = num / den
+    d_ratio = (-count * np.exp(-count * safe_z) * den + np.exp(-safe_z) * num) / den ** 2
+    # Perto de z = 0 a forma fechada perde precisão: usar a série de Taylor
+    ratio = np.where(small, count - z * count * (count - 1) / 2.0, ratio)
+    d_ratio = np.where(small, -count * (count - 1) / 2.0 + z * (count - 1) * count * (2 * count - 1) / 6.0, d_ratio)
+    return decay * ratio, decay * (d_ratio - start * ratio)
+
+
+def _scaled_npv(x, amounts, starts, freqs):
+    """NPV (escalado para x < 0) e derivada em x, para um array de pontos x.
+
+    `amounts` pode ter colunas (grupos x k): o resultado tem então uma coluna
+    por conjunto de montantes, com as mesmas somas geométricas.
+    """
+    x = np.asarray(x, dtype=float)
+    last = starts[-1] + freqs[-1] - 1
+    value = np.empty(x.shape + amounts.shape[1:])
+    derivative = np.empty(x.shape + amounts.shape[1:])
+    positive = x >= 0
+    if positive.any():
+        z = x[positive][:, None]
+        g, dg = _geometric_sum(starts, freqs, z)
+        value[positive] = g @ amounts
+        derivative[positive] = dg @ amounts
+    if (~positive).any():
+        z = -x[~positive][:, None]
+        g, dg = _geometric_sum(last - (starts + freqs - 1), freqs, z)
+        value[~positive] = g @ amounts
+        derivative[~positive] = -(dg @ amounts)
+    return value, derivative
+
+
+def _scan_grid(x_low, x_high, points):
+    """Grelha de `x_low` a `x_high` com x = 0 como ponto (nenhum intervalo atravessa a mudança de forma).
+
+    Os pontos são geométricos a partir de 0 (de 1e-6 ao limite de cada lado):
+    as IRR habituais estão perto de x = 0, onde intervalos uniformes sobre
+    todo o limite de Cauchy juntariam duas raízes próximas no mesmo intervalo.
+    """
+    steps = np.geomspace(_GRID_FIRST_STEP, 1.0, max(points // 2, 2))
+    return np.unique(np.concatenate((x_low * steps[::-1], [0.0], x_high * steps)))
+
+
+class IRRResult(NamedTuple):
+    """Resultado de `irr_grouped`.
+
+    `irr` é a IRR principal (a mais próxima de zero, NaN se não houver),
+    `roots` todas as IRR encontradas (decimal, por ordem crescente), com as
+    iterações e a convergência de cada uma. `sign_changes` é o limite de
+    Descartes: o número de IRR é `sign_changes` menos um número par.
+    `complete` é True quando a procura provou que não há outras IRR; é False
+    se algum intervalo ficou por decidir (por exemplo, uma raiz dupla ou duas
+    raízes quase iguais), caso em que `roots` pode não ter todas.
+    """
+    irr: float
+    roots: np.ndarray
+    iterations: np.ndarray
+    converged: np.ndarray
+    sign_changes: int
+    complete: bool = True
+
+
+def _certified_cells(evaluate, curvature, grid):
+    """Divide os intervalos da grelha até cada um ter, comprovadamente, no máximo uma raiz.
+
+    `evaluate(x)` devolve f, f', e F e M: o NPV com os fluxos em valor
+    absoluto e o valor absoluto da sua derivada. Num intervalo de largura w com
+    |NPV'| <= M e |NPV''| <= c·M: não há raiz se |f(a)| + |f(b)| > M·w (com
+    f(a), f(b) do mesmo sinal), e f é monótona (uma raiz só se f mudar de
+    sinal) se f'(a), f'(b) têm o mesmo sinal e |f'(a)| + |f'(b)| > c·M·w.
+    Os sinais só contam acima do erro de arredondamento (_IRR_NOISE·F e
+    _IRR_NOISE·M); intervalos com f ao nível do ruído nos dois extremos (raiz
+    dupla ou quase) ficam por decidir, tal como os que restam ao fim de
+    _IRR_MAX_SPLITS divisões. Devolve os intervalos monótonos, os que ficaram
+    por decidir e os valores de f nos extremos de ambos.
+    """
+    values = evaluate(grid)
+    lo, hi = grid[:-1], grid[1:]
+    at_lo = tuple(v[:-1] for v in values)
+    at_hi = tuple(v[1:] for v in values)
+    done, undecided = [], []
+    for _ in range(_IRR_MAX_SPLITS):
+        (f_lo, d_lo, m_lo, s_lo), (f_hi, d_hi, m_hi, s_hi) = at_lo, at_hi
+        # Os termos |C|·k·e^(-k|x|) decrescem com |x|: o máximo de |NPV'| está no extremo mais próximo de 0
+        bound = np.where(hi <= 0, s_hi, s_lo)
+        width = hi - lo
+        f_sure = (np.abs(f_lo) > _IRR_NOISE * m_lo) & (np.abs(f_hi) > _IRR_NOISE * m_hi)
+        d_sure = (np.abs(d_lo) > _IRR_NOISE * s_lo) & (np.abs(d_hi) > _IRR_NOISE * s_hi)
+        no_root = f_sure & (f_lo * f_hi > 0) & (np.abs(f_lo) + np.abs(f_hi) > bound * width)
+        monotone = (~no_root & d_sure & (d_lo * d_hi > 0)
+                    & (np.abs(d_lo) + np.abs(d_hi) > curvature * bound * width))
+        noise = ~(no_root | monotone) & (np.abs(f_lo) <= _IRR_NOISE * m_lo) & (np.abs(f_hi) <= _IRR_NOISE * m_hi)
+        done.append((lo[monotone], hi[monotone], f_lo[monotone], f_hi[monotone]))
+        undecided.append((lo[noise], hi[noise], f_lo[noise], f_hi[noise]))
+        split = ~(no_root | monotone | noise)
+        if not split.any() or split.sum() > _IRR_MAX_CELLS:
+            break
+        lo, hi = lo[split], hi[split]
+        at_lo, at_hi = (tuple(v[split] for v in at) for at in (at_lo, at_hi))
+        mid = 0.5 * (lo + hi)
+        at_mid = evaluate(mid)
+        lo, hi = np.concatenate((lo, mid)), np.concatenate((mid, hi))
+        at_lo = tuple(np.concatenate(pair) for pair in zip(at_lo, at_mid))
+        at_hi = tuple(np.concatenate(pair) for pair in zip(at_mid, at_hi))
+        split = np.ones(lo.shape, dtype=bool)
+    undecided.append((lo[split], hi[split], at_lo[0][split], at_hi[0][split]))
+    return tuple(tuple(np.concatenate(parts) for parts in zip(*cells)) for cells in (done, undecided))
+
+
+def _cell_roots(equation, lo, hi, f_lo, f_hi, tol):
+    """Raízes (x, iterações, convergência, por ordem de x) nos intervalos: extremos com f = 0 e mudanças de sinal."""
+    exact = np.unique(np.concatenate((lo[f_lo == 0], hi[f_hi == 0])))
+    changes = np.flatnonzero(f_lo * f_hi < 0)
+    x, converged, iterations = safeguarded_newton(
+        equation, lo[changes], hi[changes], f_lo[changes], f_hi[changes], np.arange(changes.size), tol=tol)
+    x = np.concatenate((x, exact))
+    order = np.argsort(x)
+    iterations = np.concatenate((iterations, np.zeros(exact.size, dtype=int)))
+    converged = np.concatenate((converged, np.ones(exact.size, dtype=bool)))
+    return x[order], iterations[order], converged[order]
+
+
+def _undecided_roots(lo, hi, f_lo, f_hi):
+    """Uma raiz por grupo contíguo de intervalos por decidir: o extremo com menor |f|."""
+    order = np.argsort(lo)
+    lo, hi, f_lo, f_hi = lo[order], hi[order], f_lo[order], f_hi[order]
+    group = np.cumsum(np.concatenate(([True], lo[1:] > hi[:-1]))[:lo.size]) - 1
+    points = np.concatenate((lo, hi))
+    residual = np.abs(np.concatenate((f_lo, f_hi)))
+    group = np.concatenate((group, group))
+    # Por grupo, o ponto de menor resíduo: ordenar por (grupo, resíduo) e ficar com o primeiro
+    best = np.lexsort((residual, group))
+    first = np.concatenate(([True], group[best][1:] != group[best][:-1]))[:best.size]
+    return points[best][first]
+
+
+def irr_grouped(amounts, freqs, tol=1e-12, grid_points=None):
+    """Todas as IRR reais (taxas > -100%) de fluxos agrupados (montante, frequência).
+
+    Sem expandir os fluxos: o NPV e a sua derivada são calculados em O(grupos)
+    por ponto. O número de mudanças de sinal limita o número de raízes
+    (regra de Descartes) e o limite de Cauchy dos coeficientes limita o
+    intervalo de taxas onde podem estar. Esse intervalo é percorrido numa
+    grelha cujos intervalos são partidos até se provar, com limites de
+    |NPV'| e |NPV''| calculados dos |montantes|, que cada um tem no máximo
+    uma raiz (ver `_certified_cells`); cada mudança de sinal é refinada com
+    Newton protegido. Duas raízes no mesmo intervalo da grelha não se perdem.
+    Onde o NPV não se distingue de zero (raiz dupla ou quase) fica uma só raiz
+    e `complete` passa a False.
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    freqs = np.asarray(freqs, dtype=float)
+    starts = np.concatenate(([0.0], np.cumsum(freqs)[:-1]))
+    nonzero = amounts != 0
+    amounts, freqs, starts = amounts[nonzero], freqs[nonzero], starts[nonzero]
+    signs = np.sign(amounts)
+    sign_changes = int(np.count_nonzero(signs[1:] != signs[:-1]))
+    empty = np.array([])
+    if sign_changes == 0:
+        return IRRResult(float('nan'), empty, np.array([], dtype=int), np.array([], dtype=bool), 0)
+    # Os períodos iniciais a zero só multiplicam o polinómio por v^t0
+    starts = starts - starts[0]
+    last = starts[-1] + freqs[-1] - 1
+    magnitudes = np.abs(amounts)
+
+    # Limite de Cauchy para as raízes v = 1/(1+i) > 0, convertido para x = log(1+i)
+    largest = magnitudes.max()
+    x_low = -np.log1p(largest / abs(amounts[-1]))
+    x_high = np.log1p(largest / abs(amounts[0]))
+    if grid_points is None:
+        grid_points = 64 if sign_changes == 1 else min(256 * sign_changes, 8192)
+    grid = _scan_grid(x_low, x_high, grid_points)
+
+    def equation(x, index):
+        return _scaled_npv(x, amounts, starts, freqs)
+
+    columns = np.stack((amounts, magnitudes), axis=1)
+
+    def evaluate(x):
+        value, derivative = _scaled_npv(x, columns, starts, freqs)
+        return value[:, 0], derivative[:, 0], value[:, 1], np.abs(derivative[:, 1])
+
+    with np.errstate(all='ignore'):
+        # Com expoentes k <= last: |NPV''| <= last · (limite de |NPV'|)
+        done, open_cells = _certified_cells(evaluate, max(last, 1.0), grid)
+        x, iterations, converged = _cell_roots(equation, *done, tol)
+    # Cada grupo contíguo de intervalos por decidir conta como uma raiz (múltipla ou quase)
+    clusters = _undecided_roots(*open_cells)
+    x = np.concatenate((x, clusters))
+    iterations = np.concatenate((iterations, np.zeros(clusters.size, dtype=int)))
+    converged = np.concatenate((converged, np.ones(clusters.size, dtype=bool)))
+    order = np.argsort(x)
+    roots = np.expm1(x[order])
+    primary = float(roots[np.argmin(np.abs(roots))]) if roots.size else float('nan')
+    complete = open_cells[0].size == 0
+    return IRRResult(primary, roots, iterations[order], converged[order], sign_changes, complete)
+
+
+# --- Perfil do NPV e taxa de cruzamento ---
+
+def cash_flow_hash(amounts, freqs):
+    """Hash do conteúdo dos fluxos agrupados, usado como chave de cache."""
+    digest = hashlib.sha1(np.ascontiguousarray(amounts, dtype=float).tobytes())
+    digest.update(np.ascontiguousarray(freqs, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+def npv_profile(amounts, freqs, rates_percent):
+    """NPV dos fluxos agrupados para um vetor de taxas (em %), de uma só vez.
+
+    Regra de Horner sobre os grupos, do último para o primeiro, vetorizada
+    entre taxas: `acc = C * (1 - v^F) / (1 - v) + v^F * acc`. Custa
+    O(grupos x taxas) em tempo e O(taxas) em memória.
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    freqs = np.asarray(freqs, dtype=float)
+    log_growth = np.log1p(np.asarray(rates_percent, dtype=float) / 100.0)
+    with np.errstate(all='ignore'):
+        ratio_den = np.expm1(-log_growth)
+        zero = log_growth == 0
+        total = np.zeros(log_growth.shape)
+        for amount, freq in zip(amounts[::-1], freqs[::-1]):
+            run = np.where(zero, freq, np.expm1(-freq * log_growth) / np.where(zero, 1.0, ratio_den))
+            total = amount * run + np.exp(-freq * log_growth) * total
+    return total
+
+
+def difference_flows(amounts_a, freqs_a, amounts_b, freqs_b):
+    """Fluxos agrupados de A - B (os grupos são partidos onde qualquer um dos dois muda)."""
+    ends_a = np.cumsum(freqs_a)
+    ends_b = np.cumsum(freqs_b)
+    ends = np.union1d(ends_a, ends_b)
+    # Montante de cada projeto em cada segmento (zero depois do seu último período)
+    index_a = np.searchsorted(ends_a, ends, side='left')
+    index_b = np.searchsorted(ends_b, ends, side='left')
+    values_a = np.where(index_a < len(amounts_a), np.asarray(amounts_a, dtype=float)[np.minimum(index_a, len(amounts_a) - 1)], 0.0)
+    values_b = np.where(index_b < len(amounts_b), np.asarray(amounts_b, dtype=float)[np.minimum(index_b, len(amounts_b) - 1)], 0.0)
+    return values_a - values_b, np.diff(np.concatenate(([0], ends))).astype(np.int64)
+
+
+def crossover_rates(amounts_a, freqs_a, amounts_b, freqs_b):
+    """Taxas (decimal) em que os NPV de A e B são iguais: as IRR dos fluxos A - B.
+
+    Devolve um `IRRResult`; `roots` vazio significa que os perfis não se cruzam.
+    """
+    return irr_grouped(*difference_flows(amounts_a, freqs_a, amounts_b, freqs_b))
+
+
+# --- MIRR, payback e índice de rendibilidade numa só passagem ---
+
+class CashFlowMetrics(NamedTuple):
+    """Métricas de `cash_flow_metrics` (escalares) ou de `metrics_batch` (um valor por projeto).
+
+    `mirr` é decimal; os paybacks estão em períodos (fracionários, NaN se os
+    fluxos acumulados nunca ficarem não negativos); `profitability_index` é
+    PV das entradas / |PV das saídas|.
+    """
+    npv: float
+    mirr: float
+    payback: float
+    discounted_payback: float
+    profitability_index: float
+
+
+def _run_present_values(amounts, starts, freqs, log_growth):
+    """PV de cada grupo (montante x soma de v^k nos seus períodos), com log(1 + i) = `log_growth`."""
+    if log_growth == 0:
+        return amounts * freqs
+    return amounts * np.exp(-starts * log_growth) * np.expm1(-freqs * log_growth) / np.expm1(-log_growth)
+
+
+def _payback(run_values, amounts, starts, freqs, log_growth):
+    """Primeiro instante em que o acumulado (descontado a `log_growth`) fica >= 0.
+
+    Dentro do grupo em que o acumulado passa a não negativo, o número de
+    períodos necessários resolve-se em forma fechada (série geométrica) e o
+    último período é interpolado linearmente, como no cálculo período a período.
+    """
+    after = np.cumsum(run_values)
+    crossing = np.flatnonzero(after >= 0)
+    if crossing.size == 0:
+        return float('nan')
+    j = crossing[0]
+    if j == 0:
+        return 0.0
+    before, amount, start, freq = after[j - 1], amounts[j], starts[j], freqs[j]
+    # Períodos do grupo até o acumulado atingir zero (contínuo); P + C*v^s*(1 - v^m)/(1 - v) = 0
+    if log_growth == 0:
+        needed = -before / amount
+    else:
+        share = -before * -np.expm1(-log_growth) / (amount * np.exp(-start * log_growth))
+        needed = -np.log1p(-share) / log_growth if share < 1 else float(freq)
+    whole = int(np.clip(np.ceil(needed - 1e-9), 1, freq))
+    value_before = before + _run_present_values(amount, start, whole - 1.0, log_growth) if whole > 1 else before
+    period = start + whole - 1
+    period_value = amount * np.exp(-period * log_growth)
+    return float(period - 1 + np.clip(-value_before / period_value, 0.0, 1.0))
+
+
+def cash_flow_metrics(amounts, freqs, rate_percent, finance_rate_percent=None, reinvest_rate_percent=None):
+    """NPV, MIRR, payback simples e descontado e índice de rendibilidade de uma só vez.
+
+    Trabalha sobre os grupos (Cnn, Fnn): o PV de cada grupo é calculado uma
+    vez por taxa e os acumulados saem de uma soma cumulativa sobre os grupos.
+    A MIRR usa a taxa de financiamento para as saídas (PV em t = 0) e a de
+    reinvestimento para as entradas (FV no último período), como a MIRR das
+    folhas de cálculo; ambas são, por defeito, a taxa de desconto.
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    freqs = np.asarray(freqs, dtype=float)
+    starts = np.concatenate(([0.0], np.cumsum(freqs)[:-1]))
+    finance = rate_percent if finance_rate_percent is None else finance_rate_percent
+    reinvest = rate_percent if reinvest_rate_percent is None else reinvest_rate_percent
+    log_growth = np.log1p(rate_percent / 100.0)
+
+    with np.errstate(all='ignore'):
+        discounted = _run_present_values(amounts, starts, freqs, log_growth)
+        positive, negative = amounts > 0, amounts < 0
+        inflows = discounted[positive].sum()
+        outflows = -discounted[negative].sum()
+        profitability_index = inflows / outflows if outflows > 0 else float('nan')
+
+        # MIRR = (1 + ri) * (PV_ri(entradas) / |PV_f(saídas)|)^(1/n) - 1, sem calcular (1 + ri)^n
+        periods = starts[-1] + freqs[-1] - 1
+        log_reinvest = np.log1p(reinvest / 100.0)
+        pv_in = inflows if reinvest == rate_percent else _run_present_values(amounts, starts, freqs, log_reinvest)[positive].sum()
+        pv_out = outflows if finance == rate_percent else -_run_present_values(amounts, starts, freqs, np.log1p(finance / 100.0))[negative].sum()
+        if periods > 0 and pv_in > 0 and pv_out > 0:
+            mirr = float(np.expm1(log_reinvest + np.log(pv_in / pv_out) / periods))
+        else:
+            mirr = float('nan')
+
+        payback = _payback(amounts * freqs, amounts, starts, freqs, 0.0)
+        discounted_payback = _payback(discounted, amounts, starts, freqs, log_growth)
+    return CashFlowMetrics(float(discounted.sum()), mirr, payback, discounted_payback, float(profitability_index))
@@ -0,0 +1,114 @@
+"""XNPV e XIRR: fluxos de caixa com datas irregulares.
+
+Cada fluxo é descontado pela fração de ano desde a primeira data,
+t = dias / 365 (ACT), dias 30/360 / 360 (360) ou a fração de ano de uma das
+convenções de `DAY_COUNT_CONVENTIONS`, as mesmas do separador de datas. As
+frações de ano de todas as datas são calculadas numa só operação sobre
+arrays `datetime64`.
+
+A XIRR resolve XNPV = 0 em x = log(1 + r). Em cada iteração os fatores de
+desconto exp(-t·x) são calculados uma única vez e dão o valor e a derivada
+(dois produtos internos). Quando exp(-t·x) poderia transbordar (x muito
+negativo) a equação é multiplicada por exp(T·x), com T a última fração de
+ano: as raízes e os sinais mantêm-se.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from .daycount import year_fractions
+from .solvers import bracket_roots, newton, safeguarded_newton
+
+DATED_FLOW_COLUMNS = ('Data', 'Fluxo')
+
+# Grelha em x = log(1 + r) usada quando Newton não converge (de -99,3% a ~14 700%), inclui x = 0
+_XIRR_GRID = np.linspace(-5.0, 5.0, 201)
+# Abaixo de exp(700) não há transbordo em float64
+_EXP_LIMIT = 700.0
+
+
+def _sorted_flows(amounts, dates, method):
+    """Montantes e frações de ano ordenados por data; levanta ValueError se os dados forem inválidos."""
+    amounts = np.asarray(amounts, dtype=float).ravel()
+    try:
+        dates = np.asarray(dates, dtype='datetime64[D]').ravel()
+    except ValueError:
+        raise ValueError("Datas inválidas nos fluxos de caixa.")
+    if len(amounts) != len(dates):
+        raise ValueError("O número de fluxos e de datas tem de ser igual.")
+    if len(amounts) == 0:
+        raise ValueError("É necessário pelo menos um fluxo de caixa com data.")
+    if np.isnat(dates).any() or not np.isfinite(amounts).all():
+        raise ValueError("Existem fluxos ou datas em falta.")
+    order = np.argsort(dates, kind='stable')
+    dates = dates[order]
+    return amounts[order], year_fractions(dates, method), dates[0]
+
+
+def xnpv(rate_percent, amounts, dates, method="ACT"):
+    """NPV de fluxos com datas: soma de C_i / (1 + r)^t_i, com t_i em anos desde a primeira data."""
+    amounts, times, _ = _sorted_flows(amounts, dates, method)
+    return float(np.dot(amounts, np.exp(-times * np.log1p(rate_percent / 100.0))))
+
+
+class XIRRResult(NamedTuple):
+    """Resultado de `xirr`: taxa anual efetiva (fração), iterações e se convergiu."""
+    rate: float
+    iterations: int
+    converged: bool
+    sign_changes: int
+
+
+def xirr(amounts, dates, method="ACT", guess=0.1, tol=1e-12):
+    """Taxa anual r que anula o XNPV.
+
+    Começa por Newton a partir de `guess` (10%, como nas folhas de cálculo);
+    se não convergir, procura numa grelha a mudança de sinal mais próxima de
+    `guess` e refina-a com Newton protegido. Com várias raízes é devolvida a
+    mais próxima de `guess`. Sem mudança de sinal nos fluxos, rate = NaN.
+    """
+    amounts, times, _ = _sorted_flows(amounts, dates, method)
+    nonzero = amounts[amounts != 0]
+    sign_changes = int(np.count_nonzero(np.sign(nonzero[1:]) != np.sign(nonzero[:-1])))
+    if sign_changes == 0:
+        return XIRRResult(float('nan'), 0, False, 0)
+
+    weighted = amounts * times
+    horizon = times[-1]
+
+    def equation(x, index):
+        # Um único cálculo dos fatores de desconto por ponto dá o valor e a derivada
+        shift = np.where(x * horizon < -_EXP_LIMIT, horizon, 0.0)[:, None]
+        factors = np.exp(-(times - shift) * x[:, None])
+        value = factors @ amounts
+        derivative = shift[:, 0] * value - factors @ weighted
+        return value, derivative
+
+    index = np.zeros(1, dtype=np.int64)
+    start = np.log1p(guess)
+    with np.errstate(all='ignore'):
+        x, converged, iterations = newton(equation, np.array([start]), tol=tol, maxiter=50)
+        total = int(iterations[0])
+        if not (converged[0] and np.isfinite(x[0])):
+            lo, hi, f_lo, f_hi, found = bracket_roots(equation, _XIRR_GRID, index, np.array([start]))
+            total += len(_XIRR_GRID)
+            if not found[0]:
+                return XIRRResult(float('nan'), total, False, sign_changes)
+            x, converged, iterations = safeguarded_newton(equation, lo, hi, f_lo, f_hi, index, tol=tol)
+            total += int(iterations[0])
+    return XIRRResult(float(np.expm1(x[0])), total, bool(converged[0]), sign_changes)
+
+
+def read_dated_flows(source, file_name=None):
+    """Lê fluxos com datas de um ficheiro CSV ou Parquet com as colunas 'Data' e 'Fluxo'."""
+    import pandas as pd
+    name = file_name or str(getattr(source, 'name', source))
+    table = pd.read_parquet(source) if name.lower().endswith('.parquet') else pd.read_csv(source)
+    missing = [column for column in DATED_FLOW_COLUMNS if column not in table]
+    if missing:
+        raise ValueError(f"Colunas em falta no ficheiro: {', '.join(missing)}")
+    table = table[list(DATED_FLOW_COLUMNS)].copy()
+    table['Data'] = pd.to_datetime(table['Data'], errors='coerce').dt.date
+    table['Fluxo'] = pd.to_numeric(table['Fluxo'], errors='coerce')
+    return table.dropna().reset_index(drop=True)
+
@@ -0,0 +1,232 @@
+"""Contagem de dias e frações de ano entre datas.
+
+Os métodos ACT e 360 da calculadora (como no guia) e as convenções de mercado
+de `DAY_COUNT_CONVENTIONS`: ACT/ACT ISDA e ICMA, ACT/360, ACT/365F,
+30/360 US, 30E/360 e 30E/360 ISDA. Todas as funções trabalham sobre arrays
+`datetime64` inteiros (ou datas isoladas): os campos de calendário de cada
+data (dia, fim de mês, dias 30/360 até ao início do mês, anos ACT/ACT ISDA)
+são lidos de uma tabela com uma entrada por dia do
+intervalo abrangido pelas datas, em vez de convertidos data a data, e as
+regras de cada convenção são operações sobre esses arrays. A aba de datas,
+as obrigações e o XNPV/XIRR usam todos este módulo.
+"""
+import calendar
+from typing import NamedTuple
+
+import numpy as np
+
+DAY_COUNT_CONVENTIONS = ('ACT/ACT ISDA', 'ACT/ACT ICMA', 'ACT/360', 'ACT/365F', '30/360 US', '30E/360', '30E/360 ISDA')
+DAY_COUNT_METHODS = ('ACT', '360')
+DAYS_PER_YEAR = {"ACT": 365.0, "360": 360.0}
+_COUPON_FREQUENCIES = (1, 2, 3, 4, 6, 12)
+
+
+def days_in_month(year, month):
+    """Número de dias do mês (considera anos bissextos)."""
+    return calendar.monthrange(year, month)[1]
+
+
+class DayTable(NamedTuple):
+    """Campos de calendário de cada dia do intervalo `first_day`.. (dias desde 1970-01-01)."""
+    first_day: int
+    serial_360: np.ndarray
+    day: np.ndarray
+    month_end: np.ndarray
+    february_end: np.ndarray
+    isda_years: np.ndarray
+    month_index: np.ndarray
+
+    def field(self, name, days):
+        """Valor do campo `name` para cada data (`days` em dias desde 1970-01-01), por consulta à tabela."""
+        return np.take(getattr(self, name), days - self.first_day if self.first_day else days)
+
+
+def _as_days(dates):
+    return np.asarray(dates, dtype='datetime64[D]')
+
+
+def _day_numbers(*arrays):
+    """Dias desde 1970-01-01 (int64, sem cópia) de cada array de datas."""
+    return [_as_days(dates).view(np.int64) for dates in arrays]
+
+
+def _day_table(*days):
+    """Tabela com uma entrada por dia, de 1970 (ou da primeira data, se anterior) à última data."""
+    present = [values for values in days if values.size]
+    lo = min(0, *(int(values.min()) for values in present))
+    hi = max(0, *(int(values.max()) for values in present))
+    if lo == np.iinfo(np.int64).min: # NaT
+        raise ValueError("Existem datas em falta.")
+    # Mais um dia no fim para saber se o último dia é fim de mês
+    calendar_days = np.arange(lo, hi + 2).astype('datetime64[D]')
+    months = calendar_days.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]')
+    year = (years.astype(np.int32) + 1970)[:-1]
+    month = (months - years).astype(np.int32)[:-1] + 1
+    day = (calendar_days - months).astype(np.int8)[:-1] + 1
+    month_end = months[1:] != months[:-1]
+    # Anos desde 1970 pela regra ACT/ACT ISDA: ano + dia do ano / dias do ano (365 ou 366)
+    day_of_year = (calendar_days - years).astype(np.int64)[:-1]
+    isda_years = (year - 1970) + day_of_year / np.where(_is_leap(year), 366.0, 365.0)
+    return DayTable(
+        lo, year * 360 + month * 30, day, month_end, month_end & (month == 2),
+        isda_years, months.astype(np.int32)[:-1],
+    )
+
+
+def _is_leap(year):
+    return (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+
+
+def _thirty_360_us(table, days1, days2, eom=True):
+    """30/360 US (SIA): com `eom`, as regras de fim de fevereiro; depois D2 = 31 com D1 >= 30 e D1 = 31 passam a 30."""
+    d1, d2 = table.field('day', days1), table.field('day', days2)
+    if eom:
+        feb_end1 = table.field('february_end', days1)
+        d2 = np.where(feb_end1 & table.field('february_end', days2), 30, d2)
+        d1 = np.where(feb_end1, 30, d1)
+    d2 = np.where((d2 == 31) & (d1 >= 30), 30, d2)
+    d1 = np.where(d1 == 31, 30, d1)
+    return (table.field('serial_360', days2) - table.field('serial_360', days1) + (d2 - d1)).astype(np.int64)
+
+
+def _coupon_position(days, anchor, step):
+    """Posição de cada data (fracionária) em períodos de cupão de `step` meses a contar da data âncora.
+
+    O início do período k é a âncora deslocada k x `step` meses, com o dia
+    limitado ao fim do mês. Os inícios possíveis vêm de uma tabela mês x dia
+    da âncora (1 a 31), por isso cada período custa uma consulta.
+    """
+    if anchor.ndim == 0 and days.size > 1:
+        # Com uma só âncora a posição depende só do dia: calcula-se uma vez por dia do intervalo
+        lo, hi = int(days.min()), int(days.max())
+        return np.take(_coupon_position(np.arange(lo, hi + 1), anchor.reshape(1), step), days - lo)
+    table = _day_table(days, anchor)
+    month, anchor_month = table.field('month_index', days), table.field('month_index', anchor)
+    lo = int(min(month.min(initial=0), anchor_month.min(initial=0))) - 2 * step
+    hi = int(max(month.max(initial=0), anchor_month.max(initial=0))) + 2 * step
+    month_start = np.arange(lo, hi + 2).astype('datetime64[M]').astype('datetime64[D]').view(np.int64)
+    month_length = np.diff(month_start)
+    starts = (month_start[:-1, None] + np.minimum(np.arange(1, 32), month_length[:, None]) - 1).ravel()
+    # Posição na tabela do início do período 0; o período k está k x `step` meses depois
+    anchor_day = table.field('day', anchor)
+    key = (anchor_month - lo) * 31 + (anchor_day - 1)
+    # Um período que começa no mês da data começa depois dela se o dia da data for menor que o da âncora
+    period = (month - anchor_month - (table.field('day', days) < anchor_day)) // step
+    start = np.take(starts, key + period * (step * 31))
+    following = np.take(starts, key + (period + 1) * (step * 31))
+    return period + (days - start) / (following - start)
+
+
+def day_count(date1, date2, convention='ACT/365F', maturity=None):
+    """Dias entre `date1` e `date2` segundo a convenção (negativo se date1 > date2).
+
+    Nas convenções ACT são os dias reais; nas 30/360, os dias 30/360 com as
+    regras da convenção. `maturity` (data de vencimento) só é usada no
+    30E/360 ISDA, onde D2 no fim de fevereiro não passa a 30 se for o vencimento.
+    """
+    if convention not in DAY_COUNT_CONVENTIONS:
+        raise ValueError(f"Convenção de contagem de dias desconhecida: {convention}")
+    days1, days2 = _day_numbers(date1, date2)
+    if convention.startswith('ACT'):
+        return days2 - days1
+    table = _day_table(days1, days2)
+    if convention == '30/360 US':
+        return _thirty_360_us(table, days1, days2)
+    d1, d2 = table.field('day', days1), table.field('day', days2)
+    if convention == '30E/360':
+        d1, d2 = np.minimum(d1, 30), np.minimum(d2, 30)
+    else: # 30E/360 ISDA
+        d1 = np.where(table.field('month_end', days1), 30, d1)
+        month_end2 = table.field('month_end', days2)
+        if maturity is not None:
+            month_end2 &= ~(table.field('february_end', days2) & (days2 == _day_numbers(maturity)[0]))
+        d2 = np.where(month_end2, 30, d2)
+    return (table.field('serial_360', days2) - table.field('serial_360', days1) + (d2 - d1)).astype(np.int64)
+
+
+def year_fraction(date1, date2, convention='ACT/365F', maturity=None, frequency=1, ref_date=None):
+    """Fração de ano entre `date1` e `date2` segundo a convenção, para arrays de datas.
+
+    * ACT/ACT ISDA: dias em anos bissextos / 366 + dias nos outros / 365;
+    * ACT/ACT ICMA: soma, por período de cupão (`frequency` por ano, a contar
+      de `ref_date`, por defeito `date1`), de dias / (frequência x dias do período);
+    * ACT/360 e ACT/365F: dias reais / 360 ou / 365;
+    * 30/360 US, 30E/360 e 30E/360 ISDA: dias 30/360 / 360.
+    """
+    if convention == 'ACT/ACT ISDA':
+        days1, days2 = _day_numbers(date1, date2)
+        table = _day_table(days1, days2)
+        return table.field('isda_years', days2) - table.field('isda_years', days1)
+    if convention == 'ACT/ACT ICMA':
+        if frequency not in _COUPON_FREQUENCIES:
+            raise ValueError(f"Frequência de cupão inválida para ACT/ACT ICMA: {frequency}")
+        days1, days2, anchor = _day_numbers(date1, date2, date1 if ref_date is None else ref_date)
+        step = 12 // frequency
+        position = _coupon_position(days2, anchor, step)
+        if ref_date is not None:
+            # Sem data de referência a âncora é date1, na posição 0
+            position = position - _coupon_position(days1, anchor, step)
+        return position / frequency
+    days = day_count(date1, date2, convention, maturity)
+    return days / (365.0 if convention == 'ACT/365F' else 360.0)
+
+
+def day_count_table(date1, date2, frequency=1, maturity=None):
+    """Dias e fração de ano entre duas datas em todas as convenções (DataFrame, uma linha por convenção).
+
+    No ACT/ACT ICMA os períodos de cupão (`frequency` por ano) contam-se a partir de `date1`.
+    """
+    import pandas as pd
+    conventions = list(DAY_COUNT_CONVENTIONS)
+    return pd.DataFrame({
+        'Convenção': conventions,
+        'Dias': [int(day_count(date1, date2, convention, maturity)) for convention in conventions],
+        'Fração de Ano': [float(year_fraction(date1, date2, convention, maturity, frequency)) for convention in conventions],
+    })
+
+
+# --- Métodos ACT e 360 da calculadora ---
+
+def days_360_array(date1, date2, feb_end=False):
+    """Dias 30/360 (regras US, como no guia) para arrays de datas; `feb_end` aplica também as regras de fim de fevereiro."""
+    days1, days2 = _day_numbers(date1, date2)
+    return _thirty_360_us(_day_table(days1, days2), days1, days2, eom=feb_end)
+
+
+def days_between_array(date1, date2, method, feb_end=False):
+    """Dias entre datas (arrays) usando o método ACT (dias reais) ou 360 (ver `days_360_array`)."""
+    if method == "ACT":
+        days1, days2 = _day_numbers(date1, date2)
+        return days2 - days1
+    elif method == "360":
+        return days_360_array(date1, date2, feb_end)
+    else:
+        raise ValueError("Método de contagem de dias inválido")
+
+
+def days_360(date1, date2, feb_end=False):
+    """Dias entre duas datas usando 30/360 (regras US, conforme guia).
+
+    Com `feb_end=True` aplica também a regra do fim de Fevereiro usada na
+    análise de obrigações. Pode devolver um valor negativo se date1 > date2.
+    """
+    return int(days_360_array(date1, date2, feb_end))
+
+
+def days_between(date1, date2, method, feb_end=False):
+    """Dias entre duas datas usando o método ACT ou 360."""
+    return int(days_between_array(date1, date2, method, feb_end))
+
+
+def year_fractions(dates, method="ACT", start=None):
+    """Anos desde `start` (por defeito a primeira data) para cada data.
+
+    `method` é ACT (dias / 365), 360 (dias 30/360 / 360) ou uma das
+    convenções de `DAY_COUNT_CONVENTIONS`.
+    """
+    dates = _as_days(dates)
+    start = dates[0] if start is None else np.datetime64(start, 'D')
+    if method in DAY_COUNT_CONVENTIONS:
+        return year_fraction(start, dates, method)
+    return days_between_array(start, dates, method) / DAYS_PER_YEAR[method]
@@ -0,0 +1,218 @@
+"""Depreciação de ativos: métodos SL, SYD, DB, DBX e MACRS com mês inicial M01.
+
+`depreciation_schedule` calcula de uma só vez a tabela de todos os anos
+com arrays NumPy: SL e SYD têm a depreciação anual em forma fechada e a
+acumulada é min(soma acumulada, CST - SAL); no DB o valor contabilístico é
+CST vezes o produto acumulado de (1 - taxa do ano), limitado ao valor
+residual. DBX (saldo decrescente com passagem a linha reta) e MACRS usam as
+tabelas de `depreciation_tables`. `get_depreciation_schedule` guarda as tabelas numa cache
+LRU (`depreciation_cache`), por isso pedir qualquer ano ou avançar para o
+ano seguinte é só uma consulta ao array.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from .cache import LRUCache
+from .depreciation_tables import DEPRECIATION_TABLES, declining_to_straight_line, table_convention
+
+DEPRECIATION_METHODS = ('SL', 'SYD', 'DB', 'DBX', 'MACRS', 'MACRS-MQ')
+# Métodos de tabela: a percentagem aplica-se ao custo, sem valor residual (LIF é a classe MACRS)
+TABLE_METHODS = ('MACRS', 'MACRS-MQ')
+DEPRECIATION_COLUMNS = ('Ano', 'Depreciação (DEP)', 'Valor Contabilístico (RBV)', 'Valor Depreciável (RDV)', 'Dep. Acumulada')
+
+
+def _syd_dep_full(k, base, total, life_int):
+    """Depreciação SYD de um ano completo k (sem ajuste de M01)."""
+    if k < 1 or k > life_int or total == 0: return 0
+    return base * (life_int - k + 1) / total
+
+
+def calculate_single_year(year_num, method, life, m01_frac, cost, salvage, db_rate, current_accum_dep):
+    """Depreciação do ano `year_num` dada a depreciação acumulada até ao ano anterior.
+
+    Devolve um dicionário com DEP, RBV, RDV e AccDep (depreciação acumulada).
+    """
+    depreciable_base = cost - salvage
+    if depreciable_base <= 0: return {'DEP': 0.0, 'RBV': salvage, 'RDV': 0.0, 'AccDep': cost - salvage}
+
+    first_year_factor = (13.0 - m01_frac) / 12.0
+    if m01_frac == int(m01_frac): first_year_factor = (12.0 - int(m01_frac) + 1) / 12.0
+    last_year_factor = 1.0 - first_year_factor # Simplificação
+
+    dep_year = 0.0
+    rbv_start = cost - current_accum_dep
+    if rbv_start <= salvage: return {'DEP': 0.0, 'RBV': salvage, 'RDV': 0.0, 'AccDep': cost - salvage}
+
+    if method == "SL":
+        annual_dep_full = depreciable_base / life if life > 0 else 0
+        if year_num == 1: dep_year = annual_dep_full * first_year_factor
+        elif year_num == int(life) + 1 and last_year_factor > 0 : dep_year = annual_dep_full * last_year_factor
+        elif year_num <= life: dep_year = annual_dep_full
+        else: dep_year = 0.0
+    elif method == "SYD":
+        syd_total = life * (life + 1) / 2.0
+        if syd_total == 0: return {'DEP': 0.0, 'RBV': rbv_start, 'RDV': max(0.0, rbv_start - salvage), 'AccDep': current_accum_dep}
+        # Abordagem simplificada para M01 - pode não ser perfeita
+        dep_full_prev = _syd_dep_full(year_num - 1, depreciable_base, syd_total, int(life))
+        dep_full_curr = _syd_dep_full(year_num, depreciable_base, syd_total, int(life))
+
+        year_start_fraction = (m01_frac - 1.0) / 12.0 if m01_frac > 1 else 0
+        year_end_fraction = 1.0 - year_start_fraction
+
+        if year_num == 1:
+            dep_year = dep_full_curr * first_year_factor
+        elif year_num <= life :
+            dep_year = (dep_full_prev * year_start_fraction) + (dep_full_curr * year_end_fraction)
+        elif year_num == int(life) + 1 and last_year_factor > 0:
+            dep_year = dep_full_prev * last_year_factor
+        else: dep_year = 0.0
+
+    elif method == "DB":
+        db_rate_eff = db_rate / life if life > 0 else 0
+        dep_provisional = rbv_start * db_rate_eff
+        if year_num == 1: dep_year = dep_provisional * first_year_factor
+        elif year_num <= life: dep_year = dep_provisional
+        else: dep_year = 0.0
+
+    # Ajuste final para não depreciar abaixo do valor residual
+    if rbv_start - dep_year < salvage:
+        dep_year = max(0.0, rbv_start - salvage)
+
+    new_accum_dep = current_accum_dep + dep_year
+    new_rbv = cost - new_accum_dep
+    new_rdv = max(0.0, new_rbv - salvage)
+
+    return {'DEP': dep_year, 'RBV': new_rbv, 'RDV': new_rdv, 'AccDep': new_accum_dep}
+
+
+def calculate_depreciation_for_year(year, method, life, m01_frac, cost, salvage, db_rate):
+    """Resultado do ano YR lido da tabela completa em cache (ver `get_depreciation_schedule`)."""
+    return get_depreciation_schedule(method, life, m01_frac, cost, salvage, db_rate).year_result(year)
+
+
+class DepreciationSchedule(NamedTuple):
+    """Tabela de depreciação de todos os anos (arrays indexados por ano - 1)."""
+    year: np.ndarray
+    dep: np.ndarray
+    rbv: np.ndarray
+    rdv: np.ndarray
+    accumulated: np.ndarray
+    cost: float
+    salvage: float
+
+    def year_result(self, year):
+        """DEP, RBV, RDV e AccDep do ano `year`; após o último ano a depreciação é zero."""
+        if year < 1:
+            return {}
+        if year > len(self.year):
+            accumulated = float(self.accumulated[-1]) if len(self.year) else 0.0
+            rbv = self.cost - accumulated
+            return {'DEP': 0.0, 'RBV': rbv, 'RDV': max(0.0, rbv - self.salvage), 'AccDep': accumulated}
+        index = year - 1
+        return {'DEP': float(self.dep[index]), 'RBV': float(self.rbv[index]),
+                'RDV': float(self.rdv[index]), 'AccDep': float(self.accumulated[index])}
+
+    def to_frame(self):
+        """Tabela com uma linha por ano (colunas de `DEPRECIATION_COLUMNS`)."""
+        import pandas as pd
+        return pd.DataFrame(dict(zip(DEPRECIATION_COLUMNS, (self.year, self.dep, self.rbv, self.rdv, self.accumulated))))
+
+
+def accumulated_depreciation(method, life, m01_frac, cost, salvage, db_rate, horizon):
+    """Depreciação acumulada no fim dos anos 1..`horizon` de um ou muitos ativos do mesmo método.
+
+    Os parâmetros são escalares ou colunas (ativos x 1) que se combinam por
+    broadcasting; o resultado tem os anos na última dimensão. Reproduz
+    `calculate_single_year`: SL e SYD somam a depreciação anual em forma
+    fechada até à base depreciável; no DB o RBV é CST x prod(1 - taxa do
+    ano), sem descer abaixo do valor residual (que, uma vez atingido, se
+    mantém). Com CST <= SAL a acumulada é CST - SAL desde o ano 1. DBX e
+    MACRS são `declining_to_straight_line` e um gather da tabela MACRS
+    multiplicado pelo custo (NaN se LIF não for uma classe MACRS).
+    """
+    if method not in DEPRECIATION_METHODS:
+        raise ValueError(f"Método de depreciação desconhecido: {method}")
+    life, m01_frac, cost, salvage, db_rate = (np.asarray(value, dtype=float) for value in (life, m01_frac, cost, salvage, db_rate))
+    if method in TABLE_METHODS:
+        return cost * DEPRECIATION_TABLES[method].accumulated(life, table_convention(method, m01_frac), horizon)
+    years = np.arange(1, horizon + 1)
+    life_int = np.trunc(life)
+    depreciable_base = cost - salvage
+    # Fração do ano 1 a partir de M01 (13 - M01 meses); o resto passa para o ano int(LIF) + 1
+    first = (13.0 - m01_frac) / 12.0
+    last = 1.0 - first
+    first_year = years == 1
+    final_year = (years == life_int + 1) & (last > 0)
+    within_life = years <= life
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if method == "DBX":
+            ratio = np.where(cost > 0, salvage / np.where(cost > 0, cost, 1.0), 0.0)
+            accumulated = cost * declining_to_straight_line(life, db_rate, first, ratio, horizon)
+        elif method == "DB":
+            rate = np.where(life > 0, db_rate / life, 0.0)
+            year_rate = np.select([first_year, within_life], [rate * first, rate], 0.0)
+            rbv = np.maximum(cost * np.cumprod(np.maximum(1.0 - year_rate, 0.0), axis=-1), salvage)
+            accumulated = cost - rbv
+        else:
+            if method == "SL":
+                full = np.where(life > 0, depreciable_base / life, 0.0)
+                dep = np.select([first_year, final_year, within_life], [full * first, full * last, full], 0.0)
+            else:
+                total = life * (life + 1) / 2.0
+                # Depreciação SYD dos anos completos k = 0..horizon (zero fora de 1..int(LIF))
+                k = np.arange(horizon + 1)
+                full = np.where((k >= 1) & (k <= life_int) & (total != 0),
+                                depreciable_base * (life_int - k + 1) / np.where(total != 0, total, 1.0), 0.0)
+                start_fraction = np.where(m01_frac > 1, (m01_frac - 1.0) / 12.0, 0.0)
+                previous, current = full[..., :-1], full[..., 1:]
+                dep = np.select(
+                    [first_year, within_life, final_year],
+                    [current * first, previous * start_fraction + current * (1.0 - start_fraction), previous * last],
+                    0.0,
+                )
+            accumulated = np.minimum(np.cumsum(dep, axis=-1), depreciable_base)
+    return np.where(depreciable_base > 0, accumulated, depreciable_base)
+
+
+def last_depreciation_year(life, m01_frac):
+    """Último ano com depreciação em qualquer método: int(LIF) + 1, ou o ano em que acaba a vida após um ano 1 parcial."""
+    life = np.asarray(life, dtype=float)
+    first = (13.0 - np.asarray(m01_frac, dtype=float)) / 12.0
+    return np.maximum(np.trunc(life), np.ceil(np.round(life - first, 9))).astype(np.int64) + 1
+
+
+def depreciation_schedule(method, life, m01_frac, cost, salvage, db_rate=0.0):
+    """Depreciação de todos os anos de uma só vez (SL, SYD e DB com os resultados de `calculate_single_year`).
+
+    O ano 1 é reduzido pela fração M01 e, em SL e SYD, o resto passa para o
+    ano int(LIF) + 1. A depreciação nunca leva o RBV abaixo do valor residual,
+    exceto nos métodos MACRS, que depreciam o custo todo.
+    """
+    if method in TABLE_METHODS and DEPRECIATION_TABLES[method].lookup(life) < 0:
+        classes = ', '.join(f"{value:g}" for value in DEPRECIATION_TABLES[method].classes)
+        raise ValueError(f"No método {method} a vida útil (LIF) tem de ser uma classe MACRS: {classes}.")
+    years = np.arange(1, max(int(last_depreciation_year(life, m01_frac)), 1) + 1)
+    accumulated = accumulated_depreciation(method, life, m01_frac, cost, salvage, db_rate, len(years))
+    depreciating = cost > salvage or method in TABLE_METHODS
+    dep = np.diff(accumulated, prepend=0.0) if depreciating else np.zeros(len(years))
+    rbv = cost - accumulated
+    rdv = np.maximum(rbv - salvage, 0.0)
+    return DepreciationSchedule(years, dep, rbv, rdv, accumulated, float(cost), float(salvage))
+
+
+depreciation_cache = LRUCache(max_entries=256, max_bytes=16 * 1024 * 1024)
+
+
+def _build_depreciation_schedule(*key):
+    schedule = depreciation_schedule(*key)
+    for array in schedule[:5]:
+        array.flags.writeable = False # Partilhado entre sessões: só de leitura
+    return schedule
+
+
+def get_depreciation_schedule(method, life, m01_frac, cost, salvage, db_rate=0.0):
+    """Tabela de depreciação lida da cache (chave: método, LIF, M01, CST, SAL, fator DB)."""
+    key = (method, float(life), float(m01_frac), float(cost), float(salvage), float(db_rate))
+    return depreciation_cache.get_or_compute(key, lambda: _build_depreciation_schedule(*key))
@@ -0,0 +1,136 @@
+"""Métodos de depreciação por tabelas de taxas: saldo decrescente com passagem a linha reta e MACRS.
+
+`declining_to_straight_line` dá em forma fechada a fração do custo depreciada
+até ao fim de cada ano pelo saldo decrescente (taxa FATOR/LIF sobre o valor
+contabilístico, ano 1 reduzido pela fração f do mês inicial) com passagem
+para linha reta sobre o valor ainda por depreciar. A linha reta passa a dar
+mais no ano k quando B_k (1 - taxa x R_k) >= SAL, com B_k o valor
+contabilístico e R_k a vida restante no início do ano. Com j = k - 2 a
+condição é a q^j (u0 + taxa j) >= s, crescente em j, e a igualdade
+t e^(λt) = c resolve-se com a função W de Lambert: o ano de passagem sai
+diretamente, sem comparar os métodos ano a ano.
+
+As tabelas MACRS (GDS, convenção de meio-ano e de meio-trimestre; IRS Pub. 946,
+tabelas A-1 a A-5) são geradas uma vez na importação com a mesma fórmula e
+guardadas em `DEPRECIATION_TABLES` como arrays convenção x classe x ano, com
+as frações acumuladas. Aplicá-las a muitos ativos é um gather da linha de
+cada ativo multiplicado pelo custo. As tabelas publicadas estão arredondadas
+a 0,01% (0,001% na classe de 20 anos); aqui as taxas não são arredondadas.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+MACRS_CLASSES = (3, 5, 7, 10, 15, 20)
+# Saldo decrescente de 200% nas classes até 10 anos e de 150% nas de 15 e 20 anos
+MACRS_FACTORS = (2.0, 2.0, 2.0, 2.0, 1.5, 1.5)
+# Fração do primeiro ano: meio-ano e meio-trimestre (ativo colocado em serviço no 1.º a 4.º trimestre)
+MACRS_HALF_YEAR = (0.5,)
+MACRS_MID_QUARTER = (10.5 / 12.0, 7.5 / 12.0, 4.5 / 12.0, 1.5 / 12.0)
+
+
+class RateTable(NamedTuple):
+    """Taxas anuais (fração da base) por convenção x classe x ano, e as respetivas acumuladas."""
+    classes: np.ndarray
+    rates: np.ndarray
+    cumulative: np.ndarray
+
+    def lookup(self, life):
+        """Índice da classe de cada `life` (-1 se não for uma classe da tabela)."""
+        life = np.asarray(life, dtype=float)
+        index = np.clip(np.searchsorted(self.classes, life), 0, len(self.classes) - 1)
+        return np.where(self.classes[index] == life, index, -1)
+
+    def accumulated(self, life, convention, horizon):
+        """Fração acumulada no fim dos anos 1..`horizon` (última dimensão) de cada ativo; NaN com classe inválida.
+
+        `life` e `convention` são escalares ou colunas (ativos x 1).
+        """
+        life, convention = np.broadcast_arrays(np.asarray(life, dtype=float), np.asarray(convention, dtype=np.int64))
+        if life.ndim:
+            life, convention = life[..., 0], convention[..., 0]
+        index = self.lookup(life)
+        rows = self.cumulative[convention, np.maximum(index, 0)]
+        # Depois do último ano da tabela a acumulada fica em 100%
+        width = self.cumulative.shape[-1]
+        columns = np.minimum(np.arange(horizon), width - 1)
+        return np.where((index >= 0)[..., None], rows[..., columns], np.nan)
+
+
+def declining_to_straight_line(life, factor, first_fraction, salvage_ratio, horizon):
+    """Fração do custo acumulada no fim dos anos 1..`horizon`: saldo decrescente com passagem a linha reta.
+
+    Os parâmetros são escalares ou colunas (ativos x 1) que se combinam por
+    broadcasting, com os anos na última dimensão. `salvage_ratio` = SAL / CST;
+    o valor contabilístico nunca desce abaixo dele e fica nele no último ano da vida.
+    """
+    life, factor, first, salvage = np.broadcast_arrays(*(np.asarray(value, dtype=float)
+                                                        for value in (life, factor, first_fraction, salvage_ratio)))
+    years = np.arange(1, horizon + 1)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        rate = factor / life
+        decay = np.maximum(1.0 - rate, 0.0)
+        after_first = 1.0 - rate * first
+        # Último ano com depreciação: a vida acaba a meio dele se o ano 1 foi parcial
+        last_year = np.ceil(np.round(life - first, 9)) + 1
+
+        # Passagem no ano j + 2 com j o menor inteiro em que a q^j (u0 + taxa j) >= s (com s = 0: u0 + taxa j >= 0)
+        u0 = 1.0 - rate * (life - first)
+        offset = np.maximum(-u0 / rate, 0.0)
+        solvable = (decay > 0) & (decay < 1) & (after_first > 0)
+        positive = salvage > 0
+        if np.any(positive):
+            from scipy.special import lambertw
+            slope = np.log(np.where(solvable, decay, 0.5)) / rate
+            argument = slope * salvage / np.where(solvable, after_first, 1.0) * np.exp(slope * u0)
+            solvable &= ~positive | (argument >= -np.exp(-1.0))
+            # t e^(slope t) = c com t = u0 + taxa j: slope t = W0(slope c)
+            t = lambertw(np.where(solvable & positive, argument, 0.0)).real / slope
+            offset = np.where(positive, np.maximum((t - u0) / rate, 0.0), offset)
+        offset = np.ceil(np.round(offset, 9))
+        # Saldo esgotado no ano 2 (taxa >= 100%): só o ano 2 pode passar a linha reta
+        year_two = (after_first - salvage) / (life - first) >= rate * after_first
+        switch = np.select(
+            [1.0 - salvage >= factor, decay <= 0, ~solvable],
+            [1.0, np.where(year_two, 2.0, last_year), last_year],
+            offset + 2,
+        )
+        switch = np.minimum(switch, last_year)
+
+        def book(k):
+            # Valor contabilístico no início do ano k na fase de saldo decrescente (B_1 = 1)
+            return np.maximum(np.where(k <= 1, 1.0, after_first * decay ** np.maximum(k - 2, 0)), salvage)
+
+        book_switch = book(switch)
+        elapsed_switch = np.minimum(np.where(switch <= 1, 0.0, first + switch - 2), life)
+        remaining = life - elapsed_switch
+        elapsed = np.minimum(first + years - 1, life)
+        straight = (1.0 - book_switch) + (book_switch - salvage) * (elapsed - elapsed_switch) / np.where(remaining > 0, remaining, 1.0)
+        return np.where(years < switch, 1.0 - book(years + 1), straight)
+
+
+def _macrs_table(first_fractions):
+    classes = np.array(MACRS_CLASSES, dtype=float)
+    horizon = int(classes.max()) + 1
+    cumulative = declining_to_straight_line(classes[None, :, None], np.array(MACRS_FACTORS)[None, :, None],
+                                            np.array(first_fractions)[:, None, None], 0.0, horizon)
+    cumulative = np.minimum(cumulative, 1.0)
+    rates = np.diff(cumulative, axis=-1, prepend=0.0)
+    for array in (cumulative, rates):
+        array.flags.writeable = False
+    return RateTable(classes, rates, cumulative)
+
+
+# Registo de tabelas, gerado uma vez na importação
+DEPRECIATION_TABLES = {
+    'MACRS': _macrs_table(MACRS_HALF_YEAR),
+    'MACRS-MQ': _macrs_table(MACRS_MID_QUARTER),
+}
+
+
+def table_convention(method, m01_frac):
+    """Índice da convenção: 0 (meio-ano) ou o trimestre de M01 (0 a 3) no meio-trimestre."""
+    m01 = np.asarray(m01_frac, dtype=float)
+    if method == 'MACRS-MQ':
+        return np.clip(np.floor((m01 - 1.0) / 3.0), 0, 3).astype(np.int64)
+    return np.zeros(m01.shape, dtype=np.int64)
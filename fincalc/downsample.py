@@ -0,0 +1,39 @@
+"""Redução de séries longas para gráficos, preservando a forma (LTTB).
+
+Largest-Triangle-Three-Buckets (Steinarsson, 2013): mantém o primeiro e o
+último ponto e, em cada um dos `threshold - 2` grupos intermédios, escolhe o
+ponto que forma o triângulo de maior área com o ponto escolhido no grupo
+anterior e a média do grupo seguinte. Picos e mudanças de declive são
+preservados, ao contrário de tirar um ponto a cada k.
+"""
+import numpy as np
+
+
+def lttb(x, y, threshold):
+    """Devolve (x, y) reduzidos a `threshold` pontos (ou os originais se já forem menos)."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    size = len(x)
+    if threshold >= size or threshold < 3:
+        return x, y
+
+    # Limites dos grupos intermédios (o primeiro e o último ponto ficam sozinhos)
+    edges = (np.arange(threshold - 1) * ((size - 2) / (threshold - 2))).astype(int) + 1
+    edges[-1] = size - 1
+    # Média de cada grupo, usada como terceiro vértice do triângulo do grupo anterior
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    mean_x = np.append(mean_x[1:], x[-1])
+    mean_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, size - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        area = np.abs((ax - mean_x[bucket]) * (y[start:end] - ay) - (ax - x[start:end]) * (mean_y[bucket] - ay))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return x[selected], y[selected]
@@ -0,0 +1,147 @@
+"""Exportação de tabelas de amortização em blocos de tamanho fixo (CSV ou Parquet).
+
+`iter_file_chunks` e `write_chunks` servem também outros processamentos em
+fluxo contínuo (ler um ficheiro por blocos, transformar e escrever).
+
+As tabelas são geradas por geradores, bloco a bloco, a partir da forma fechada
+de `amortization_table`: a memória usada depende do tamanho do bloco e não de
+N nem do número de empréstimos. `write_chunks` escreve os blocos num ficheiro
+(ou buffer) à medida que são gerados e devolve estatísticas por bloco.
+
+O formato Parquet precisa do `pyarrow` (instalado com o Streamlit).
+"""
+import os
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from .amortization import AMORTIZATION_COLUMNS, amortization_table, payoff_period
+from .tvm import _batch_columns, _column, periodic_rate
+
+DEFAULT_CHUNK_SIZE = 100_000
+EXPORT_FORMATS = ('csv', 'parquet')
+
+
+class ChunkStats(NamedTuple):
+    """Estatísticas de um bloco escrito: linhas, segundos e linhas por segundo."""
+    chunk: int
+    rows: int
+    seconds: float
+    rows_per_second: float
+
+
+def iter_schedule_chunks(pv, rate, pmt, n, mode='END', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Gera a tabela de um empréstimo em blocos de até `chunk_size` períodos."""
+    last = int(min(n, payoff_period(pv, rate, pmt, mode)))
+    for start in range(1, last + 1, chunk_size):
+        yield amortization_table(pv, rate, pmt, n, start, min(start + chunk_size - 1, last), mode)
+
+
+def iter_portfolio_chunks(loans, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Gera as tabelas de vários empréstimos seguidos, em blocos de exatamente `chunk_size` linhas.
+
+    `loans` é um DataFrame ou dicionário de arrays com as colunas N, I/Y, PV,
+    PMT e, opcionalmente, P/Y, C/Y e BGN/END (como em `solve_tvm_batch`).
+    Cada bloco tem a coluna extra 'Empréstimo' com o índice da linha de
+    origem; só o último bloco pode ter menos linhas.
+    """
+    columns, size = _batch_columns(loans)
+    n = _column(columns, 'N', np.nan, size).astype(float)
+    pv = _column(columns, 'PV', np.nan, size).astype(float)
+    pmt = _column(columns, 'PMT', np.nan, size).astype(float)
+    p_y = _column(columns, 'P/Y', 12, size).astype(float)
+    c_y = _column(columns, 'C/Y', np.nan, size).astype(float)
+    c_y = np.where(np.isnan(c_y), p_y, c_y)
+    mode = _column(columns, 'BGN/END', 'END', size)
+    rate = np.atleast_1d(periodic_rate(_column(columns, 'I/Y', np.nan, size).astype(float), p_y, c_y))
+
+    pending, pending_rows = [], 0
+    for loan in range(size):
+        # Empréstimos com dados em falta ou sem períodos não geram linhas
+        if not (np.isfinite(n[loan]) and np.isfinite(rate[loan]) and n[loan] >= 1):
+            continue
+        last = int(min(n[loan], payoff_period(pv[loan], rate[loan], pmt[loan], mode[loan])))
+        start = 1
+        while start <= last:
+            # Cada pedaço só preenche o espaço livre do bloco atual
+            end = min(last, start + chunk_size - pending_rows - 1)
+            piece = amortization_table(pv[loan], rate[loan], pmt[loan], n[loan], start, end, mode[loan])
+            piece['Empréstimo'] = np.full(end - start + 1, loan)
+            pending.append(piece)
+            pending_rows += end - start + 1
+            start = end + 1
+            if pending_rows == chunk_size:
+                yield _concatenate(pending)
+                pending, pending_rows = [], 0
+    if pending:
+        yield _concatenate(pending)
+
+
+def _concatenate(pieces):
+    columns = ('Empréstimo',) + AMORTIZATION_COLUMNS
+    return {column: np.concatenate([piece[column] for piece in pieces]) for column in columns}
+
+
+def iter_file_chunks(source, file_name=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Lê um ficheiro CSV ou Parquet (caminho ou ficheiro aberto) em DataFrames de até `chunk_size` linhas.
+
+    O ficheiro nunca é carregado inteiro: CSV com `read_csv(chunksize=...)`,
+    Parquet com `ParquetFile.iter_batches`.
+    """
+    import pandas as pd
+    name = file_name or str(getattr(source, 'name', source))
+    if name.lower().endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        with pd.read_csv(source, chunksize=chunk_size) as reader:
+            yield from reader
+
+
+def write_chunks(chunks, target, file_format='csv'):
+    """Escreve os blocos em `target` (caminho ou ficheiro binário) e devolve um `ChunkStats` por bloco.
+
+    O tempo de cada bloco inclui a sua geração e escrita. Em CSV o cabeçalho
+    só é escrito no primeiro bloco; em Parquet cada bloco é um row group.
+    """
+    import pandas as pd
+
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportação desconhecido: {file_format}")
+    stats = []
+    writer = None
+    handle = open(target, 'wb') if isinstance(target, (str, os.PathLike)) and file_format == 'csv' else target
+    try:
+        iterator = iter(chunks)
+        while True:
+            started = time.perf_counter()
+            chunk = next(iterator, None)
+            if chunk is None:
+                break
+            if file_format == 'csv':
+                pd.DataFrame(chunk).to_csv(handle, header=not stats, index=False, encoding='utf-8')
+            else:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pydict(chunk)
+                if writer is None:
+                    writer = pq.ParquetWriter(handle, table.schema)
+                writer.write_table(table)
+            seconds = time.perf_counter() - started
+            rows = len(next(iter(chunk.values())))
+            stats.append(ChunkStats(len(stats) + 1, rows, seconds, rows / seconds if seconds > 0 else float('inf')))
+    finally:
+        if writer is not None:
+            writer.close()
+        if handle is not target:
+            handle.close()
+    return stats
+
+
+def throughput(stats):
+    """Total de linhas, segundos e linhas por segundo de uma exportação."""
+    rows = sum(s.rows for s in stats)
+    seconds = sum(s.seconds for s in stats)
+    return {'rows': rows, 'seconds': seconds, 'rows_per_second': rows / seconds if seconds > 0 else 0.0}
@@ -0,0 +1,126 @@
+"""Relação entre Custo (CST), Preço de Venda (SEL) e Margem (MAR %).
+
+`solve_margin_batch` resolve a coluna em falta de muitas linhas de uma só
+vez e `iter_margin_chunks` aplica-a a catálogos lidos de ficheiro em blocos
+(memória constante), para escrever com `write_chunks`.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from .export import DEFAULT_CHUNK_SIZE, iter_file_chunks
+
+MARGIN_VARIABLES = ('CST', 'SEL', 'MAR')
+MARGIN_OK = 0
+MARGIN_MISSING = 1
+MARGIN_INVALID_SEL = 2
+MARGIN_FULL = 3
+MARGIN_NEGATIVE_COST = 4
+MARGIN_ERROR_LABELS = (
+    'OK',
+    'Dados em falta',
+    'Preço de Venda (SEL) inválido',
+    'Margem não pode ser 100%',
+    'Custo (CST) não pode ser negativo',
+)
+
+
+def solve_cost(sel, mar_percent):
+    """CST = SEL * (1 - MAR)."""
+    return sel * (1.0 - mar_percent / 100.0)
+
+
+def solve_selling_price(cst, mar_percent):
+    """SEL = CST / (1 - MAR). Levanta ZeroDivisionError se MAR = 100%."""
+    return cst / (1.0 - mar_percent / 100.0)
+
+
+def solve_margin(sel, cst):
+    """MAR = (SEL - CST) / SEL, em percentagem."""
+    return ((sel - cst) / sel) * 100.0
+
+
+class MarginBatchResult(NamedTuple):
+    """Resultado de `solve_margin_batch`: valores completados, variável resolvida e código de erro por linha."""
+    values: dict
+    solved: np.ndarray
+    error: np.ndarray
+
+    @property
+    def failed(self):
+        return self.error != MARGIN_OK
+
+
+def solve_margin_batch(data, target=None):
+    """Resolve CST, SEL ou MAR (%) em cada linha de `data` (DataFrame ou dicionário de arrays).
+
+    Com `target` resolve essa coluna em todas as linhas; sem `target`, cada
+    linha resolve a única coluna em falta (NaN). As regras de validação são
+    as da calculadora: para CST, SEL <= 0 só é aceite com margem zero; para
+    SEL, a margem não pode ser 100% nem o custo negativo; para MAR, SEL não
+    pode ser zero. Nunca levanta exceções por linha.
+    """
+    names = [name for name in MARGIN_VARIABLES if name in data]
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(data[name], dtype=float)) for name in names])
+    size = arrays[0].shape[0] if arrays else 0
+    columns = dict(zip(names, arrays))
+    values = {name: np.array(columns[name], dtype=float) if name in columns else np.full(size, np.nan)
+              for name in MARGIN_VARIABLES}
+
+    missing = np.column_stack([np.isnan(values[name]) for name in MARGIN_VARIABLES])
+    if target is not None:
+        if target not in MARGIN_VARIABLES:
+            raise ValueError(f"Variável alvo desconhecida: {target}")
+        target_index = np.full(size, MARGIN_VARIABLES.index(target))
+        missing[:, target_index[0]] = False
+        complete = ~missing.any(axis=1)
+    else:
+        complete = missing.sum(axis=1) == 1
+        target_index = np.argmax(missing, axis=1)
+
+    cst, sel, mar = (values[name] for name in MARGIN_VARIABLES)
+    with np.errstate(all='ignore'):
+        candidates = np.stack([solve_cost(sel, mar), solve_selling_price(cst, mar), solve_margin(sel, cst)])
+    solved = candidates[target_index, np.arange(size)]
+
+    error = np.select(
+        [
+            ~complete,
+            (target_index == 0) & (sel <= 0) & (mar != 0),
+            (target_index == 1) & (np.abs(1.0 - mar / 100.0) < 1e-9),
+            (target_index == 1) & (cst < 0),
+            (target_index == 2) & (sel == 0),
+        ],
+        [MARGIN_MISSING, MARGIN_INVALID_SEL, MARGIN_FULL, MARGIN_NEGATIVE_COST, MARGIN_INVALID_SEL],
+        MARGIN_OK,
+    )
+    ok = error == MARGIN_OK
+    for index, name in enumerate(MARGIN_VARIABLES):
+        rows = ok & (target_index == index)
+        values[name][rows] = solved[rows]
+    solved_names = np.where(complete, np.asarray(MARGIN_VARIABLES, dtype=object)[target_index], '')
+    return MarginBatchResult(values=values, solved=solved_names, error=error)
+
+
+def iter_margin_chunks(source, file_name=None, target=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Lê um catálogo (CSV ou Parquet) em blocos e gera cada bloco já resolvido.
+
+    Cada bloco é um dicionário de arrays com as colunas originais (CST, SEL
+    e MAR completadas, as restantes, ex. SKU, inalteradas), 'Resolvido' e
+    'Erro' (descrição de `MARGIN_ERROR_LABELS`). A memória usada depende só
+    de `chunk_size`.
+    """
+    import pandas as pd
+    labels = np.asarray(MARGIN_ERROR_LABELS, dtype=object)
+    for frame in iter_file_chunks(source, file_name, chunk_size):
+        if not any(name in frame for name in MARGIN_VARIABLES):
+            raise ValueError(f"O catálogo precisa de pelo menos uma das colunas {', '.join(MARGIN_VARIABLES)}.")
+        # Colunas ausentes contam como em falta; texto não numérico também
+        numeric = {name: pd.to_numeric(frame[name], errors='coerce').to_numpy(dtype=float) if name in frame
+                   else np.full(len(frame), np.nan) for name in MARGIN_VARIABLES}
+        result = solve_margin_batch(numeric, target)
+        chunk = {column: frame[column].to_numpy() for column in frame.columns}
+        chunk.update(result.values)
+        chunk['Resolvido'] = result.solved
+        chunk['Erro'] = labels[result.error]
+        yield chunk
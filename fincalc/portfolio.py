@@ -0,0 +1,165 @@
+"""Carteiras de empréstimos em colunas e fluxos agregados por período.
+
+`LoanPortfolio` guarda um array por atributo (N, taxa por período, PV, PMT,
+modo, período de origem e grupo), em vez de um objeto ou tabela por
+empréstimo. `portfolio_cashflows` soma juros, principal e saldo de todos os
+empréstimos em cada período de calendário sem construir a tabela de cada um:
+percorre as idades k = 0..N máximo e, em cada idade, calcula em forma
+fechada o pagamento k de todos os empréstimos ainda ativos. A memória usada
+é proporcional ao número de empréstimos mais o número de períodos (vezes o
+número de grupos, quando há agrupamento).
+
+Os valores seguem a convenção de sinais TVM, como em `amortization_table`.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from .amortization import _raw_balance, payoff_period
+from .tvm import _batch_columns, _column, _pmt_kernel, periodic_rate
+
+
+class LoanPortfolio(NamedTuple):
+    """Carteira em colunas: um array por atributo, um elemento por empréstimo.
+
+    `origination` é o período de calendário em que cada empréstimo começa
+    (0 para o mais antigo) e `group` o código do grupo (coorte), com as
+    designações em `group_labels`.
+    """
+    n: np.ndarray
+    rate: np.ndarray
+    pv: np.ndarray
+    pmt: np.ndarray
+    begin: np.ndarray
+    origination: np.ndarray
+    group: np.ndarray
+    group_labels: np.ndarray
+
+    @property
+    def size(self):
+        return len(self.n)
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self)
+
+
+def _months_since_first(dates):
+    """Meses desde a primeira data e o mês dessa data (NaN nas datas em falta)."""
+    months = np.asarray(dates, dtype='datetime64[D]').astype('datetime64[M]')
+    missing = np.isnat(months)
+    first = months[~missing].min(initial=np.datetime64('9999-12', 'M'))
+    return np.where(missing, np.nan, (months - first).astype(np.int64)), first
+
+
+def build_portfolio(loans, origination=None, group_by=None):
+    """Constrói uma `LoanPortfolio` a partir de um DataFrame ou dicionário de arrays.
+
+    Colunas como em `solve_tvm_batch`: N, I/Y, PV e, opcionalmente, PMT
+    (calculado a partir das restantes se faltar), P/Y (12), C/Y (igual a
+    P/Y) e BGN/END ('END'). `origination` é o nome da coluna com o período de
+    origem (inteiro) ou a data de origem (os meses contam como períodos, para
+    carteiras mensais). `group_by` é o nome da coluna usada para agrupar;
+    com `group_by='origination'` cada mês/período de origem é uma coorte.
+    Levanta ValueError se faltarem colunas obrigatórias.
+    """
+    missing = [name for name in ('N', 'I/Y', 'PV') if name not in loans]
+    if missing:
+        raise ValueError(f"Colunas em falta na carteira: {', '.join(missing)}")
+    columns, size = _batch_columns(loans)
+    n = _column(columns, 'N', np.nan, size).astype(float)
+    pv = _column(columns, 'PV', np.nan, size).astype(float)
+    p_y = _column(columns, 'P/Y', 12, size).astype(float)
+    c_y = _column(columns, 'C/Y', np.nan, size).astype(float)
+    c_y = np.where(np.isnan(c_y), p_y, c_y)
+    begin = _column(columns, 'BGN/END', 'END', size) == 'BGN'
+    rate = np.atleast_1d(periodic_rate(_column(columns, 'I/Y', np.nan, size).astype(float), p_y, c_y))
+    pmt = _column(columns, 'PMT', np.nan, size).astype(float)
+    with np.errstate(all='ignore'):
+        pmt = np.where(np.isnan(pmt), _pmt_kernel(rate, n, pv, 0.0, begin), pmt)
+
+    first_month = None
+    if origination is None:
+        start = np.zeros(size, dtype=np.int64)
+    else:
+        values = np.asarray(loans[origination])
+        if values.dtype.kind in 'MOU':
+            start, first_month = _months_since_first(values)
+        else:
+            start = values.astype(float)
+    # N e origem inválidos (NaN, N <= 0) ficam a 0 antes da conversão para inteiro: o empréstimo é ignorado
+    valid = np.isfinite(n) & (n > 0) & (n <= np.iinfo(np.int32).max) & np.isfinite(start)
+    n = np.where(valid, n, 0)
+    start = np.where(valid, start, 0).astype(np.int64)
+    if group_by is None:
+        labels, codes = np.array(['Carteira']), np.zeros(size, dtype=np.int64)
+    else:
+        keys = start if group_by == 'origination' else np.asarray(loans[group_by])
+        labels, codes = np.unique(keys, return_inverse=True)
+        if group_by == 'origination' and first_month is not None:
+            labels = (first_month + labels).astype(str) # Coortes designadas pelo mês (AAAA-MM)
+
+    return LoanPortfolio(
+        n=n.astype(np.int32), rate=rate, pv=pv, pmt=pmt, begin=begin,
+        origination=start.astype(np.int32), group=codes.astype(np.int32).ravel(), group_labels=labels,
+    )
+
+
+def portfolio_cashflows(portfolio):
+    """Juros, principal e saldo agregados por grupo e período de calendário.
+
+    Devolve um dicionário de arrays em formato longo (uma linha por grupo e
+    período) com as colunas 'Grupo', 'Período', 'Juros Pagos', 'Principal
+    Pago', 'Saldo Final' e 'Empréstimos Ativos'. O período 0 de cada
+    empréstimo é a sua origem (saldo = PV, sem pagamentos).
+    """
+    valid = (portfolio.n > 0) & np.isfinite(portfolio.rate) & np.isfinite(portfolio.pv) & np.isfinite(portfolio.pmt)
+    with np.errstate(all='ignore'):
+        k_star = payoff_period(portfolio.pv, portfolio.rate, portfolio.pmt, np.where(portfolio.begin, 'BGN', 'END'))
+    last = np.where(valid, np.minimum(portfolio.n, k_star), -1).astype(np.int64)
+
+    # Ordenar por último período (decrescente): os empréstimos ativos na idade k são sempre um prefixo
+    order = np.argsort(-last, kind='stable')
+    last = last[order]
+    rate, pv, pmt = portfolio.rate[order], portfolio.pv[order], portfolio.pmt[order]
+    begin, k_star = portfolio.begin[order], k_star[order]
+    n_groups = len(portfolio.group_labels)
+    n_periods = int((portfolio.origination[order] + last).max(initial=0)) + 1
+    # Índice achatado (grupo, período de origem); somar k dá o índice (grupo, período de calendário)
+    slot = portfolio.group[order].astype(np.int64) * n_periods + portfolio.origination[order]
+
+    size = n_groups * n_periods
+    interest_total = np.zeros(size)
+    principal_total = np.zeros(size)
+    balance_total = np.zeros(size)
+    active_total = np.zeros(size)
+
+    active = int(np.count_nonzero(last >= 0))
+    balance_total += np.bincount(slot[:active], weights=pv[:active], minlength=size)
+    active_total += np.bincount(slot[:active], minlength=size)
+    previous = pv # Saldo (sem liquidação antecipada) após o pagamento k - 1
+    with np.errstate(all='ignore'):
+        for k in range(1, int(last[0]) + 1 if active else 0):
+            active = int(np.searchsorted(-last, -k, side='right')) # Empréstimos com last >= k
+            r, b, ks = rate[:active], begin[:active], k_star[:active]
+            start_balance = previous[:active]
+            current = _raw_balance(pv[:active], r, pmt[:active], k, b)
+            # Em BGN o primeiro pagamento ocorre em t=0 e não inclui juros
+            interest = -r * (start_balance * ~b if k == 1 else start_balance)
+            principal = np.where(k < ks, pmt[:active] - interest, -start_balance)
+            end_balance = np.where(k >= ks, 0.0, current)
+            previous = current
+            index = slot[:active] + k
+            interest_total += np.bincount(index, weights=interest, minlength=size)
+            principal_total += np.bincount(index, weights=principal, minlength=size)
+            balance_total += np.bincount(index, weights=end_balance, minlength=size)
+            active_total += np.bincount(index, minlength=size)
+
+    return {
+        'Grupo': np.repeat(portfolio.group_labels, n_periods),
+        'Período': np.tile(np.arange(n_periods), n_groups),
+        'Juros Pagos': interest_total,
+        'Principal Pago': principal_total,
+        'Saldo Final': balance_total,
+        'Empréstimos Ativos': active_total.astype(np.int64),
+    }
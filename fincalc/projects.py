@@ -0,0 +1,240 @@
+"""NPV e IRR de muitos projetos de uma só vez.
+
+Os fluxos de cada projeto podem ter comprimentos diferentes: são aceites
+como lista de sequências (irregular) ou como matriz com NaN no fim das linhas
+mais curtas. O NPV é calculado para todos os projetos em simultâneo (Horner
+ao longo dos períodos, vetorizado entre projetos); a IRR, que é resolvida
+projeto a projeto com `irr_grouped`, é distribuída por um conjunto de
+processos. `metrics_batch` calcula MIRR, paybacks e índice de rendibilidade
+de todos os projetos com operações sobre a matriz de fluxos.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from .cashflow import CashFlowMetrics, irr_grouped
+
+PROJECT_STATUS_LABELS = ('OK', 'Várias IRR', 'Sem mudança de sinal', 'IRR não encontrada', 'Sem fluxos')
+PROJECT_OK = 0
+PROJECT_MULTIPLE_IRR = 1
+PROJECT_NO_SIGN_CHANGE = 2
+PROJECT_NO_IRR = 3
+PROJECT_EMPTY = 4
+
+
+def pad_projects(flows):
+    """Matriz (projetos x períodos) com NaN a completar as linhas curtas, e o comprimento de cada linha.
+
+    `flows` é uma matriz já completada com NaN ou uma lista de sequências.
+    """
+    if isinstance(flows, np.ndarray) and flows.ndim == 2:
+        matrix = flows.astype(float)
+    else:
+        rows = [np.asarray(row, dtype=float).ravel() for row in flows]
+        matrix = np.full((len(rows), max((len(row) for row in rows), default=0)), np.nan)
+        for index, row in enumerate(rows):
+            matrix[index, :len(row)] = row
+    present = ~np.isnan(matrix)
+    # Comprimento = última coluna preenchida (NaN intermédios contam como zero)
+    lengths = np.where(present.any(axis=1), matrix.shape[1] - np.argmax(present[:, ::-1], axis=1), 0)
+    return matrix, lengths
+
+
+def npv_batch(flows, rates_percent):
+    """NPV de cada projeto à sua taxa (em %, escalar ou uma por projeto).
+
+    Regra de Horner do último período para o primeiro, com um passo por
+    período para todos os projetos: memória O(projetos) além dos fluxos.
+    """
+    matrix, lengths = pad_projects(flows)
+    rates = np.broadcast_to(np.asarray(rates_percent, dtype=float) / 100.0, lengths.shape)
+    discount = 1.0 / (1.0 + rates)
+    total = np.zeros(len(lengths))
+    for period in range(matrix.shape[1] - 1, -1, -1):
+        total = total * discount + np.nan_to_num(matrix[:, period])
+    return np.where(lengths > 0, total, np.nan)
+
+
+def _first_payback(values, present):
+    """Payback (fracionário) por linha a partir dos fluxos por período `values` (0 fora do projeto)."""
+    cumulative = np.cumsum(values, axis=1)
+    recovered = (cumulative >= 0) & present
+    found = recovered.any(axis=1)
+    period = np.argmax(recovered, axis=1)
+    rows = np.arange(len(values))
+    before = cumulative[rows, np.maximum(period - 1, 0)]
+    fraction = np.clip(-before / values[rows, period], 0.0, 1.0)
+    return np.where(found, np.where(period == 0, 0.0, period - 1 + fraction), np.nan)
+
+
+def metrics_batch(flows, rates_percent, finance_rates_percent=None, reinvest_rates_percent=None):
+    """NPV, MIRR, paybacks e índice de rendibilidade de cada projeto, vetorizado entre projetos.
+
+    Mesmas definições de `cash_flow_metrics`, aplicadas à matriz de fluxos
+    por período; as taxas (em %) são escalares ou uma por projeto. Devolve um
+    `CashFlowMetrics` com um array por métrica.
+    """
+    matrix, lengths = pad_projects(flows)
+    values = np.nan_to_num(matrix)
+    present = np.arange(matrix.shape[1]) < lengths[:, None]
+
+    def rates(percent):
+        return np.broadcast_to(np.asarray(percent, dtype=float), lengths.shape)[:, None]
+
+    def present_values(rate_column):
+        return values * np.exp(-np.arange(matrix.shape[1]) * np.log1p(rate_column / 100.0))
+
+    rate = rates(rates_percent)
+    finance = rate if finance_rates_percent is None else rates(finance_rates_percent)
+    reinvest = rate if reinvest_rates_percent is None else rates(reinvest_rates_percent)
+    with np.errstate(all='ignore'):
+        discounted = present_values(rate)
+        inflows = np.where(values > 0, discounted, 0.0).sum(axis=1)
+        outflows = -np.where(values < 0, discounted, 0.0).sum(axis=1)
+        pv_in = inflows if reinvest is rate else np.where(values > 0, present_values(reinvest), 0.0).sum(axis=1)
+        pv_out = outflows if finance is rate else -np.where(values < 0, present_values(finance), 0.0).sum(axis=1)
+        periods = lengths - 1
+        valid = (periods > 0) & (pv_in > 0) & (pv_out > 0)
+        mirr = np.where(valid, np.expm1(np.log1p(reinvest[:, 0] / 100.0) + np.log(pv_in / pv_out) / np.maximum(periods, 1)), np.nan)
+        profitability_index = np.where(outflows > 0, inflows / outflows, np.nan)
+        npv = np.where(lengths > 0, discounted.sum(axis=1), np.nan)
+        return CashFlowMetrics(npv, mirr, _first_payback(values, present), _first_payback(discounted, present), profitability_index)
+
+
+def _run_lengths(flows):
+    """Fluxos consecutivos iguais agrupados em (montantes, frequências)."""
+    starts = np.flatnonzero(np.concatenate(([True], flows[1:] != flows[:-1])))
+    return flows[starts], np.diff(np.append(starts, len(flows)))
+
+
+def _irr_rows(rows):
+    """IRR, número de IRR, mudanças de sinal e iterações de cada linha (executado nos processos)."""
+    results = []
+    for flows in rows:
+        if len(flows) == 0:
+            results.append((float('nan'), 0, 0, 0))
+            continue
+        info = irr_grouped(*_run_lengths(flows))
+        results.append((info.irr, len(info.roots), info.sign_changes, int(info.iterations.sum())))
+    return results
+
+
+class ProjectBatchResult(NamedTuple):
+    """Resultado de `evaluate_projects`: um valor por projeto em cada campo."""
+    npv: np.ndarray
+    irr: np.ndarray
+    irr_count: np.ndarray
+    sign_changes: np.ndarray
+    iterations: np.ndarray
+    status: np.ndarray
+    seconds: float
+
+    @property
+    def projects_per_second(self):
+        return len(self.npv) / self.seconds if self.seconds > 0 else float('inf')
+
+    def to_frame(self):
+        """Tabela com uma linha por projeto."""
+        import pandas as pd
+        return pd.DataFrame({
+            'NPV': self.npv,
+            'IRR': self.irr,
+            'Nº IRR': self.irr_count,
+            'Mudanças de Sinal': self.sign_changes,
+            'Iterações': self.iterations,
+            'Estado': np.asarray(PROJECT_STATUS_LABELS, dtype=object)[self.status],
+        })
+
+
+def irr_batch(flows, processes=None, chunk_size=256):
+    """IRR de cada projeto, com os projetos repartidos por `processes` processos.
+
+    `processes=None` usa todos os núcleos; `processes=1` corre no processo
+    atual, sem pool. Devolve (irr, número de IRR, mudanças de sinal, iterações).
+    """
+    matrix, lengths = pad_projects(flows)
+    rows = [np.nan_to_num(matrix[index, :length]) for index, length in enumerate(lengths)]
+    chunks = [rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size)]
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(chunks) <= 1:
+        results = [item for chunk in chunks for item in _irr_rows(chunk)]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = [item for chunk_result in pool.map(_irr_rows, chunks) for item in chunk_result]
+    if not results:
+        empty = np.array([], dtype=int)
+        return np.array([]), empty, empty, empty
+    irr, count, changes, iterations = (np.array(column) for column in zip(*results))
+    return irr.astype(float), count.astype(int), changes.astype(int), iterations.astype(int)
+
+
+def evaluate_projects(flows, rates_percent, processes=None, chunk_size=256):
+    """NPV (vetorizado) e IRR (em paralelo) de cada projeto, com o estado de cada um.
+
+    Nunca levanta exceções por projeto: o estado indica projetos sem fluxos,
+    sem mudança de sinal, sem IRR encontrada ou com várias IRR.
+    """
+    started = time.perf_counter()
+    matrix, lengths = pad_projects(flows)
+    npv = npv_batch(matrix, rates_percent)
+    irr, count, changes, iterations = irr_batch(matrix, processes, chunk_size)
+    status = np.select(
+        [lengths == 0, changes == 0, count == 0, count > 1],
+        [PROJECT_EMPTY, PROJECT_NO_SIGN_CHANGE, PROJECT_NO_IRR, PROJECT_MULTIPLE_IRR],
+        PROJECT_OK,
+    )
+    return ProjectBatchResult(npv, irr, count, changes, iterations, status, time.perf_counter() - started)
+
+
+def read_projects(source, file_name=None):
+    """Lê projetos de um ficheiro CSV ou Parquet com um projeto por linha.
+
+    As colunas numéricas são os fluxos CF0, CF1, ... (células vazias no fim
+    das linhas mais curtas). Uma coluna 'Taxa (%)', se existir, dá a taxa de
+    desconto de cada projeto e uma coluna 'Projeto' o seu nome. Devolve
+    (matriz de fluxos, taxas ou None, nomes).
+    """
+    import pandas as pd
+    name = file_name or str(getattr(source, 'name', source))
+    table = pd.read_parquet(source) if name.lower().endswith('.parquet') else pd.read_csv(source)
+    rates = table.pop('Taxa (%)').to_numpy(dtype=float) if 'Taxa (%)' in table else None
+    names = table.pop('Projeto').astype(str).to_numpy() if 'Projeto' in table else np.arange(1, len(table) + 1).astype(str)
+    flows = table.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    return flows, rates, names
+
+
+def random_projects(count, max_periods=120, seed=0):
+    """Projetos sintéticos para testes de desempenho: investimento inicial e fluxos de comprimento variável."""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(2, max_periods + 1, count)
+    flows = []
+    for length in lengths:
+        row = rng.normal(1000, 600, length)
+        row[0] = -rng.uniform(0.3, 0.9) * row[1:].sum()
+        flows.append(row)
+    return flows
+
+
+def benchmark_projects(count=5000, max_periods=120, processes=(1, 2, 4), seed=0):
+    """Mede projetos por segundo de `evaluate_projects` com diferentes números de processos.
+
+    Devolve uma lista de dicionários (processos, projetos, segundos,
+    projetos/s, aceleração face à primeira medição).
+    """
+    flows = random_projects(count, max_periods, seed)
+    results = []
+    for workers in processes:
+        result = evaluate_projects(flows, 10.0, processes=workers)
+        results.append({
+            'processes': workers,
+            'projects': count,
+            'seconds': result.seconds,
+            'projects_per_second': result.projects_per_second,
+        })
+    baseline = results[0]['seconds'] if results else 0.0
+    for row in results:
+        row['speedup'] = baseline / row['seconds'] if row['seconds'] > 0 else float('inf')
+    return results
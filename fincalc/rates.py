@@ -0,0 +1,107 @@
+"""Conversão entre taxa nominal anual (NOM) e taxa efetiva anual (EFF).
+
+Todas as funções aceitam escalares ou arrays e qualquer frequência de
+capitalização C/Y, incluindo capitalização contínua (`C/Y = CONTINUOUS`,
+ou seja, infinito). As conversões passam pela taxa de crescimento
+logarítmica anual, `C/Y * log1p(NOM / C/Y)` (ou NOM em contínuo), e voltam
+com `expm1`, o que mantém a precisão com taxas muito pequenas e C/Y muito
+grandes, onde `(1 + NOM/C/Y)^C/Y` perde todos os algarismos.
+"""
+import numpy as np
+
+CONTINUOUS = float('inf')
+RATE_TABLE_COLUMNS = ('Taxa (%)', 'C/Y')
+_CONTINUOUS_LABELS = ('contínua', 'continua', 'continuous', 'inf', 'c', '∞')
+
+
+def _result(values):
+    """Escalar (float) se o resultado for 0-d, caso contrário o array."""
+    return float(values) if np.ndim(values) == 0 else values
+
+
+def log_growth(rate_percent, c_y):
+    """Crescimento logarítmico anual log(1 + EFF) de uma taxa nominal (%) com C/Y capitalizações."""
+    rate = np.asarray(rate_percent, dtype=float) / 100.0
+    c_y = np.asarray(c_y, dtype=float)
+    continuous = np.isinf(c_y)
+    finite_c_y = np.where(continuous, 1.0, c_y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(continuous, rate, finite_c_y * np.log1p(rate / finite_c_y))
+
+
+def rate_from_log_growth(growth, c_y):
+    """Taxa nominal (%) com C/Y capitalizações que corresponde ao crescimento logarítmico `growth`."""
+    growth = np.asarray(growth, dtype=float)
+    c_y = np.asarray(c_y, dtype=float)
+    continuous = np.isinf(c_y)
+    finite_c_y = np.where(continuous, 1.0, c_y)
+    return np.where(continuous, growth, finite_c_y * np.expm1(growth / finite_c_y)) * 100.0
+
+
+def nominal_to_effective(nom_percent, c_y):
+    """EFF (%) a partir de NOM (%) com C/Y capitalizações por ano (C/Y infinito = contínua)."""
+    return _result(np.expm1(log_growth(nom_percent, c_y)) * 100.0)
+
+
+def effective_to_nominal(eff_percent, c_y):
+    """NOM (%) a partir de EFF (%) com C/Y capitalizações por ano (C/Y infinito = contínua).
+
+    Levanta ValueError se (1 + EFF) for negativo (raiz de número negativo);
+    com arrays, essas posições ficam NaN.
+    """
+    eff = np.asarray(eff_percent, dtype=float) / 100.0
+    if np.ndim(eff) == 0 and eff < -1:
+        raise ValueError("Não é possível calcular NOM para esta taxa efetiva negativa (resultaria em raiz de número negativo).")
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return _result(rate_from_log_growth(np.log1p(eff), c_y))
+
+
+def convert_rate(rate_percent, from_c_y, to_c_y):
+    """Taxa nominal (%) com `from_c_y` capitalizações convertida para `to_c_y` (C/Y = 1 é a EFF)."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return _result(rate_from_log_growth(log_growth(rate_percent, from_c_y), to_c_y))
+
+
+def parse_compounding(values):
+    """Coluna C/Y como números, aceitando 'Contínua', 'inf', 'C' ou '∞' para capitalização contínua."""
+    import pandas as pd
+    text = pd.Series(values).astype(str).str.strip().str.lower()
+    numbers = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+    return np.where(text.isin(_CONTINUOUS_LABELS).to_numpy(), CONTINUOUS, numbers)
+
+
+def convert_rate_table(table, target_c_y=None):
+    """Converte uma folha de taxas (DataFrame ou dicionário) de uma só vez.
+
+    Colunas 'Taxa (%)' (nominal anual) e 'C/Y' (capitalizações por ano,
+    1 = taxa efetiva, 'Contínua' = contínua) e, opcionalmente, 'P/Y'.
+    Devolve um DataFrame com 'EFF (%)', 'Taxa Contínua (%)', a taxa por
+    período de pagamento quando há P/Y e a NOM com `target_c_y`
+    capitalizações, se indicado. Linhas inválidas ficam NaN.
+    """
+    import pandas as pd
+    missing = [column for column in RATE_TABLE_COLUMNS if column not in table]
+    if missing:
+        raise ValueError(f"Colunas em falta na folha de taxas: {', '.join(missing)}")
+    result = pd.DataFrame(table).copy()
+    rate = pd.to_numeric(result['Taxa (%)'], errors='coerce').to_numpy(dtype=float)
+    c_y = parse_compounding(result['C/Y'])
+    c_y = np.where(c_y > 0, c_y, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        growth = log_growth(rate, c_y)
+        result['EFF (%)'] = np.expm1(growth) * 100.0
+        result['Taxa Contínua (%)'] = growth * 100.0
+        if 'P/Y' in result:
+            p_y = pd.to_numeric(result['P/Y'], errors='coerce').to_numpy(dtype=float)
+            result['Taxa por Período (%)'] = np.expm1(growth / np.where(p_y > 0, p_y, np.nan)) * 100.0
+        if target_c_y is not None:
+            label = 'Contínua' if np.isinf(target_c_y) else f"{target_c_y:g}"
+            result[f'NOM (%) C/Y={label}'] = rate_from_log_growth(growth, target_c_y)
+    return result
+
+
+def read_rate_table(source, file_name=None):
+    """Lê uma folha de taxas de um ficheiro CSV ou Parquet (ver `convert_rate_table`)."""
+    import pandas as pd
+    name = file_name or str(getattr(source, 'name', source))
+    return pd.read_parquet(source) if name.lower().endswith('.parquet') else pd.read_csv(source)
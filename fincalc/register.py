@@ -0,0 +1,206 @@
+"""Projeção da depreciação de um registo de ativos fixos (centenas de milhares de ativos).
+
+Cada ativo tem o seu método (SL, SYD, DB, DBX, MACRS, MACRS-MQ), CST, SAL, LIF, M01 e, opcionalmente,
+o fator DB (%), a categoria e o ano de vida em que a projeção começa. Os
+ativos são agrupados por método e cada grupo é calculado por uma única
+chamada a `accumulated_depreciation` sobre a matriz ativos x anos, com os
+mesmos resultados da calculadora de um ativo. `iter_register_chunks` lê o
+registo de um ficheiro em blocos e gera a projeção em formato largo (DEP,
+RBV e RDV de cada ano em colunas) para escrever em Parquet com
+`write_chunks`; os totais por categoria são acumulados à parte.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from .depreciation import DEPRECIATION_METHODS, TABLE_METHODS, accumulated_depreciation, last_depreciation_year
+from .depreciation_tables import MACRS_CLASSES
+from .export import DEFAULT_CHUNK_SIZE, iter_file_chunks
+
+REGISTER_COLUMNS = ('Método', 'CST', 'SAL', 'LIF', 'M01')
+DEFAULT_PROJECTION_YEARS = 10
+REGISTER_OK = 0
+REGISTER_MISSING = 1
+REGISTER_UNKNOWN_METHOD = 2
+REGISTER_INVALID = 3
+REGISTER_ERROR_LABELS = (
+    'OK',
+    'Dados em falta',
+    'Método desconhecido',
+    'LIF (ou classe MACRS), M01 ou ano inicial inválidos',
+)
+
+
+class RegisterProjection(NamedTuple):
+    """DEP, RBV e RDV (ativos x anos de projeção) e o código de erro de cada ativo.
+
+    As linhas com erro ficam NaN. `start_year` é o ano de vida do ativo que
+    corresponde ao primeiro ano da projeção (1 = ano de aquisição).
+    """
+    dep: np.ndarray
+    rbv: np.ndarray
+    rdv: np.ndarray
+    error: np.ndarray
+    start_year: np.ndarray
+    categories: np.ndarray
+
+    @property
+    def years(self):
+        return self.dep.shape[1]
+
+    @property
+    def failed(self):
+        return int(np.count_nonzero(self.error))
+
+    def columns(self):
+        """Colunas 'DEP Ano k', 'RBV Ano k' e 'RDV Ano k' (k = ano da projeção) como dicionário de arrays."""
+        result = {}
+        for label, values in (('DEP', self.dep), ('RBV', self.rbv), ('RDV', self.rdv)):
+            for year in range(self.years):
+                result[f'{label} Ano {year + 1}'] = values[:, year]
+        return result
+
+    def totals_by_category(self):
+        """DEP, RBV e RDV somados por categoria e ano da projeção (ativos com erro excluídos)."""
+        import pandas as pd
+        ok = self.error == REGISTER_OK
+        codes, names = pd.factorize(self.categories[ok], sort=True)
+        years = np.arange(1, self.years + 1)
+
+        def sums(values):
+            # Uma soma por categoria e ano: bincount com pesos, coluna a coluna
+            return np.stack([np.bincount(codes, weights=values[ok, year], minlength=len(names))
+                             for year in range(self.years)], axis=1).ravel()
+
+        return pd.DataFrame({
+            'Categoria': np.repeat(np.asarray(names, dtype=object), self.years),
+            'Ano': np.tile(years, len(names)),
+            'DEP': sums(self.dep),
+            'RBV': sums(self.rbv),
+            'RDV': sums(self.rdv),
+        })
+
+
+def _register_columns(register):
+    """Colunas numéricas, métodos, categorias e códigos de erro de um registo (DataFrame ou dicionário)."""
+    import pandas as pd
+    missing = [column for column in REGISTER_COLUMNS if column not in register]
+    if missing:
+        raise ValueError(f"Colunas em falta no registo de ativos: {', '.join(missing)}")
+    size = len(register['CST'])
+
+    def numeric(name, default):
+        if name not in register:
+            return np.full(size, default, dtype=float)
+        return pd.to_numeric(pd.Series(register[name]), errors='coerce').to_numpy(dtype=float)
+
+    values = {name: numeric(name, np.nan) for name in REGISTER_COLUMNS[1:]}
+    # Fator em branco (DB e DBX) fica no valor por omissão, tal como a coluna em falta
+    values['Fator DB (%)'] = np.nan_to_num(numeric('Fator DB (%)', 200.0), nan=200.0)
+    values['Ano Inicial'] = numeric('Ano Inicial', 1.0)
+    categories = (pd.Series(register['Categoria'], dtype=object).fillna('').to_numpy()
+                  if 'Categoria' in register else np.full(size, '', dtype=object))
+    # Os nomes dos métodos são normalizados uma vez por valor distinto, não por ativo
+    labels, names = pd.factorize(pd.Series(register['Método'], dtype=object))
+    names = [str(name).strip().upper() for name in names]
+    codes = np.array([DEPRECIATION_METHODS.index(name) if name in DEPRECIATION_METHODS else -1 for name in names] + [-1])
+    blank = np.array([name == '' for name in names] + [True])
+    method_code, no_method = codes[labels], blank[labels] # Rótulo -1 (em falta) lê a última posição
+    start = values['Ano Inicial']
+    with np.errstate(invalid='ignore'):
+        missing_values = np.isnan(np.column_stack([values[name] for name in REGISTER_COLUMNS[1:]])).any(axis=1) | np.isnan(start)
+        invalid = ((values['LIF'] <= 0) | (values['M01'] < 1) | (values['M01'] >= 13)
+                   | (start < 1) | (start != np.floor(start)))
+    error = np.select(
+        [no_method, method_code < 0, missing_values, invalid],
+        [REGISTER_MISSING, REGISTER_UNKNOWN_METHOD, REGISTER_MISSING, REGISTER_INVALID],
+        REGISTER_OK,
+    )
+    return values, method_code, categories, error
+
+
+def project_register(register, years=DEFAULT_PROJECTION_YEARS):
+    """Projeção de `years` anos da depreciação de todos os ativos de um registo.
+
+    `register` é um DataFrame ou dicionário de arrays com as colunas Método,
+    CST, SAL, LIF e M01 e, opcionalmente, 'Fator DB (%)' (200 por omissão ou em branco),
+    'Categoria' e 'Ano Inicial' (ano de vida do ativo no primeiro ano da
+    projeção, 1 por omissão). Nunca levanta exceções por ativo: o código de
+    erro indica dados em falta, método desconhecido ou valores inválidos.
+    """
+    values, method_code, categories, error = _register_columns(register)
+    size = len(error)
+    dep = np.full((size, years), np.nan)
+    rbv = np.full((size, years), np.nan)
+    start = np.where(error == REGISTER_OK, values['Ano Inicial'], 1).astype(np.int64)
+    for code, method in enumerate(DEPRECIATION_METHODS):
+        rows = np.flatnonzero((method_code == code) & (error == REGISTER_OK))
+        if rows.size == 0:
+            continue
+        column = {name: values[name][rows][:, None] for name in values}
+        # Depois do último ano com depreciação a acumulada não muda: basta calcular até ao último ano pedido ou a esse ano
+        horizon = int(max(1, min(start[rows].max() + years - 1, last_depreciation_year(column['LIF'], column['M01']).max())))
+        accumulated = accumulated_depreciation(method, column['LIF'], column['M01'], column['CST'], column['SAL'],
+                                               column['Fator DB (%)'] / 100.0, horizon)
+        if method in TABLE_METHODS:
+            # LIF que não é uma classe da tabela
+            invalid = np.isnan(accumulated[:, 0])
+            error[rows[invalid]] = REGISTER_INVALID
+        # Coluna 0 = antes do ano 1; os anos além do horizonte leem a última coluna (depreciação zero)
+        accumulated = np.concatenate((np.zeros((rows.size, 1)), accumulated), axis=1)
+        year = start[rows][:, None] + np.arange(years)
+        end = np.take_along_axis(accumulated, np.minimum(year, horizon), axis=1)
+        previous = np.take_along_axis(accumulated, np.minimum(year - 1, horizon), axis=1)
+        depreciating = (column['CST'] > column['SAL']) | (method in TABLE_METHODS)
+        dep[rows] = np.where(depreciating, end - previous, 0.0)
+        rbv[rows] = column['CST'] - end
+    rdv = np.maximum(rbv - values['SAL'][:, None], 0.0)
+    return RegisterProjection(dep, rbv, rdv, error, start, categories)
+
+
+def merge_category_totals(totals):
+    """Junta os totais por categoria de vários blocos (lista de DataFrames de `totals_by_category`)."""
+    import pandas as pd
+    if not totals:
+        return pd.DataFrame(columns=['Categoria', 'Ano', 'DEP', 'RBV', 'RDV'])
+    return pd.concat(totals).groupby(['Categoria', 'Ano']).sum().reset_index()
+
+
+def iter_register_chunks(source, file_name=None, years=DEFAULT_PROJECTION_YEARS, chunk_size=DEFAULT_CHUNK_SIZE, totals=None):
+    """Lê um registo de ativos (CSV ou Parquet) em blocos e gera a projeção de cada bloco.
+
+    Cada bloco é um dicionário de arrays com as colunas originais, as colunas
+    de `RegisterProjection.columns` e 'Erro' (descrição de
+    `REGISTER_ERROR_LABELS`). Se `totals` for uma lista, cada bloco junta-lhe
+    os seus totais por categoria (ver `merge_category_totals`). A memória
+    usada depende só de `chunk_size` e de `years`.
+    """
+    labels = np.asarray(REGISTER_ERROR_LABELS, dtype=object)
+    for frame in iter_file_chunks(source, file_name, chunk_size):
+        projection = project_register(frame, years)
+        chunk = {column: frame[column].to_numpy() for column in frame.columns}
+        chunk.update(projection.columns())
+        chunk['Erro'] = labels[projection.error]
+        if totals is not None:
+            totals.append(projection.totals_by_category())
+        yield chunk
+
+
+def random_register(count, seed=0):
+    """Registo sintético para testes de desempenho, com todos os métodos e cinco categorias."""
+    rng = np.random.default_rng(seed)
+    cost = np.round(rng.uniform(500, 100_000, count), 2)
+    methods = rng.choice(np.array(DEPRECIATION_METHODS, dtype=object), count)
+    # Nos métodos MACRS a vida útil é uma das classes da tabela
+    life = np.where(np.isin(methods, TABLE_METHODS), rng.choice(np.array(MACRS_CLASSES, dtype=float), count), rng.integers(3, 41, count))
+    return {
+        'Ativo': np.arange(1, count + 1),
+        'Categoria': rng.choice(np.array(['Edifícios', 'Equipamento', 'Informática', 'Mobiliário', 'Viaturas'], dtype=object), count),
+        'Método': methods,
+        'CST': cost,
+        'SAL': np.round(cost * rng.uniform(0, 0.2, count), 2),
+        'LIF': life.astype(float),
+        'M01': rng.integers(1, 13, count).astype(float),
+        'Fator DB (%)': rng.choice([150.0, 200.0], count),
+        'Ano Inicial': rng.integers(1, 6, count).astype(float),
+    }
@@ -0,0 +1,112 @@
+"""Métodos numéricos vetorizados para encontrar raízes linha a linha.
+
+Cada função recebe `func(x, index)`, que devolve o valor da função e a sua
+derivada para as linhas `index` (índices inteiros) avaliadas em `x`. Assim
+só as linhas ainda ativas são recalculadas em cada iteração.
+
+* `newton`: Newton sem intervalo, rápido quando a estimativa inicial é boa.
+* `bracket_roots`: procura, numa grelha fixa, um intervalo com mudança de sinal.
+* `safeguarded_newton`: Newton protegido dentro de um intervalo (falsa
+  posição/bisseção quando o passo sai dele); converge sempre que o intervalo
+  contém uma raiz.
+"""
+import numpy as np
+
+
+def newton(func, x0, tol=1e-10, maxiter=50, lower=None):
+    """Newton vetorizado. Devolve (x, convergiu, iterações) por linha.
+
+    Se `lower` for indicado, um passo que salte para x <= lower é substituído
+    pelo ponto médio entre x e `lower`. As linhas cujo passo deixa de ser
+    finito são abandonadas (convergiu = False).
+    """
+    x = np.array(x0, dtype=float)
+    iterations = np.zeros(x.shape, dtype=int)
+    converged = np.zeros(x.shape, dtype=bool)
+    active = np.isfinite(x)
+    for _ in range(maxiter):
+        index = np.flatnonzero(active)
+        if index.size == 0:
+            break
+        current = x[index]
+        f, df = func(current, index)
+        new_x = current - f / df
+        if lower is not None:
+            new_x = np.where(new_x <= lower, (current + lower) / 2.0, new_x)
+        iterations[index] += 1
+        finite = np.isfinite(new_x)
+        done = finite & (np.abs(new_x - current) <= tol * (1.0 + np.abs(current)))
+        x[index] = np.where(finite, new_x, current)
+        converged[index[done]] = True
+        active[index[done | ~finite]] = False
+    return x, converged, iterations
+
+
+def bracket_roots(func, grid, index, target):
+    """Intervalos [lo, hi] da grelha em que a função muda de sinal.
+
+    Quando há várias mudanças de sinal, escolhe a mais próxima de `target`
+    (em caso de empate, a de menor x), para que o resultado seja determinístico.
+    Devolve (lo, hi, f_lo, f_hi, encontrado), com NaN nas linhas sem intervalo.
+    """
+    values = np.column_stack([func(np.full(index.size, point), index)[0] for point in grid])
+    signs = np.sign(values)
+    changes = (signs[:, :-1] * signs[:, 1:] <= 0) & np.isfinite(values[:, :-1]) & np.isfinite(values[:, 1:])
+    midpoints = (grid[:-1] + grid[1:]) / 2.0
+    distance = np.where(changes, np.abs(midpoints - np.reshape(target, (-1, 1))), np.inf)
+    best = np.argmin(distance, axis=1) # argmin devolve o primeiro mínimo: desempate pelo menor x
+    found = changes.any(axis=1)
+    rows = np.arange(index.size)
+    lo = np.where(found, grid[best], np.nan)
+    hi = np.where(found, grid[best + 1], np.nan)
+    f_lo = np.where(found, values[rows, best], np.nan)
+    f_hi = np.where(found, values[rows, best + 1], np.nan)
+    return lo, hi, f_lo, f_hi, found
+
+
+def safeguarded_newton(func, lo, hi, f_lo, f_hi, index, tol=1e-12, maxiter=100):
+    """Newton dentro de [lo, hi], com falsa posição quando o passo sai do intervalo.
+
+    `f_lo` e `f_hi` são os valores da função nos extremos (com sinais
+    opostos). A falsa posição usa a variante Illinois (o extremo que fica
+    parado duas vezes seguidas tem o seu valor reduzido a metade), que
+    converge de forma superlinear mesmo quando a função é muito curva.
+    Devolve (x, convergiu, iterações) para as linhas `index`.
+    """
+    lo, hi = np.array(lo, dtype=float), np.array(hi, dtype=float)
+    f_lo, f_hi = np.array(f_lo, dtype=float), np.array(f_hi, dtype=float)
+    last_side = np.zeros(lo.shape, dtype=np.int8) # -1: lo foi movido, +1: hi foi movido
+    x = lo - f_lo * (hi - lo) / (f_hi - f_lo)
+    x = np.where(np.isfinite(x), x, (lo + hi) / 2.0)
+    iterations = np.zeros(x.shape, dtype=int)
+    converged = np.zeros(x.shape, dtype=bool)
+    active = np.ones(x.shape, dtype=bool)
+    for _ in range(maxiter):
+        rows = np.flatnonzero(active)
+        if rows.size == 0:
+            break
+        current = x[rows]
+        f, df = func(current, index[rows])
+        # Encolher o intervalo mantendo a mudança de sinal
+        move_lo = np.sign(f) == np.sign(f_lo[rows])
+        side = np.where(move_lo, -1, 1).astype(np.int8)
+        repeated = side == last_side[rows]
+        lo[rows] = np.where(move_lo, current, lo[rows])
+        hi[rows] = np.where(move_lo, hi[rows], current)
+        f_lo[rows] = np.where(move_lo, f, np.where(repeated, f_lo[rows] / 2.0, f_lo[rows]))
+        f_hi[rows] = np.where(move_lo, np.where(repeated, f_hi[rows] / 2.0, f_hi[rows]), f)
+        last_side[rows] = side
+
+        lo_r, hi_r = lo[rows], hi[rows]
+        candidate = current - f / df
+        secant = lo_r - f_lo[rows] * (hi_r - lo_r) / (f_hi[rows] - f_lo[rows])
+        secant = np.where(np.isfinite(secant) & (secant > lo_r) & (secant < hi_r), secant, (lo_r + hi_r) / 2.0)
+        inside = np.isfinite(candidate) & (candidate > lo_r) & (candidate < hi_r)
+        new_x = np.where(inside, candidate, secant)
+        iterations[rows] += 1
+        scale = tol * (1.0 + np.abs(current))
+        done = (f == 0) | (np.abs(new_x - current) <= scale) | (hi_r - lo_r <= scale)
+        x[rows] = np.where(f == 0, current, new_x)
+        converged[rows[done]] = True
+        active[rows[done]] = False
+    return x, converged, iterations
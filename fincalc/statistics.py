@@ -0,0 +1,166 @@
+"""Estatística de uma e duas variáveis (1-V, LIN, Ln, EXP, PWR) e previsão."""
+import numpy as np
+
+
+def compute_statistics(data, method):
+    """Calcula as estatísticas do método sobre o DataFrame `data` (colunas X e Y).
+
+    Para 1-V, Y é a frequência de cada X. Devolve `(results, error_msg)`; em caso
+    de erro `error_msg` é uma mensagem para o utilizador.
+    """
+    results = {}
+    error_msg = None
+
+    if data.empty:
+        error_msg = "Não há dados válidos para analisar."
+
+    try:
+        if not error_msg:
+            n_total = 0
+            if method == "1-V":
+                import pandas as pd # Só necessário para validar o tipo da coluna
+                if not pd.api.types.is_numeric_dtype(data['Y']):
+                    error_msg = "Erro (1-V): Coluna Y (frequência) deve ser numérica."
+                elif not data['Y'].ge(0).all():
+                    error_msg = "Erro (1-V): Frequências (Y) devem ser não-negativas."
+                elif data['Y'].sum() <= 0:
+                    error_msg = "Erro (1-V): Soma das frequências (Y) deve ser positiva."
+                else:
+                    try:
+                        # Arredondar frequências para inteiros para usar repeat
+                        freqs = data['Y'].round().astype(int)
+                        if not freqs.ge(0).all(): raise ValueError("Frequências negativas após arredondar.")
+                        x_data_expanded = np.repeat(data['X'].values, freqs.values)
+                        n_total = len(x_data_expanded)
+                    except (ValueError, TypeError) as e_rep:
+                        error_msg = f"Erro (1-V) ao processar frequências: {e_rep}"
+                        x_data_expanded = np.array([]) # Esvaziar para evitar erros abaixo
+
+                    if n_total > 0 and not error_msg:
+                        results['n'] = n_total
+                        results['Mean X'] = np.mean(x_data_expanded)
+                        results['Sum X'] = np.sum(x_data_expanded)
+                        results['Sum X2'] = np.sum(x_data_expanded**2)
+                        if n_total > 1: results['Sx'] = np.std(x_data_expanded, ddof=1)
+                        else: results['Sx'] = 0
+                        results['σx'] = np.std(x_data_expanded, ddof=0)
+                    elif not error_msg:
+                        error_msg = "Erro (1-V): Não há dados válidos após considerar frequências."
+
+            else: # Métodos 2-Variáveis
+                x_data = data['X'].astype(float).values
+                y_data = data['Y'].astype(float).values
+                n_total = len(x_data)
+                results['n'] = n_total
+
+                if n_total < 2:
+                    error_msg = f"Erro ({method}): São necessários pelo menos 2 pontos de dados para regressão."
+                else:
+                    results['Mean X'] = np.mean(x_data)
+                    results['Mean Y'] = np.mean(y_data)
+                    results['Sum X'] = np.sum(x_data)
+                    results['Sum Y'] = np.sum(y_data)
+                    results['Sum X2'] = np.sum(x_data**2)
+                    results['Sum Y2'] = np.sum(y_data**2)
+                    results['Sum XY'] = np.sum(x_data * y_data)
+                    results['Sx'] = np.std(x_data, ddof=1)
+                    results['Sy'] = np.std(y_data, ddof=1)
+                    results['σx'] = np.std(x_data, ddof=0)
+                    results['σy'] = np.std(y_data, ddof=0)
+
+                    x_reg, y_reg = x_data, y_data
+                    valid_transform = True
+                    try:
+                        if method == "Ln":
+                            if not (x_data > 0).all(): raise ValueError("Todos os X devem ser > 0.")
+                            x_reg = np.log(x_data)
+                        elif method == "EXP":
+                            if not (y_data > 0).all(): raise ValueError("Todos os Y devem ser > 0.")
+                            y_reg = np.log(y_data)
+                        elif method == "PWR":
+                            if not ((x_data > 0).all() and (y_data > 0).all()): raise ValueError("Todos X e Y devem ser > 0.")
+                            x_reg = np.log(x_data)
+                            y_reg = np.log(y_data)
+                    except ValueError as ve:
+                        error_msg = f"Erro ({method}): {ve}"
+                        valid_transform = False
+                    except Exception as e_log:
+                        error_msg = f"Erro ({method}) na transformação Log: {e_log}"
+                        valid_transform = False
+
+                    if valid_transform:
+                        # Verificar constantes após transformação
+                        if np.allclose(x_reg, x_reg[0]) or np.allclose(y_reg, y_reg[0]):
+                            error_msg = f"Erro ({method}): Os dados (possivelmente transformados) são constantes."
+                        else:
+                            try:
+                                from scipy import stats # Importado aqui para não pesar no import do pacote
+                                slope, intercept, r_value, p_value, std_err = stats.linregress(x_reg, y_reg)
+
+                                if method == "EXP":
+                                    results['a (intercept)'] = np.exp(intercept)
+                                    results['b (slope)'] = np.exp(slope)
+                                elif method == "PWR":
+                                    results['a (intercept)'] = np.exp(intercept)
+                                    results['b (slope)'] = slope
+                                else: # LIN, Ln
+                                    results['a (intercept)'] = intercept
+                                    results['b (slope)'] = slope
+
+                                results['r (correlation)'] = r_value
+                                results['_raw_slope'] = slope
+                                results['_raw_intercept'] = intercept
+
+                            except ValueError as ve:
+                                error_msg = f"Erro ({method}) na regressão: {ve}. Verifique dados."
+                            except Exception as e_reg:
+                                error_msg = f"Erro ({method}) inesperado na regressão: {e_reg}."
+
+    except Exception as e:
+        error_msg = f"Erro geral no processamento dos dados: {e}"
+
+    return results, error_msg
+
+
+def predict_y(results, method, x_prime):
+    """Prevê Y' para X' com a regressão calculada. Devolve `(y_pred, error_msg)`."""
+    a_adj = results['a (intercept)'] # 'a' ajustado para EXP/PWR
+    b_adj = results['b (slope)']   # 'b' ajustado para EXP/PWR
+
+    if method == "LIN": return a_adj + b_adj * x_prime, None
+    elif method == "Ln":
+        if x_prime <= 0: return None, "X' deve ser > 0."
+        return a_adj + b_adj * np.log(x_prime), None
+    elif method == "EXP": return a_adj * (b_adj ** x_prime), None
+    elif method == "PWR":
+        if x_prime <= 0: return None, "X' deve ser > 0."
+        return a_adj * (x_prime ** b_adj), None
+    return None, None
+
+
+def predict_x(results, method, y_prime):
+    """Prevê X' para Y' invertendo a regressão. Devolve `(x_pred, error_msg)`."""
+    raw_b = results['_raw_slope']
+    a_adj = results['a (intercept)']
+    b_adj = results['b (slope)']
+
+    if abs(raw_b if method in ["LIN", "Ln"] else b_adj) < 1e-10: # Verificar inclinação relevante
+        return None, "Inclinação (b) ≈ 0. Não é possível prever X'."
+
+    if method == "LIN": return (y_prime - a_adj) / b_adj, None
+    elif method == "Ln":
+        # Y = a + b*ln(X) => X = exp((Y - a) / b)
+        return np.exp((y_prime - a_adj) / b_adj), None
+    elif method == "EXP":
+        # Y = a * b^X => X = ln(Y/a) / ln(b)
+        if y_prime <= 0 or a_adj <= 0 or b_adj <= 0 or b_adj == 1:
+            return None, "Inputs inválidos para EXP (Y'>0, a>0, b>0, b!=1)."
+        return np.log(y_prime / a_adj) / np.log(b_adj), None
+    elif method == "PWR":
+        # Y = a * X^b => X = exp(ln(Y/a)/b)
+        if y_prime <= 0 or a_adj <= 0:
+            return None, "Inputs inválidos para PWR (Y'>0, a>0)."
+        elif abs(b_adj) < 1e-10:
+            return None, "Inclinação (b) ≈ 0. Não é possível prever X'."
+        return np.exp(np.log(y_prime / a_adj) / b_adj), None
+    return None, None
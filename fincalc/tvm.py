@@ -0,0 +1,380 @@
+"""Funções de Valor do Dinheiro no Tempo (TVM).
+
+Cada função resolve uma variável desconhecida a partir das restantes, seguindo
+a convenção de sinais da BA II Plus (entradas positivas, saídas negativas).
+
+`solve_tvm_batch` resolve o mesmo problema para muitos cenários de uma só vez,
+com operações NumPy vetorizadas em vez de uma chamada `npf` por cenário.
+`solve_rate` encontra a taxa (I/Y) com Newton vetorizado e, nas linhas que
+não convergem, Newton protegido por bisseção.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import numpy_financial as npf
+
+from .rates import log_growth, rate_from_log_growth
+from .solvers import bracket_roots, newton, safeguarded_newton
+
+TVM_VARIABLES = ('N', 'I/Y', 'PV', 'PMT', 'FV')
+
+
+def payment_when(mode):
+    """Converte o modo BGN/END no argumento `when` do numpy-financial."""
+    return 'begin' if mode == 'BGN' else 'end'
+
+
+def periodic_rate(i_y, p_y, c_y=None):
+    """Taxa por período de pagamento (decimal) a partir de I/Y (%), P/Y e C/Y.
+
+    Com C/Y = P/Y (ou C/Y omitido) é simplesmente I/Y / P/Y. Caso contrário a
+    taxa por capitalização é convertida para a periodicidade dos pagamentos:
+    `(1 + I/Y / C/Y) ^ (C/Y / P/Y) - 1`, calculado como
+    `expm1(log_growth(I/Y, C/Y) / P/Y)`; C/Y infinito é capitalização
+    contínua. Aceita escalares ou arrays.
+    """
+    if c_y is None:
+        return (i_y / 100.0) / p_y
+    converted = np.expm1(log_growth(i_y, c_y) / p_y)
+    result = np.where(np.equal(c_y, p_y), (i_y / 100.0) / p_y, converted)
+    return result if result.ndim else float(result)
+
+
+def annual_rate(rate_per_period, p_y, c_y=None):
+    """Operação inversa de `periodic_rate`: devolve I/Y (%) a partir da taxa por período."""
+    if c_y is None:
+        return rate_per_period * p_y * 100
+    converted = rate_from_log_growth(np.log1p(rate_per_period) * p_y, c_y)
+    result = np.where(np.equal(c_y, p_y), rate_per_period * p_y * 100, converted)
+    return result if result.ndim else float(result)
+
+
+def solve_n(i_y, pv, pmt, fv, p_y, mode='END', c_y=None):
+    """Calcula N (número de períodos)."""
+    return float(npf.nper(periodic_rate(i_y, p_y, c_y), pmt, pv, fv, payment_when(mode)))
+
+
+def solve_iy(n, pv, pmt, fv, p_y, mode='END', c_y=None):
+    """Calcula I/Y (taxa anual %) a partir da taxa periódica encontrada por `solve_rate`.
+
+    Levanta ValueError se não existir taxa que satisfaça os dados.
+    """
+    solution = solve_rate(n, pv, pmt, fv, mode)
+    status = int(solution.status[0])
+    if status > RATE_BRACKETED:
+        raise ValueError(f"{RATE_STATUS_LABELS[status]} para I/Y após {int(solution.iterations[0])} iterações")
+    return float(annual_rate(solution.rate[0], p_y, c_y))
+
+
+def solve_pv(n, i_y, pmt, fv, p_y, mode='END', c_y=None):
+    """Calcula PV (valor presente)."""
+    return float(npf.pv(periodic_rate(i_y, p_y, c_y), n, pmt, fv, payment_when(mode)))
+
+
+def solve_pmt(n, i_y, pv, fv, p_y, mode='END', c_y=None):
+    """Calcula PMT (prestação periódica)."""
+    return float(npf.pmt(periodic_rate(i_y, p_y, c_y), n, pv, fv, payment_when(mode)))
+
+
+def solve_fv(n, i_y, pv, pmt, p_y, mode='END', c_y=None):
+    """Calcula FV (valor futuro)."""
+    return float(npf.fv(periodic_rate(i_y, p_y, c_y), n, pmt, pv, payment_when(mode)))
+
+
+# --- Núcleos vetorizados (taxa por período `rate`, `begin` = 1 para BGN e 0 para END) ---
+
+def _annuity_factor(rate, n):
+    """((1 + rate)^n - 1) / rate, com o limite n quando rate -> 0."""
+    growth_minus_one = np.expm1(n * np.log1p(rate))
+    safe_rate = np.where(rate == 0, 1.0, rate)
+    return np.where(rate == 0, n, growth_minus_one / safe_rate)
+
+
+def _fv_kernel(rate, n, pv, pmt, begin):
+    growth = np.exp(n * np.log1p(rate))
+    return -(pv * growth + pmt * (1 + rate * begin) * _annuity_factor(rate, n))
+
+
+def _pv_kernel(rate, n, pmt, fv, begin):
+    growth = np.exp(n * np.log1p(rate))
+    return -(fv + pmt * (1 + rate * begin) * _annuity_factor(rate, n)) / growth
+
+
+def _pmt_kernel(rate, n, pv, fv, begin):
+    growth = np.exp(n * np.log1p(rate))
+    return -(fv + pv * growth) / ((1 + rate * begin) * _annuity_factor(rate, n))
+
+
+def _nper_kernel(rate, pv, pmt, fv, begin):
+    safe_rate = np.where(rate == 0, 1.0, rate)
+    z = pmt * (1 + rate * begin) / safe_rate
+    # log((z - fv) / (z + pv)) escrito com log1p para não perder precisão com taxas pequenas
+    nper = np.log1p(-(fv + pv) / (z + pv)) / np.log1p(safe_rate)
+    return np.where(rate == 0, -(fv + pv) / np.where(pmt == 0, np.nan, pmt), nper)
+
+
+def _rate_fv_equation(rate, n, pv, pmt, fv, begin):
+    """Equação da taxa na forma de valor futuro (a mesma de `npf.rate`) e a sua derivada.
+
+    g(r) = FV + PV*(1+r)^N + PMT*(1+r*b)*((1+r)^N - 1)/r
+    """
+    growth = np.exp(n * np.log1p(rate))
+    annuity = _annuity_factor(rate, n)
+    g = fv + pv * growth + pmt * (1 + rate * begin) * annuity
+    d_growth = n * growth / (1 + rate)
+    safe_rate = np.where(rate == 0, 1.0, rate)
+    d_annuity = np.where(rate == 0, n * (n - 1) / 2.0, (d_growth - annuity) / safe_rate)
+    dg = pv * d_growth + pmt * (begin * annuity + (1 + rate * begin) * d_annuity)
+    return g, dg
+
+
+def _rate_pv_equation(rate, n, pv, pmt, fv, begin):
+    """Mesma equação na forma de valor presente (g(r) / (1+r)^N) e a sua derivada."""
+    discount = np.exp(-n * np.log1p(rate))
+    safe_rate = np.where(rate == 0, 1.0, rate)
+    annuity = np.where(rate == 0, n, -np.expm1(-n * np.log1p(rate)) / safe_rate)
+    h = pv + pmt * (1 + rate * begin) * annuity + fv * discount
+    d_discount = -n * discount / (1 + rate)
+    d_annuity = np.where(rate == 0, -n * (n + 1) / 2.0, (-d_discount - annuity) / safe_rate)
+    dh = pmt * (begin * annuity + (1 + rate * begin) * d_annuity) + fv * d_discount
+    return h, dh
+
+
+def _rate_equation(rate, n, pv, pmt, fv, begin):
+    """Forma sem overflow para taxas negativas (valor futuro) e positivas (valor presente).
+
+    As duas formas diferem por um fator positivo, por isso têm as mesmas raízes
+    e o mesmo sinal: servem para procurar e encolher intervalos.
+    """
+    negative = rate < 0
+    if not negative.any():
+        return _rate_pv_equation(rate, n, pv, pmt, fv, begin)
+    if negative.all():
+        return _rate_fv_equation(rate, n, pv, pmt, fv, begin)
+    value = np.empty(rate.shape)
+    derivative = np.empty(rate.shape)
+    for form, rows in ((_rate_fv_equation, negative), (_rate_pv_equation, ~negative)):
+        value[rows], derivative[rows] = form(rate[rows], n[rows], pv[rows], pmt[rows], fv[rows], begin[rows])
+    return value, derivative
+
+
+def _rate_initial_guess(n, pv, pmt, fv, begin):
+    """Um passo de Newton a partir de r = 0 na forma de valor presente (0.1 se não for possível)."""
+    h0 = pv + pmt * n + fv
+    dh0 = pmt * (begin * n - n * (n + 1) / 2.0) - fv * n
+    guess = -h0 / dh0
+    return np.where(np.isfinite(guess), np.clip(guess, -0.5, 1.0), 0.1)
+
+
+def _begin_flag(mode):
+    """1.0 para BGN e 0.0 para END (aceita arrays de modos ou flags numéricos)."""
+    mode = np.asarray(mode)
+    if mode.dtype.kind in 'biuf':
+        return mode.astype(float)
+    return (mode == 'BGN').astype(float)
+
+
+def _rate_residual_ok(rate, n, pv, pmt, fv, begin):
+    """Resíduo pequeno face aos termos da equação, na forma sem overflow de `_rate_equation`.
+
+    Com r > -1 os fatores de PV, PMT e FV são positivos, por isso a mesma
+    equação com |PV|, |PMT| e |FV| é a soma dos termos em valor absoluto.
+    """
+    h, _ = _rate_equation(rate, n, pv, pmt, fv, begin)
+    scale, _ = _rate_equation(rate, n, np.abs(pv), np.abs(pmt), np.abs(fv), begin)
+    return np.abs(h) <= 1e-6 * np.maximum(scale, 1.0)
+
+
+RATE_NEWTON = 0
+RATE_BRACKETED = 1
+RATE_NO_SOLUTION = 2
+RATE_INVALID = 3
+RATE_STATUS_LABELS = ('Newton', 'Newton com bisseção', 'Sem solução', 'Dados inválidos')
+
+# Grelha para procurar intervalos com mudança de sinal: uniforme em log(1+r),
+# de -99,3% a +14 700% por período, incluindo r = 0
+_RATE_GRID = np.expm1(np.linspace(-5.0, 5.0, 81))
+
+
+class RateSolution(NamedTuple):
+    """Resultado de `solve_rate`: taxa por período, estado e iterações por linha.
+
+    `status` usa os códigos `RATE_NEWTON`, `RATE_BRACKETED`, `RATE_NO_SOLUTION`
+    e `RATE_INVALID` (descrições em `RATE_STATUS_LABELS`); as linhas sem
+    solução têm taxa NaN.
+    """
+    rate: np.ndarray
+    status: np.ndarray
+    iterations: np.ndarray
+
+    @property
+    def converged(self):
+        return self.status <= RATE_BRACKETED
+
+    def to_frame(self):
+        """Devolve os resultados como DataFrame (uma linha por cenário)."""
+        import pandas as pd
+        return pd.DataFrame({
+            'Taxa': self.rate,
+            'Estado': np.asarray(RATE_STATUS_LABELS, dtype=object)[self.status],
+            'Iterações': self.iterations,
+        })
+
+
+def solve_rate(n, pv, pmt, fv, mode='END', guess=None, tol=1e-10, maxiter=50):
+    """Taxa por período (decimal) para muitos cenários de uma só vez.
+
+    Substitui `npf.rate`: primeiro Newton vetorizado com derivada analítica a
+    partir de `guess` (por defeito, uma estimativa calculada linha a linha a
+    partir da linearização em r = 0); as linhas que não convergem (ou convergem para um ponto
+    que não é solução) passam para Newton protegido por bisseção, num
+    intervalo com mudança de sinal encontrado numa grelha fixa. Com várias
+    soluções é escolhida a mais próxima de `guess`, pelo que o resultado é
+    sempre o mesmo para os mesmos dados.
+
+    Linhas sem mudança de sinal entre PV, PMT e FV não têm solução e não são
+    iteradas. Nunca levanta exceções por linha.
+    """
+    n, pv, pmt, fv, mode = np.broadcast_arrays(*(np.atleast_1d(np.asarray(v)) for v in (n, pv, pmt, fv, mode)))
+    n, pv, pmt, fv = (v.astype(float) for v in (n, pv, pmt, fv))
+    begin = _begin_flag(mode)
+    rate = np.full(n.shape, np.nan)
+    status = np.full(n.shape, RATE_INVALID, dtype=np.int8)
+    iterations = np.zeros(n.shape, dtype=int)
+
+    valid = (n > 0) & np.isfinite(n) & np.isfinite(pv) & np.isfinite(pmt) & np.isfinite(fv)
+    flows = np.column_stack([pv, pmt, fv])
+    has_sign_change = (flows > 0).any(axis=1) & (flows < 0).any(axis=1)
+    status[valid & ~has_sign_change] = RATE_NO_SOLUTION
+    candidates = np.flatnonzero(valid & has_sign_change)
+    if candidates.size == 0:
+        return RateSolution(rate, status, iterations)
+
+    def args(index):
+        return n[index], pv[index], pmt[index], fv[index], begin[index]
+
+    with np.errstate(all='ignore'):
+        if guess is None:
+            start = _rate_initial_guess(*args(candidates))
+        else:
+            start = np.broadcast_to(np.asarray(guess, dtype=float), n.shape)[candidates]
+        found, converged, steps = newton(
+            lambda x, index: _rate_pv_equation(x, *args(candidates[index])),
+            start, tol=tol, maxiter=maxiter, lower=-1.0)
+        iterations[candidates] = steps
+        # Um passo pequeno numa zona plana da função não é uma solução:
+        # validar o resíduo relativo (ver `_rate_residual_ok`)
+        ok = converged & (found > -1) & _rate_residual_ok(found, *args(candidates))
+        rate[candidates[ok]] = found[ok]
+        status[candidates[ok]] = RATE_NEWTON
+
+        retry = candidates[~ok]
+        if retry.size:
+            equation = lambda x, index: _rate_equation(x, *args(index))
+            lo, hi, f_lo, f_hi, bracketed = bracket_roots(equation, _RATE_GRID, retry, start[~ok])
+            status[retry[~bracketed]] = RATE_NO_SOLUTION
+            retry = retry[bracketed]
+            found, converged, steps = safeguarded_newton(
+                equation, lo[bracketed], hi[bracketed], f_lo[bracketed], f_hi[bracketed], retry,
+                tol=tol, maxiter=4 * maxiter)
+            iterations[retry] += steps
+            ok = converged & _rate_residual_ok(found, *args(retry))
+            rate[retry[ok]] = found[ok]
+            status[retry] = np.where(ok, RATE_BRACKETED, RATE_NO_SOLUTION)
+    return RateSolution(rate, status, iterations)
+
+
+class TVMBatchResult(NamedTuple):
+    """Resultado de `solve_tvm_batch`.
+
+    `values` tem as cinco variáveis TVM (N, I/Y, PV, PMT, FV) já completadas,
+    `solved` indica por linha qual a variável resolvida e `failed` marca as
+    linhas sem solução válida (dados em falta, sinais incoerentes, etc.).
+    """
+    values: dict
+    solved: np.ndarray
+    failed: np.ndarray
+
+    def to_frame(self):
+        """Devolve os resultados como DataFrame (uma linha por cenário)."""
+        import pandas as pd
+        frame = pd.DataFrame(self.values)
+        frame['Resolvido'] = self.solved
+        frame['Falhou'] = self.failed
+        return frame
+
+
+def _batch_columns(data):
+    """Lê as colunas TVM presentes em `data` e aplica broadcasting entre elas."""
+    names = [name for name in TVM_VARIABLES + ('P/Y', 'C/Y', 'BGN/END') if name in data]
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(data[name])) for name in names])
+    return dict(zip(names, arrays)), arrays[0].shape[0]
+
+
+def _column(columns, name, default, size):
+    if name in columns:
+        return columns[name]
+    return np.full(size, default)
+
+
+def solve_tvm_batch(data, target=None):
+    """Resolve a variável TVM em falta para cada linha de `data`, de forma vetorizada.
+
+    `data` é um DataFrame ou um dicionário de arrays com as colunas N, I/Y, PV,
+    PMT, FV e, opcionalmente, P/Y (por defeito 12), C/Y (por defeito igual a
+    P/Y) e BGN/END (por defeito 'END'). Se `target` for indicado (ex: 'PMT'),
+    essa variável é resolvida em todas as linhas; caso contrário, cada linha
+    resolve a única variável que tiver em falta (NaN).
+
+    Nunca levanta exceções por linha: as linhas sem solução ficam com NaN e
+    são marcadas em `TVMBatchResult.failed`.
+    """
+    columns, size = _batch_columns(data)
+    values = {name: _column(columns, name, np.nan, size).astype(float) for name in TVM_VARIABLES}
+    p_y = _column(columns, 'P/Y', 12, size).astype(float)
+    c_y = _column(columns, 'C/Y', np.nan, size).astype(float)
+    c_y = np.where(np.isnan(c_y), p_y, c_y)
+    begin = (_column(columns, 'BGN/END', 'END', size) == 'BGN').astype(float)
+
+    missing = np.column_stack([np.isnan(values[name]) for name in TVM_VARIABLES])
+    if target is not None:
+        if target not in TVM_VARIABLES:
+            raise ValueError(f"Variável alvo desconhecida: {target}")
+        target_index = np.full(size, TVM_VARIABLES.index(target))
+        # As restantes variáveis têm de estar todas presentes
+        missing[:, target_index[0]] = False
+        valid = ~missing.any(axis=1)
+    else:
+        valid = missing.sum(axis=1) == 1
+        target_index = np.argmax(missing, axis=1)
+    valid &= (p_y > 0) & (c_y > 0)
+
+    n, i_y, pv, pmt, fv = (values[name] for name in TVM_VARIABLES)
+    solved = np.full(size, np.nan)
+
+    with np.errstate(all='ignore'):
+        rate = periodic_rate(i_y, p_y, c_y)
+        for index, name in enumerate(TVM_VARIABLES):
+            rows = valid & (target_index == index)
+            if not rows.any():
+                continue
+            r, b = rate[rows], begin[rows]
+            if name == 'N':
+                solved[rows] = _nper_kernel(r, pv[rows], pmt[rows], fv[rows], b)
+            elif name == 'I/Y':
+                rate_found = solve_rate(n[rows], pv[rows], pmt[rows], fv[rows], b).rate
+                solved[rows] = annual_rate(rate_found, p_y[rows], c_y[rows])
+            elif name == 'PV':
+                solved[rows] = _pv_kernel(r, n[rows], pmt[rows], fv[rows], b)
+            elif name == 'PMT':
+                solved[rows] = _pmt_kernel(r, n[rows], pv[rows], fv[rows], b)
+            else:
+                solved[rows] = _fv_kernel(r, n[rows], pv[rows], pmt[rows], b)
+
+    failed = ~valid | ~np.isfinite(solved)
+    solved_names = np.where(valid, np.asarray(TVM_VARIABLES, dtype=object)[target_index], '')
+    for index, name in enumerate(TVM_VARIABLES):
+        rows = valid & (target_index == index)
+        values[name][rows] = solved[rows]
+
+    return TVMBatchResult(values=values, solved=solved_names, failed=failed)
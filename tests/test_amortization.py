@@ -0,0 +1,119 @@
+import numpy as np
+import numpy_financial as npf
+import pytest
+
+import fincalc
+from fincalc.amortization import AMORTIZATION_COLUMNS
+
+# Exemplo por omissão da calculadora TVM: 30 anos, 5,5% ao ano, pagamentos mensais, PMT calculado
+DEFAULT_LOAN = (75_000.0, 0.055 / 12, float(npf.pmt(0.055 / 12, 360, 75_000.0)), 360)
+
+LOANS = [
+    (*DEFAULT_LOAN, 'END'),
+    (*DEFAULT_LOAN, 'BGN'),
+    (10_000.0, 0.01, -888.49, 12, 'END'),
+    (10_000.0, 0.01, -879.69, 12, 'BGN'),
+    (-5_000.0, 0.004, 150.0, 40, 'END'), # Sinais invertidos (investimento)
+    (2_400.0, 0.0, -100.0, 24, 'END'), # Taxa zero
+    (2_400.0, 0.0, -100.0, 24, 'BGN'),
+]
+
+# Prestação acima da necessária: liquidação antes de N, com o último pagamento reduzido
+EARLY_PAYOFF = [
+    (10_000.0, 0.01, -1_500.0, 12, 'END'),
+    (10_000.0, 0.01, -1_500.0, 12, 'BGN'),
+    (2_400.0, 0.0, -350.0, 24, 'END'),
+]
+
+
+def _reference_table(pv, rate, pmt, n, mode):
+    """Tabela de amortização período a período, como na implementação original."""
+    rows = []
+    balance = pv
+    for k in range(1, n + 1):
+        # Em BGN o primeiro pagamento ocorre em t=0, sem juros
+        interest = 0.0 if mode == 'BGN' and k == 1 else -rate * balance
+        principal = pmt - interest
+        if abs(principal) >= abs(balance) * (1 - 1e-12):
+            principal = -balance
+            rows.append((k, balance, principal + interest, interest, principal, 0.0))
+            break
+        rows.append((k, balance, pmt, interest, principal, balance + principal))
+        balance += principal
+    return {column: np.array(values) for column, values in zip(AMORTIZATION_COLUMNS, zip(*rows))}
+
+
+def _reference_summary(table, p1, p2):
+    period = table['Período']
+    inside = (period >= p1) & (period <= p2)
+    before = period <= p2
+    return {
+        'BAL': table['Saldo Final'][before][-1] if before.any() else 0.0,
+        'PRN': table['Principal Pago'][inside].sum(),
+        'INT': table['Juros Pagos'][inside].sum(),
+    }
+
+
+def _assert_tables_equal(got, expected):
+    assert list(got) == list(AMORTIZATION_COLUMNS)
+    np.testing.assert_array_equal(got['Período'], expected['Período'])
+    for column in AMORTIZATION_COLUMNS[1:]:
+        np.testing.assert_allclose(got[column], expected[column], rtol=1e-9, atol=1e-6, err_msg=column)
+
+
+def test_default_example_balance_after_first_year():
+    # A versão com ciclo somava os juros ao principal pago e dava 65.994,18
+    pv, rate, pmt, _ = DEFAULT_LOAN
+    summary = fincalc.amortization_summary(pv, rate, pmt, 1, 12)
+    np.testing.assert_allclose(summary['BAL'], 73_989.68, atol=0.005)
+    np.testing.assert_allclose(summary['BAL'], -npf.fv(rate, 12, pmt, pv), rtol=1e-12)
+    np.testing.assert_allclose(summary['PRN'] + summary['INT'], 12 * pmt, rtol=1e-12)
+
+
+@pytest.mark.parametrize('loan', LOANS + EARLY_PAYOFF)
+def test_full_table_matches_reference_loop(loan):
+    pv, rate, pmt, n, mode = loan
+    _assert_tables_equal(fincalc.amortization_table(pv, rate, pmt, n, mode=mode), _reference_table(*loan))
+
+
+@pytest.mark.parametrize('loan', LOANS + EARLY_PAYOFF)
+@pytest.mark.parametrize('p1, p2', [(1, 1), (1, 12), (5, 9), (11, 12), (12, 40), (200, 360)])
+def test_partial_ranges_match_reference_loop(loan, p1, p2):
+    pv, rate, pmt, n, mode = loan
+    if p1 > n:
+        pytest.skip('intervalo fora do prazo')
+    p2 = min(p2, n)
+    reference = _reference_table(*loan)
+    table = fincalc.amortization_table(pv, rate, pmt, n, p1, p2, mode)
+    inside = (reference['Período'] >= p1) & (reference['Período'] <= p2)
+    _assert_tables_equal(table, {column: values[inside] for column, values in reference.items()})
+
+    expected = _reference_summary(reference, p1, p2)
+    summary = fincalc.amortization_summary(pv, rate, pmt, p1, p2, mode)
+    cached = fincalc.schedule_summary(fincalc.get_schedule(pv, rate, pmt, n, mode), p1, p2)
+    for key in ('BAL', 'PRN', 'INT'):
+        np.testing.assert_allclose(summary[key], expected[key], rtol=1e-9, atol=1e-6, err_msg=key)
+        np.testing.assert_allclose(cached[key], expected[key], rtol=1e-9, atol=1e-6, err_msg=key)
+
+
+@pytest.mark.parametrize('loan', EARLY_PAYOFF)
+def test_early_payoff_reduces_last_payment(loan):
+    pv, rate, pmt, n, mode = loan
+    table = fincalc.amortization_table(pv, rate, pmt, n, mode=mode)
+    last = len(table['Período'])
+    assert last < n and last == fincalc.payoff_period(pv, rate, pmt, mode)
+    assert table['Saldo Final'][-1] == 0.0
+    assert abs(table['Pagamento (PMT)'][-1]) < abs(pmt)
+    np.testing.assert_allclose(table['Principal Pago'].sum(), -pv)
+    # Depois da liquidação o saldo fica a zero e não há mais pagamentos
+    summary = fincalc.amortization_summary(pv, rate, pmt, last + 1, n, mode)
+    assert summary['BAL'] == 0.0 and summary['PRN'] == 0.0 and summary['INT'] == 0.0
+
+
+def test_summary_broadcasts_over_loans():
+    pv, rate, pmt, n, mode = (np.array(column) for column in zip(*LOANS))
+    summary = fincalc.amortization_summary(pv, rate, pmt, 3, 10, mode)
+    for i, loan in enumerate(LOANS):
+        expected = _reference_summary(_reference_table(*loan), 3, 10)
+        for key in ('BAL', 'PRN', 'INT'):
+            np.testing.assert_allclose(summary[key][i], expected[key], rtol=1e-9, atol=1e-6)
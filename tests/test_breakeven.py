@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+import fincalc
+from fincalc.breakeven import (BREAKEVEN_INVALID_Q, BREAKEVEN_MISSING, BREAKEVEN_OK, BREAKEVEN_VARIABLES,
+                               BREAKEVEN_ZERO_MARGIN)
+
+BASE = {'P': 25.0, 'VC': 15.0, 'FC': 10_000.0, 'PFT': 2_000.0, 'Q': 1_200.0}
+
+
+def _scenarios(seed, size=200):
+    rng = np.random.default_rng(seed)
+    vc = rng.uniform(1, 50, size)
+    return {
+        'P': vc + rng.uniform(0.5, 30, size),
+        'VC': vc,
+        'FC': rng.uniform(0, 50_000, size),
+        'PFT': rng.normal(5_000, 5_000, size),
+        'Q': rng.uniform(1, 10_000, size),
+    }
+
+
+@pytest.mark.parametrize('target', BREAKEVEN_VARIABLES)
+def test_batch_matches_scalar_solver(target):
+    data = _scenarios(BREAKEVEN_VARIABLES.index(target))
+    data[target] = np.full(len(data['P']), np.nan)
+    result = fincalc.solve_breakeven_batch(data)
+    assert (result.error == BREAKEVEN_OK).all() and (result.solved == target).all()
+    for i in range(0, len(data['P']), 17):
+        known = {name: (None if name == target else float(data[name][i])) for name in BREAKEVEN_VARIABLES}
+        expected = fincalc.calculate_breakeven(dict(known, Target=target))
+        assert result.values[target][i] == pytest.approx(expected, rel=1e-12, abs=1e-9)
+    # A solução satisfaz P * Q = FC + VC * Q + PFT
+    v = result.values
+    np.testing.assert_allclose(v['P'] * v['Q'], v['FC'] + v['VC'] * v['Q'] + v['PFT'], rtol=1e-9)
+
+
+def test_error_codes_match_scalar_messages():
+    nan = np.nan
+    data = {
+        'P': [10.0, 10.0, 10.0, nan, 10.0, 10.0],
+        'VC': [12.0, 10.0, nan, 6.0, 6.0, 6.0],
+        'FC': [100.0, 100.0, 100.0, 100.0, nan, 100.0],
+        'PFT': [0.0, 0.0, 0.0, 0.0, 0.0, nan],
+        'Q': [nan, nan, 0.0, -5.0, nan, 50.0],
+    }
+    result = fincalc.solve_breakeven_batch(data)
+    np.testing.assert_array_equal(result.error, [
+        BREAKEVEN_ZERO_MARGIN, BREAKEVEN_ZERO_MARGIN, BREAKEVEN_INVALID_Q, BREAKEVEN_INVALID_Q,
+        BREAKEVEN_MISSING, BREAKEVEN_OK])
+    assert list(result.solved) == ['Q', 'Q', 'VC', 'P', '', 'PFT']
+    assert result.failed.tolist() == [True] * 5 + [False]
+    assert np.isnan(result.values['Q'][0]) and result.values['PFT'][5] == pytest.approx(100.0)
+    # O solver escalar devolve as mensagens correspondentes aos códigos
+    labels = fincalc.BREAKEVEN_ERROR_LABELS
+    scalar = fincalc.calculate_breakeven({'P': 10.0, 'VC': 12.0, 'FC': 100.0, 'PFT': 0.0, 'Q': None, 'Target': 'Q'})
+    assert labels[BREAKEVEN_ZERO_MARGIN] in scalar
+    scalar = fincalc.calculate_breakeven({'P': None, 'VC': 6.0, 'FC': 100.0, 'PFT': 0.0, 'Q': -5.0, 'Target': 'P'})
+    assert labels[BREAKEVEN_INVALID_Q] in scalar
+
+
+def test_target_broadcasts_scalars():
+    result = fincalc.solve_breakeven_batch({'P': [20.0, 25.0, 30.0], 'VC': 15.0, 'FC': 10_000.0, 'PFT': 0.0}, 'Q')
+    np.testing.assert_allclose(result.values['Q'], [2_000.0, 1_000.0, 10_000.0 / 15.0])
+    with pytest.raises(ValueError):
+        fincalc.solve_breakeven_batch(BASE, 'X')
+
+
+def test_grid_matches_scalar_solver_cell_by_cell():
+    prices = np.array([14.0, 15.0, 20.0, 30.0])
+    fixed_costs = np.array([0.0, 5_000.0, 20_000.0])
+    grid = fincalc.breakeven_grid(BASE, 'Q', 'P', prices, 'FC', fixed_costs)
+    assert grid.values.shape == (3, 4)
+    for row, fc in enumerate(fixed_costs):
+        for column, price in enumerate(prices):
+            expected = fincalc.calculate_breakeven(dict(BASE, P=price, FC=fc, Q=None, Target='Q'))
+            if isinstance(expected, str):
+                assert np.isnan(grid.values[row, column])
+                assert grid.error[row, column] == BREAKEVEN_ZERO_MARGIN
+            else:
+                assert grid.values[row, column] == pytest.approx(expected, rel=1e-12)
+    with pytest.raises(ValueError):
+        fincalc.breakeven_grid(BASE, 'Q', 'P', prices, 'Q', fixed_costs)
+
+
+def test_tornado_ranks_variables_by_swing():
+    rows, base_value = fincalc.breakeven_tornado(BASE, 'Q', shock=0.1)
+    assert base_value == pytest.approx((10_000.0 + 2_000.0) / 10.0)
+    assert [row['Variável'] for row in rows] == ['P', 'VC', 'FC', 'PFT']
+    by_name = {row['Variável']: row for row in rows}
+    # Q = (FC + PFT) / (P - VC): os choques em FC e PFT são lineares
+    assert by_name['FC']['Choque -'] == pytest.approx((9_000.0 + 2_000.0) / 10.0)
+    assert by_name['FC']['Choque +'] == pytest.approx((11_000.0 + 2_000.0) / 10.0)
+    assert by_name['P']['Choque -'] == pytest.approx(12_000.0 / 7.5)
+    amplitudes = [row['Amplitude'] for row in rows]
+    assert amplitudes == sorted(amplitudes, reverse=True)
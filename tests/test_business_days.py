@@ -0,0 +1,74 @@
+import datetime
+
+import numpy as np
+import pytest
+
+import fincalc
+
+
+@pytest.fixture(scope='module')
+def target():
+    return fincalc.get_business_calendar('TARGET')
+
+
+def _business(day, holidays):
+    return day.weekday() < 5 and day not in holidays
+
+
+@pytest.fixture(scope='module')
+def sample_dates():
+    rng = np.random.default_rng(0)
+    first = np.datetime64('1985-01-01') + rng.integers(0, 30_000, 500)
+    return first, first + rng.integers(-60, 200, first.size), rng.integers(-20, 21, first.size)
+
+
+def test_easter_sunday():
+    np.testing.assert_array_equal(fincalc.easter_sunday([2000, 2024, 2025]),
+                                  np.array(['2000-04-23', '2024-03-31', '2025-04-20'], dtype='datetime64[D]'))
+
+
+def test_target_history(target):
+    # Antes de 2000 só 1 de janeiro e 25 de dezembro: Sexta-Feira Santa e 1 de maio são dias úteis
+    assert target.is_business_day('1998-04-10') and target.is_business_day('1998-05-01')
+    assert not target.is_business_day('1998-12-25')
+    assert not target.is_business_day('1999-12-31') and target.is_business_day('2002-12-31')
+    assert not target.is_business_day('2024-03-29') and not target.is_business_day('2024-04-01')
+    assert not target.is_business_day('2024-05-01') and not target.is_business_day('2024-12-26')
+
+
+def test_prefix_sums_match_day_by_day(target, sample_dates):
+    first, second, steps = sample_dates
+    holidays = set(fincalc.target_holidays(np.arange(1980, 2080)).astype(object))
+    for a, b, n, between, added in zip(first.astype(object), second.astype(object), steps,
+                                       target.business_days_between(first, second),
+                                       target.add_business_days(first, steps).astype(object)):
+        low, high = min(a, b), max(a, b)
+        count = sum(_business(low + datetime.timedelta(days=i), holidays) for i in range((high - low).days))
+        assert between == (count if b >= a else -count)
+        day, moved = a, 0
+        while moved < abs(n):
+            day += datetime.timedelta(days=int(np.sign(n)))
+            moved += _business(day, holidays)
+        assert added == day
+
+
+@pytest.mark.parametrize('day, following, modified, preceding', [
+    ('2024-08-31', '2024-09-02', '2024-08-30', '2024-08-30'),
+    ('2024-03-29', '2024-04-02', '2024-03-28', '2024-03-28'),
+    ('2024-06-12', '2024-06-12', '2024-06-12', '2024-06-12'),
+])
+def test_adjustment_rules(target, day, following, modified, preceding):
+    results = [target.adjust(day, rule) for rule in fincalc.BUSINESS_DAY_RULES]
+    assert [str(value) for value in results] == [following, modified, preceding]
+
+
+def test_extra_holidays_from_file(target):
+    import io
+    holidays = fincalc.read_holidays(io.StringIO("Data,Nome\n2024-06-10,Dia de Portugal\nxx,y\n"), 'feriados.csv')
+    calendar = fincalc.get_business_calendar('TARGET', holidays)
+    assert not calendar.is_business_day('2024-06-10') and target.is_business_day('2024-06-10')
+
+
+def test_dates_outside_calendar_raise(target):
+    with pytest.raises(ValueError):
+        target.adjust('2090-01-02')
@@ -0,0 +1,52 @@
+import numpy as np
+
+import fincalc
+from fincalc.cache import LRUCache
+
+
+def test_hits_misses_and_recency():
+    cache = LRUCache(max_entries=2)
+    calls = []
+
+    def compute(key):
+        calls.append(key)
+        return key * 10
+
+    assert cache.get_or_compute(1, lambda: compute(1)) == 10
+    assert cache.get_or_compute(1, lambda: compute(1)) == 10
+    cache.get_or_compute(2, lambda: compute(2))
+    cache.get(1) # 1 passa a ser a mais recente: a próxima inserção remove 2
+    cache.get_or_compute(3, lambda: compute(3))
+    assert calls == [1, 2, 3]
+    assert 1 in cache and 3 in cache and 2 not in cache
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (2, 3, 1, 2)
+    assert stats['hit_rate'] == 0.4
+
+
+def test_byte_limit_evicts_and_skips_oversized_values():
+    cache = LRUCache(max_entries=10, max_bytes=1_000)
+    cache.put('a', np.zeros(50)) # 400 bytes
+    cache.put('b', np.zeros(50))
+    cache.put('c', np.zeros(50)) # 1200 bytes no total: sai 'a'
+    assert 'a' not in cache and len(cache) == 2
+    assert cache.stats()['bytes'] == 800
+    cache.put('big', np.zeros(200)) # Maior que o limite: não é guardado nem remove outras
+    assert 'big' not in cache and len(cache) == 2
+    cache.put('b', np.zeros(10)) # Substituir atualiza os bytes
+    assert cache.stats()['bytes'] == 480
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()['bytes'] == 0
+
+
+def test_schedule_cache_reuses_tables():
+    fincalc.schedule_cache.clear()
+    before = fincalc.schedule_cache.stats()
+    first = fincalc.get_schedule(10_000.0, 0.01, -888.49, 12)
+    second = fincalc.get_schedule(10_000.0, 0.01, -888.49, 12)
+    assert second is first
+    after = fincalc.schedule_cache.stats()
+    assert after['misses'] - before['misses'] == 1 and after['hits'] - before['hits'] == 1
+    # As tabelas partilhadas são só de leitura
+    assert not first.table['Saldo Final'].flags.writeable
+    assert fincalc.get_schedule(10_000.0, 0.01, -888.49, 12, 'BGN') is not first
@@ -0,0 +1,188 @@
+import numpy as np
+import numpy_financial as npf
+import pytest
+
+import fincalc
+
+
+def _polynomial_irrs(flows):
+    """IRR reais > -100% pelas raízes de sum(C_k v^k), com v = 1/(1+i)."""
+    roots = np.roots(np.asarray(flows, dtype=float)[::-1])
+    real = roots[(np.abs(roots.imag) < 1e-9) & (roots.real > 0)].real
+    return np.sort(1.0 / real - 1.0)
+
+
+def test_close_roots_with_ill_scaled_flows():
+    result = fincalc.irr_grouped([0.8117, 809.886, -1800.948, 1000], [1, 1, 1, 1])
+    np.testing.assert_allclose(result.roots, [0.10, 0.12], atol=1e-4)
+    np.testing.assert_allclose(result.roots, _polynomial_irrs([0.8117, 809.886, -1800.948, 1000]), rtol=1e-9)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_ill_scaled_flows_match_polynomial_roots(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(40):
+        size = rng.integers(3, 12)
+        flows = rng.normal(size=size) * 10.0 ** rng.uniform(-3, 4, size)
+        expected = _polynomial_irrs(flows)
+        if expected.size > 1 and np.diff(expected).min() < 1e-6:
+            continue
+        result = fincalc.irr_grouped(flows, np.ones(size))
+        assert result.complete
+        np.testing.assert_allclose(result.roots, expected, rtol=1e-6, atol=1e-8)
+
+
+@pytest.mark.parametrize('gap', [1e-1, 1e-2, 1e-3, 1e-4])
+def test_constructed_close_pairs_are_found_or_flagged(gap):
+    # Raízes v = 1/(1+i) para i = 5% e 5% + gap, mais uma raiz afastada
+    rates = np.array([0.05, 0.05 + gap])
+    flows = np.poly(np.concatenate((1.0 / (1.0 + rates), [0.4])))[::-1] * 250.0
+    result = fincalc.irr_grouped(flows, np.ones(flows.size))
+    if result.complete:
+        np.testing.assert_allclose(result.roots, _polynomial_irrs(flows), rtol=1e-6, atol=1e-8)
+    else:
+        assert result.roots.size < result.sign_changes
+
+
+def test_close_pair_within_one_grid_cell():
+    # Sem divisão dos intervalos, a grelha grossa juntava as duas raízes e não via nenhuma
+    flows = np.poly(1.0 / (1.0 + np.array([0.08, 0.0801])))[::-1]
+    result = fincalc.irr_grouped(flows, np.ones(3), grid_points=8)
+    assert result.complete
+    np.testing.assert_allclose(result.roots, [0.08, 0.0801], rtol=1e-6)
+
+
+@pytest.mark.parametrize('flows, root', [([100, -210, 110.25], 0.05), ([-1, 3, -3, 1], 0.0)])
+def test_multiple_root_is_reported_once_and_flagged(flows, root):
+    result = fincalc.irr_grouped(flows, np.ones(len(flows)))
+    assert not result.complete
+    assert result.roots.size == 1
+    np.testing.assert_allclose(result.roots, [root], atol=1e-4)
+
+
+def test_simple_flows_are_complete():
+    result = fincalc.irr_grouped([-100, 230, -132], [1, 1, 1])
+    assert result.complete and result.sign_changes == 2
+    np.testing.assert_allclose(result.roots, [0.1, 0.2], atol=1e-12)
+    grouped = fincalc.irr_grouped([-1000, 100, 1100], [1, 9, 1])
+    np.testing.assert_allclose(grouped.irr, 0.1, atol=1e-12)
+
+
+def _random_groups(seed, groups=6):
+    rng = np.random.default_rng(seed)
+    amounts = np.concatenate(([-rng.uniform(1_000, 10_000)], rng.normal(300, 400, groups - 1)))
+    freqs = np.concatenate(([1], rng.integers(1, 30, groups - 1)))
+    return amounts, freqs
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('rate', [-20.0, -0.5, 0.0, 1e-9, 3.5, 20.0, 150.0])
+def test_grouped_npv_matches_expanded_flows(seed, rate):
+    amounts, freqs = _random_groups(seed)
+    expected = npf.npv(rate / 100, np.repeat(amounts, freqs))
+    assert fincalc.npv_grouped(rate, amounts, freqs) == pytest.approx(expected, rel=1e-10, abs=1e-8)
+    assert fincalc.npv(rate, np.repeat(amounts, freqs)) == pytest.approx(expected, rel=1e-12)
+
+
+def test_grouped_npv_with_huge_frequency():
+    # Um milhão de períodos sem expandir: perpetuidade de 100 a 5%, menos o investimento
+    value = fincalc.npv_grouped(5.0, [-1_000.0, 100.0], [1, 1_000_000])
+    assert value == pytest.approx(-1_000.0 + 100.0 / 0.05, rel=1e-12)
+
+
+def test_group_cash_flows_validates_rows():
+    pd = pytest.importorskip('pandas')
+    table = pd.DataFrame({'Fluxo (Cnn)': [100.0, 200.0], 'Frequência (Fnn)': [2, 3.7]})
+    amounts, freqs = fincalc.group_cash_flows(-500.0, table)
+    np.testing.assert_array_equal(amounts, [-500.0, 100.0, 200.0])
+    np.testing.assert_array_equal(freqs, [1, 2, 3])
+    assert fincalc.expand_cash_flows(-500.0, table) == [-500.0, 100.0, 100.0, 200.0, 200.0, 200.0]
+    with pytest.raises(ValueError, match='linha 2'):
+        fincalc.group_cash_flows(-500.0, table.assign(**{'Fluxo (Cnn)': [100.0, None]}))
+    with pytest.raises(ValueError, match='Frequência inválida na linha 1: 0'):
+        fincalc.group_cash_flows(-500.0, table.assign(**{'Frequência (Fnn)': [0, 1]}))
+
+
+def test_build_cash_flows_once_for_all_metrics():
+    pd = pytest.importorskip('pandas')
+    table = pd.DataFrame({'Fluxo (Cnn)': [300.0, 450.0], 'Frequência (Fnn)': [2, 3]})
+    flows = fincalc.build_cash_flows(-1_500.0, table)
+    assert flows.valid and flows.periods == 5
+    np.testing.assert_array_equal(flows.expand(), fincalc.expand_cash_flows(-1_500.0, table))
+    assert flows.npv(8.0) == pytest.approx(npf.npv(0.08, flows.expand()), rel=1e-12)
+    assert flows.irr().irr == pytest.approx(npf.irr(flows.expand()), rel=1e-9)
+    with pytest.raises(ValueError):
+        flows.amounts[0] = 0.0 # Partilhado entre métricas: só de leitura
+    # A chave depende só do conteúdo
+    assert fincalc.build_cash_flows(-1_500.0, table.copy()).key == flows.key
+    assert fincalc.build_cash_flows(-1_500.0, table.assign(**{'Frequência (Fnn)': [3, 2]})).key != flows.key
+    # Uma tabela inválida não levanta exceção: fica só CF0 e a mensagem de erro
+    invalid = fincalc.build_cash_flows(-1_500.0, table.assign(**{'Fluxo (Cnn)': [300.0, None]}))
+    assert not invalid.valid and 'linha 2' in invalid.error
+    np.testing.assert_array_equal(invalid.amounts, [-1_500.0])
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_npv_profile_matches_pointwise_npv(seed):
+    amounts, freqs = _random_groups(seed)
+    rates = np.array([-50.0, -10.0, 0.0, 2.5, 10.0, 40.0, 300.0])
+    expected = [fincalc.npv_grouped(rate, amounts, freqs) for rate in rates]
+    np.testing.assert_allclose(fincalc.npv_profile(amounts, freqs, rates), expected, rtol=1e-10, atol=1e-8)
+
+
+def test_difference_flows_split_groups():
+    amounts, freqs = fincalc.difference_flows([-100.0, 30.0], [1, 5], [-80.0, 50.0, 10.0], [1, 2, 4])
+    # Períodos: A = -100, 30 x5; B = -80, 50 x2, 10 x4 (um período a mais)
+    np.testing.assert_array_equal(np.repeat(amounts, freqs), [-20.0, -20.0, -20.0, 20.0, 20.0, 20.0, -10.0])
+
+
+def test_crossover_rate_equalizes_npvs():
+    # A: investimento longo; B: retorno rápido; os perfis cruzam-se uma vez
+    project_a = (np.array([-1_000.0, 100.0, 1_300.0]), np.array([1, 4, 1]))
+    project_b = (np.array([-1_000.0, 450.0]), np.array([1, 3]))
+    result = fincalc.crossover_rates(*project_a, *project_b)
+    assert result.complete and result.roots.size == 1
+    rate = 100 * result.irr
+    assert fincalc.npv_grouped(rate, *project_a) == pytest.approx(fincalc.npv_grouped(rate, *project_b), abs=1e-8)
+    profile_a = fincalc.npv_profile(*project_a, [rate - 1, rate + 1])
+    profile_b = fincalc.npv_profile(*project_b, [rate - 1, rate + 1])
+    assert np.sign(profile_a - profile_b).tolist() == [1.0, -1.0]
+
+
+def test_profiles_that_never_cross():
+    result = fincalc.crossover_rates([-100.0, 60.0], [1, 3], [-100.0, 50.0], [1, 3])
+    assert result.roots.size == 0 and np.isnan(result.irr)
+
+
+def _reference_payback(flows):
+    """Payback período a período: último período com acumulado negativo mais a fração do seguinte."""
+    cumulative = 0.0
+    for period, flow in enumerate(flows):
+        if cumulative + flow >= 0:
+            return 0.0 if period == 0 else period - 1 + min(max(-cumulative / flow, 0.0), 1.0)
+        cumulative += flow
+    return float('nan')
+
+
+METRIC_CASES = [
+    ([-7_000.0, 1_000.0, 2_000.0, 3_500.0], [1, 2, 1, 3]),
+    ([-1_000.0, 300.0, -200.0, 600.0], [1, 3, 1, 2]),
+    ([-500.0, 100.0], [1, 3]), # Nunca recupera o investimento
+    ([-2_000.0, 0.0, 900.0], [1, 2, 4]),
+]
+
+
+@pytest.mark.parametrize('amounts, freqs', METRIC_CASES)
+@pytest.mark.parametrize('rate, finance, reinvest', [(10.0, None, None), (20.0, 8.0, 12.0), (0.0, 5.0, 0.0)])
+def test_metrics_match_period_by_period_definitions(amounts, freqs, rate, finance, reinvest):
+    flows = np.repeat(amounts, freqs)
+    metrics = fincalc.cash_flow_metrics(amounts, freqs, rate, finance, reinvest)
+    discount = (1 + rate / 100) ** -np.arange(flows.size)
+    assert metrics.npv == pytest.approx(npf.npv(rate / 100, flows), rel=1e-12)
+    expected_mirr = npf.mirr(flows, (rate if finance is None else finance) / 100,
+                             (rate if reinvest is None else reinvest) / 100)
+    np.testing.assert_allclose(metrics.mirr, expected_mirr, rtol=1e-10)
+    np.testing.assert_allclose(metrics.payback, _reference_payback(flows), rtol=1e-12)
+    np.testing.assert_allclose(metrics.discounted_payback, _reference_payback(flows * discount), rtol=1e-10)
+    pv = flows * discount
+    assert metrics.profitability_index == pytest.approx(pv[pv > 0].sum() / -pv[pv < 0].sum(), rel=1e-12)
@@ -0,0 +1,26 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import fincalc
+
+
+def test_import_is_headless():
+    # O núcleo não importa a interface nem as dependências pesadas opcionais
+    code = ("import sys, fincalc; "
+            "print(','.join(m for m in ('streamlit', 'matplotlib', 'pandas', 'scipy', 'pyarrow') if m in sys.modules))")
+    loaded = subprocess.run([sys.executable, '-c', code], cwd=Path(__file__).parents[1], capture_output=True,
+                            text=True, check=True).stdout.strip()
+    assert loaded == ''
+
+
+def test_default_tvm_example():
+    # Exemplo por omissão da interface: 30 anos a 5,5%, 75.000 de empréstimo
+    pmt = fincalc.solve_pmt(360, 5.5, 75_000.0, 0.0, 12)
+    assert pmt == pytest.approx(-425.8417510102504, rel=1e-12)
+    assert fincalc.solve_n(5.5, 75_000.0, pmt, 0.0, 12) == pytest.approx(360.0, rel=1e-10)
+    assert fincalc.solve_iy(360, 75_000.0, pmt, 0.0, 12) == pytest.approx(5.5, rel=1e-10)
+    assert fincalc.solve_pv(360, 5.5, pmt, 0.0, 12) == pytest.approx(75_000.0, rel=1e-10)
+    assert fincalc.solve_fv(360, 5.5, 75_000.0, pmt, 12) == pytest.approx(0.0, abs=1e-6)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+import fincalc
+
+# Exemplo da documentação de XNPV/XIRR das folhas de cálculo
+AMOUNTS = [-10_000.0, 2_750.0, 4_250.0, 3_250.0, 2_750.0]
+DATES = ['2008-01-01', '2008-03-01', '2008-10-30', '2009-02-15', '2009-04-01']
+
+
+def _direct_xnpv(rate_percent, amounts, dates, days_per_year):
+    dates = np.array(dates, dtype='datetime64[D]')
+    days = (dates - dates.min()).astype(float)
+    return float(np.sum(np.asarray(amounts) / (1 + rate_percent / 100) ** (days / days_per_year)))
+
+
+def test_spreadsheet_example():
+    assert fincalc.xnpv(9.0, AMOUNTS, DATES) == pytest.approx(2_086.647602, abs=1e-6)
+    result = fincalc.xirr(AMOUNTS, DATES)
+    assert result.converged and result.sign_changes == 1
+    assert result.rate == pytest.approx(0.373362535, abs=1e-8) # Valor documentado, arredondado
+    assert fincalc.xnpv(100 * result.rate, AMOUNTS, DATES) == pytest.approx(0.0, abs=1e-6)
+
+
+@pytest.mark.parametrize('method, days_per_year', [('ACT', 365.0), ('ACT/365F', 365.0), ('ACT/360', 360.0)])
+def test_xnpv_matches_direct_sum(method, days_per_year):
+    for rate in (-40.0, 0.0, 7.0, 250.0):
+        expected = _direct_xnpv(rate, AMOUNTS, DATES, days_per_year)
+        assert fincalc.xnpv(rate, AMOUNTS, DATES, method) == pytest.approx(expected, rel=1e-12)
+
+
+def test_dates_do_not_need_to_be_sorted():
+    order = [3, 0, 4, 2, 1]
+    shuffled = ([AMOUNTS[i] for i in order], [DATES[i] for i in order])
+    assert fincalc.xnpv(9.0, *shuffled) == pytest.approx(fincalc.xnpv(9.0, AMOUNTS, DATES), rel=1e-14)
+    assert fincalc.xirr(*shuffled).rate == pytest.approx(fincalc.xirr(AMOUNTS, DATES).rate, rel=1e-12)
+
+
+def test_deep_negative_rate_over_a_long_horizon():
+    # Perda de 99% em 30 anos: r = 0,01^(1/30) - 1; exp(-t·x) transbordaria sem a mudança de escala
+    dates = ['2000-01-01', '2030-01-01']
+    result = fincalc.xirr([-1_000.0, 10.0], dates, guess=0.5)
+    days = (np.datetime64('2030-01-01') - np.datetime64('2000-01-01')).astype(float)
+    assert result.converged
+    assert result.rate == pytest.approx(0.01 ** (365.0 / days) - 1, rel=1e-10)
+
+
+def test_no_sign_change_and_invalid_inputs():
+    result = fincalc.xirr([100.0, 50.0], ['2020-01-01', '2021-01-01'])
+    assert np.isnan(result.rate) and not result.converged and result.sign_changes == 0
+    with pytest.raises(ValueError):
+        fincalc.xnpv(5.0, [100.0, 50.0], ['2020-01-01'])
+    with pytest.raises(ValueError):
+        fincalc.xnpv(5.0, [100.0, np.nan], ['2020-01-01', '2021-01-01'])
+    with pytest.raises(ValueError):
+        fincalc.xirr([], [])
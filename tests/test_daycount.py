@@ -0,0 +1,81 @@
+import datetime
+
+import numpy as np
+import pytest
+
+import fincalc
+
+
+def _month_end(day):
+    return (day + datetime.timedelta(days=1)).month != day.month
+
+
+def _thirty_360(first, second, convention, maturity=None):
+    """Referência data a data das regras 30/360."""
+    d1, d2 = first.day, second.day
+    if convention == '30/360 US':
+        february_end = lambda day: day.month == 2 and _month_end(day)
+        if february_end(first) and february_end(second):
+            d2 = 30
+        if february_end(first):
+            d1 = 30
+        if d2 == 31 and d1 >= 30:
+            d2 = 30
+        d1 = min(d1, 30)
+    elif convention == '30E/360':
+        d1, d2 = min(d1, 30), min(d2, 30)
+    else:
+        d1 = 30 if _month_end(first) else d1
+        d2 = 30 if _month_end(second) and not (second == maturity and second.month == 2) else d2
+    return (second.year - first.year) * 360 + (second.month - first.month) * 30 + d2 - d1
+
+
+@pytest.fixture(scope='module')
+def date_pairs():
+    rng = np.random.default_rng(0)
+    first = np.datetime64('1990-01-01') + rng.integers(0, 15_000, 3_000)
+    # Metade das datas no fim do mês, onde as regras diferem
+    ends = (first.astype('datetime64[M]') + 1).astype('datetime64[D]') - 1
+    first = np.where(rng.random(first.size) < 0.5, ends, first)
+    second = first + rng.integers(0, 3_000, first.size)
+    second_ends = (second.astype('datetime64[M]') + 1).astype('datetime64[D]') - 1
+    second = np.where(rng.random(second.size) < 0.5, second_ends, second)
+    return first, second
+
+
+@pytest.mark.parametrize('convention', ['30/360 US', '30E/360', '30E/360 ISDA'])
+def test_thirty_360_matches_reference(date_pairs, convention):
+    first, second = date_pairs
+    expected = [_thirty_360(a, b, convention) for a, b in zip(first.astype(object), second.astype(object))]
+    np.testing.assert_array_equal(fincalc.day_count(first, second, convention), expected)
+
+
+def test_isda_maturity_keeps_february_end():
+    assert fincalc.day_count('2024-02-29', '2025-02-28', '30E/360 ISDA') == 360
+    assert fincalc.day_count('2024-02-29', '2025-02-28', '30E/360 ISDA', maturity='2025-02-28') == 358
+
+
+def test_act_conventions():
+    assert fincalc.year_fraction('2003-09-04', '2003-11-01', 'ACT/360') == pytest.approx(58 / 360)
+    assert fincalc.year_fraction('2003-09-04', '2003-11-01', 'ACT/365F') == pytest.approx(58 / 365)
+    # 2023-12-15 a 2024-01-15: 17 dias em 2023 e 14 em 2024 (bissexto)
+    assert fincalc.year_fraction('2023-12-15', '2024-01-15', 'ACT/ACT ISDA') == pytest.approx(17 / 365 + 14 / 366)
+
+
+def test_icma_coupon_periods():
+    assert fincalc.year_fraction('2020-01-15', '2020-07-15', 'ACT/ACT ICMA', frequency=2) == pytest.approx(0.5)
+    assert fincalc.year_fraction('2024-02-29', '2025-02-28', 'ACT/ACT ICMA') == pytest.approx(1.0)
+    # Metade de um período semestral irregular: 61 dias de um período de 182
+    fraction = fincalc.year_fraction('2020-03-01', '2020-05-01', 'ACT/ACT ICMA', frequency=2, ref_date='2020-01-31')
+    assert fraction == pytest.approx(61 / 182 / 2)
+
+
+def test_calculator_360_method():
+    assert fincalc.days_360(datetime.date(2003, 9, 4), datetime.date(2003, 11, 1)) == 57
+    assert fincalc.days_between(datetime.date(2003, 9, 4), datetime.date(2003, 11, 1), 'ACT') == 58
+    assert fincalc.days_360(datetime.date(2023, 2, 28), datetime.date(2023, 3, 31), feb_end=True) == 30
+
+
+def test_missing_dates_raise():
+    with pytest.raises(ValueError):
+        fincalc.day_count(np.array(['2020-01-01', 'NaT'], dtype='datetime64[D]'), np.datetime64('2021-01-01'), '30E/360')
@@ -0,0 +1,179 @@
+import io
+
+import numpy as np
+import pytest
+
+import fincalc
+from fincalc.depreciation_tables import DEPRECIATION_TABLES, MACRS_CLASSES
+
+YEARS = 12
+
+
+def _legacy_schedule(method, life, m01, cost, salvage, db_rate):
+    """DEP ano a ano pelo cálculo original de um ativo (`calculate_single_year`)."""
+    accumulated, result = 0.0, []
+    for year in range(1, YEARS + 1):
+        row = fincalc.calculate_single_year(year, method, life, m01, cost, salvage, db_rate, accumulated)
+        accumulated = row['AccDep']
+        result.append(row['DEP'])
+    return np.array(result)
+
+
+def _dbx_schedule(life, m01, cost, salvage, db_rate):
+    """DBX ano a ano: o maior entre o saldo decrescente e a linha reta sobre a vida restante."""
+    first = (13.0 - m01) / 12.0
+    book, elapsed, switched, result = cost, 0.0, False, []
+    for year in range(1, YEARS + 1):
+        fraction = first if year == 1 else min(1.0, max(life - elapsed, 0.0))
+        remaining = life - elapsed
+        declining = book * db_rate / life * fraction
+        straight = (book - salvage) * fraction / remaining if remaining > 0 else 0.0
+        switched = switched or straight >= declining
+        dep = max(0.0, min(straight if switched else declining, book - salvage))
+        book -= dep
+        elapsed += fraction
+        result.append(dep)
+    return np.array(result)
+
+
+def _register(method, factor):
+    return {
+        'Método': [method], 'CST': [10_000.0], 'SAL': [1_000.0], 'LIF': [5.0], 'M01': [4.0],
+        'Fator DB (%)': [factor], 'Categoria': ['Equipamento'],
+    }
+
+
+@pytest.mark.parametrize('method', ['SL', 'SYD', 'DB'])
+@pytest.mark.parametrize('life, m01', [(5.0, 1.0), (7.0, 4.0), (4.5, 10.0)])
+def test_register_matches_single_asset(method, life, m01):
+    register = {'Método': [method], 'CST': [10_000.0], 'SAL': [1_000.0], 'LIF': [life], 'M01': [m01], 'Fator DB (%)': [150.0]}
+    projection = fincalc.project_register(register, YEARS)
+    assert projection.error[0] == fincalc.REGISTER_OK
+    expected = _legacy_schedule(method, life, m01, 10_000.0, 1_000.0, 1.5)
+    np.testing.assert_allclose(projection.dep[0], expected, atol=1e-8)
+
+
+@pytest.mark.parametrize('life, m01, factor', [(5.0, 1.0, 2.0), (7.0, 4.0, 1.5), (10.0, 7.0, 2.0)])
+def test_register_dbx_matches_year_by_year(life, m01, factor):
+    register = {'Método': ['DBX'], 'CST': [10_000.0], 'SAL': [1_000.0], 'LIF': [life], 'M01': [m01], 'Fator DB (%)': [factor * 100]}
+    projection = fincalc.project_register(register, YEARS)
+    np.testing.assert_allclose(projection.dep[0], _dbx_schedule(life, m01, 10_000.0, 1_000.0, factor), atol=1e-8)
+
+
+@pytest.mark.parametrize('method', ['DB', 'DBX'])
+def test_blank_db_factor_uses_default(method):
+    blank = fincalc.project_register(_register(method, np.nan), YEARS)
+    default = fincalc.project_register(_register(method, 200.0), YEARS)
+    assert blank.error[0] == fincalc.REGISTER_OK
+    np.testing.assert_allclose(blank.dep, default.dep)
+    assert np.isfinite(blank.totals_by_category()[['DEP', 'RBV', 'RDV']].to_numpy()).all()
+
+
+@pytest.mark.parametrize('life, percents', [
+    (3, [33.33, 44.45, 14.81, 7.41]),
+    (5, [20.00, 32.00, 19.20, 11.52, 11.52, 5.76]),
+    (7, [14.29, 24.49, 17.49, 12.49, 8.93, 8.92, 8.93, 4.46]),
+])
+def test_macrs_half_year_matches_pub_946(life, percents):
+    # Tabela A-1 da IRS Pub. 946, arredondada a 0,01%
+    rates = DEPRECIATION_TABLES['MACRS'].rates[0, MACRS_CLASSES.index(life), :len(percents)] * 100
+    np.testing.assert_allclose(rates, percents, atol=0.006)
+    assert DEPRECIATION_TABLES['MACRS'].cumulative[0, MACRS_CLASSES.index(life), -1] == pytest.approx(1.0)
+
+
+def test_macrs_schedule_applies_table_to_cost():
+    schedule = fincalc.depreciation_schedule('MACRS', 5, 1, 10_000.0, 0.0)
+    np.testing.assert_allclose(schedule.dep[:6], [2000.0, 3200.0, 1920.0, 1152.0, 1152.0, 576.0], atol=1e-6)
+
+
+@pytest.mark.parametrize('method', ['SL', 'SYD', 'DB'])
+@pytest.mark.parametrize('life, m01, cost, salvage', [(5.0, 1.0, 10_000.0, 1_000.0), (6.5, 9.0, 8_000.0, 0.0),
+                                                      (3.0, 4.0, 1_000.0, 1_500.0)])
+def test_schedule_matches_year_by_year_calculation(method, life, m01, cost, salvage):
+    schedule = fincalc.depreciation_schedule(method, life, m01, cost, salvage, 2.0)
+    accumulated = 0.0
+    for year in range(1, YEARS + 1):
+        expected = fincalc.calculate_single_year(year, method, life, m01, cost, salvage, 2.0, accumulated)
+        accumulated = expected['AccDep']
+        got = schedule.year_result(year)
+        for name in ('DEP', 'RBV', 'RDV', 'AccDep'):
+            assert got[name] == pytest.approx(expected[name], abs=1e-8), (year, name)
+    assert len(schedule.year) == fincalc.last_depreciation_year(life, m01)
+    assert schedule.year_result(0) == {}
+
+
+def test_cached_schedule_is_shared_and_read_only():
+    fincalc.depreciation_cache.clear()
+    first = fincalc.get_depreciation_schedule('SYD', 5.0, 4.0, 10_000.0, 1_000.0)
+    assert fincalc.get_depreciation_schedule('SYD', 5, 4, 10_000, 1_000) is first # Chave normalizada para float
+    stats = fincalc.depreciation_cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+    assert not first.dep.flags.writeable
+    # Consultar qualquer ano usa a mesma tabela
+    direct = fincalc.depreciation_schedule('SYD', 5.0, 4.0, 10_000.0, 1_000.0)
+    for year in (1, 3, 6, 20):
+        assert fincalc.calculate_depreciation_for_year(year, 'SYD', 5.0, 4.0, 10_000.0, 1_000.0, 0.0) == direct.year_result(year)
+    assert fincalc.depreciation_cache.stats()['misses'] == 1
+    with pytest.raises(ValueError):
+        fincalc.depreciation_schedule('MACRS', 6, 1, 10_000.0, 0.0)
+
+
+def test_register_error_codes_and_start_year():
+    register = {
+        'Método': ['SL', 'xyz', None, 'SL', 'SL', 'MACRS', ' syd ', 'SL'],
+        'CST': [10_000.0, 10_000.0, 10_000.0, np.nan, 10_000.0, 10_000.0, 10_000.0, 10_000.0],
+        'SAL': [1_000.0] * 8,
+        'LIF': [5.0, 5.0, 5.0, 5.0, 0.0, 6.0, 5.0, 5.0],
+        'M01': [1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 3.0, 1.0],
+        'Ano Inicial': [3, 1, 1, 1, 1, 1, 2, 1.5],
+    }
+    projection = fincalc.project_register(register, 4)
+    np.testing.assert_array_equal(projection.error, [
+        fincalc.REGISTER_OK, fincalc.REGISTER_UNKNOWN_METHOD, fincalc.REGISTER_MISSING, fincalc.REGISTER_MISSING,
+        fincalc.REGISTER_INVALID, fincalc.REGISTER_INVALID, fincalc.REGISTER_OK, fincalc.REGISTER_INVALID])
+    assert projection.failed == 6
+    assert np.isnan(projection.dep[projection.error != fincalc.REGISTER_OK]).all()
+    # A projeção começa no ano de vida indicado e continua com depreciação zero depois do fim
+    for row, method, m01, start in ((0, 'SL', 1.0, 3), (6, 'SYD', 3.0, 2)):
+        schedule = fincalc.depreciation_schedule(method, 5.0, m01, 10_000.0, 1_000.0)
+        for offset in range(4):
+            expected = schedule.year_result(start + offset)
+            assert projection.dep[row, offset] == pytest.approx(expected['DEP'], abs=1e-8)
+            assert projection.rbv[row, offset] == pytest.approx(expected['RBV'], abs=1e-8)
+            assert projection.rdv[row, offset] == pytest.approx(expected['RDV'], abs=1e-8)
+
+
+def test_random_register_matches_cached_schedules_and_totals():
+    pytest.importorskip('pandas')
+    register = fincalc.random_register(300, seed=4)
+    projection = fincalc.project_register(register, 6)
+    assert projection.failed == 0
+    for i in range(0, 300, 7):
+        schedule = fincalc.depreciation_schedule(register['Método'][i], register['LIF'][i], register['M01'][i],
+                                                 register['CST'][i], register['SAL'][i], register['Fator DB (%)'][i] / 100)
+        start = int(register['Ano Inicial'][i])
+        expected = [schedule.year_result(start + offset)['DEP'] for offset in range(6)]
+        np.testing.assert_allclose(projection.dep[i], expected, atol=1e-7, err_msg=register['Método'][i])
+    totals = projection.totals_by_category()
+    equipment = register['Categoria'] == 'Equipamento'
+    np.testing.assert_allclose(totals.loc[totals['Categoria'] == 'Equipamento', 'DEP'], projection.dep[equipment].sum(axis=0))
+    assert totals['DEP'].sum() == pytest.approx(projection.dep.sum())
+
+
+def test_register_chunks_match_one_projection():
+    pd = pytest.importorskip('pandas')
+    register = fincalc.random_register(50, seed=9)
+    register['Método'][3] = 'XX'
+    frame = pd.DataFrame(register)
+    totals = []
+    chunks = list(fincalc.iter_register_chunks(io.StringIO(frame.to_csv(index=False)), 'ativos.csv', years=5,
+                                               chunk_size=20, totals=totals))
+    assert [len(chunk['Ativo']) for chunk in chunks] == [20, 20, 10] and len(totals) == 3
+    projection = fincalc.project_register(frame, 5)
+    for column, values in projection.columns().items():
+        np.testing.assert_allclose(np.concatenate([chunk[column] for chunk in chunks]), values, atol=1e-7, err_msg=column)
+    errors = np.concatenate([chunk['Erro'] for chunk in chunks])
+    assert errors[3] == fincalc.REGISTER_ERROR_LABELS[fincalc.REGISTER_UNKNOWN_METHOD] and (np.delete(errors, 3) == 'OK').all()
+    merged = fincalc.merge_category_totals(totals)
+    whole = projection.totals_by_category()
+    np.testing.assert_allclose(merged[['DEP', 'RBV', 'RDV']].to_numpy(), whole[['DEP', 'RBV', 'RDV']].to_numpy(), rtol=1e-12)
@@ -0,0 +1,63 @@
+import math
+
+import numpy as np
+import pytest
+
+import fincalc
+
+
+def _reference_lttb(x, y, threshold):
+    """LTTB ponto a ponto, como no algoritmo original (Steinarsson, 2013)."""
+    size = len(x)
+    every = (size - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        # Média do grupo seguinte (o último ponto, no último grupo)
+        next_start = math.floor((i + 1) * every) + 1
+        next_end = min(math.floor((i + 2) * every) + 1, size)
+        avg_x = sum(x[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(y[next_start:next_end]) / (next_end - next_start)
+        start, end = math.floor(i * every) + 1, math.floor((i + 1) * every) + 1
+        areas = [abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a])) for j in range(start, end)]
+        a = start + int(np.argmax(areas))
+        selected.append(a)
+    selected.append(size - 1)
+    return np.asarray(x)[selected], np.asarray(y)[selected]
+
+
+@pytest.mark.parametrize('size, threshold', [(10, 3), (100, 7), (1_000, 50), (1_001, 333), (5_000, 4_999)])
+def test_matches_reference_implementation(size, threshold):
+    rng = np.random.default_rng(size)
+    x = np.cumsum(rng.uniform(0.5, 1.5, size))
+    y = np.cumsum(rng.normal(size=size))
+    got_x, got_y = fincalc.lttb(x, y, threshold)
+    expected_x, expected_y = _reference_lttb(x, y, threshold)
+    np.testing.assert_array_equal(got_x, expected_x)
+    np.testing.assert_array_equal(got_y, expected_y)
+
+
+def test_keeps_endpoints_and_spikes():
+    x = np.arange(10_000)
+    y = np.zeros(10_000)
+    y[[1_234, 7_777]] = [50.0, -80.0]
+    got_x, got_y = fincalc.lttb(x, y, 100)
+    assert len(got_x) == 100 and got_x[0] == 0 and got_x[-1] == 9_999
+    assert np.all(np.diff(got_x) > 0)
+    assert {1_234, 7_777} <= set(got_x.astype(int))
+
+
+def test_short_series_are_returned_unchanged():
+    x, y = np.arange(5.0), np.arange(5.0) ** 2
+    for threshold in (2, 5, 10):
+        got_x, got_y = fincalc.lttb(x, y, threshold)
+        np.testing.assert_array_equal(got_x, x)
+        np.testing.assert_array_equal(got_y, y)
+
+
+def test_amortization_balance_path():
+    periods, balances = fincalc.balance_path(75_000.0, 0.055 / 12, -425.84, 360)
+    got_x, got_y = fincalc.lttb(periods, balances, 60)
+    # Os pontos escolhidos são pontos da curva original
+    np.testing.assert_allclose(got_y, balances[got_x.astype(int) - 1])
+    assert got_x[0] == 1 and got_x[-1] == 360
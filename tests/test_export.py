@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import fincalc
+from fincalc.amortization import AMORTIZATION_COLUMNS
+
+pd = pytest.importorskip('pandas')
+
+LOANS = {
+    'N': [12, 30, np.nan, 7, 24],
+    'I/Y': [6.0, 4.5, 6.0, 12.0, 9.0],
+    'PV': [10_000.0, 25_000.0, 1_000.0, 1_500.0, 8_000.0],
+    'PMT': [-860.66, -850.0, -100.0, -230.0, -900.0], # O último liquida antes de N
+    'BGN/END': ['END', 'BGN', 'END', 'BGN', 'END'],
+}
+
+
+def _full_tables():
+    """Tabelas completas de cada empréstimo válido, seguidas, com o índice do empréstimo."""
+    pieces = []
+    for loan, (n, i_y, pv, pmt, mode) in enumerate(zip(*LOANS.values())):
+        if np.isnan(n):
+            continue
+        table = fincalc.amortization_table(pv, i_y / 1200, pmt, int(n), mode=mode)
+        pieces.append(dict(table, **{'Empréstimo': np.full(len(table['Período']), loan)}))
+    return {column: np.concatenate([piece[column] for piece in pieces]) for column in pieces[0]}
+
+
+def test_schedule_chunks_rebuild_the_full_table():
+    pv, rate, pmt, n = 75_000.0, 0.055 / 12, -425.84, 360
+    chunks = list(fincalc.iter_schedule_chunks(pv, rate, pmt, n, chunk_size=100))
+    assert [len(chunk['Período']) for chunk in chunks] == [100, 100, 100, 60]
+    full = fincalc.amortization_table(pv, rate, pmt, n)
+    for column in AMORTIZATION_COLUMNS:
+        np.testing.assert_allclose(np.concatenate([chunk[column] for chunk in chunks]), full[column])
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 25, 1_000])
+def test_portfolio_chunks_have_fixed_size(chunk_size):
+    chunks = list(fincalc.iter_portfolio_chunks(LOANS, chunk_size=chunk_size))
+    sizes = [len(chunk['Período']) for chunk in chunks]
+    assert all(size == chunk_size for size in sizes[:-1]) and 0 < sizes[-1] <= chunk_size
+    expected = _full_tables()
+    assert sum(sizes) == len(expected['Período'])
+    for column, values in expected.items():
+        np.testing.assert_allclose(np.concatenate([chunk[column] for chunk in chunks]), values, err_msg=column)
+
+
+@pytest.mark.parametrize('file_format', fincalc.EXPORT_FORMATS)
+def test_write_and_read_back_in_chunks(tmp_path, file_format):
+    if file_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    target = tmp_path / f'amortizacao.{file_format}'
+    stats = fincalc.write_chunks(fincalc.iter_portfolio_chunks(LOANS, chunk_size=10), str(target), file_format)
+    expected = _full_tables()
+    assert [row.chunk for row in stats] == list(range(1, len(stats) + 1))
+    assert sum(row.rows for row in stats) == len(expected['Período'])
+
+    frames = list(fincalc.iter_file_chunks(str(target), chunk_size=10))
+    assert [len(frame) for frame in frames] == [row.rows for row in stats]
+    data = pd.concat(frames, ignore_index=True)
+    assert list(data.columns) == ['Empréstimo', *AMORTIZATION_COLUMNS]
+    for column, values in expected.items():
+        np.testing.assert_allclose(data[column].to_numpy(), values, rtol=1e-12, err_msg=column)
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        fincalc.write_chunks(iter([]), str(tmp_path / 'x.xlsx'), 'xlsx')
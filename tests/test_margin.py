@@ -0,0 +1,89 @@
+import io
+
+import numpy as np
+import pytest
+
+import fincalc
+from fincalc.margin import MARGIN_VARIABLES
+
+SCALAR = {
+    'CST': lambda row: fincalc.solve_cost(row['SEL'], row['MAR']),
+    'SEL': lambda row: fincalc.solve_selling_price(row['CST'], row['MAR']),
+    'MAR': lambda row: fincalc.solve_margin(row['SEL'], row['CST']),
+}
+
+
+def _catalog(seed, size=100):
+    rng = np.random.default_rng(seed)
+    sel = rng.uniform(1, 500, size)
+    cst = sel * rng.uniform(0.1, 1.2, size) # Inclui margens negativas
+    return {'CST': cst, 'SEL': sel, 'MAR': fincalc.solve_margin(sel, cst)}
+
+
+@pytest.mark.parametrize('target', MARGIN_VARIABLES)
+def test_batch_matches_scalar_formulas(target):
+    data = _catalog(MARGIN_VARIABLES.index(target))
+    expected = data[target].copy()
+    data[target] = np.full(len(expected), np.nan)
+    result = fincalc.solve_margin_batch(data)
+    assert (result.error == fincalc.MARGIN_OK).all() and (result.solved == target).all()
+    np.testing.assert_allclose(result.values[target], expected, rtol=1e-10)
+    for i in range(0, len(expected), 13):
+        row = {name: float(result.values[name][i]) for name in MARGIN_VARIABLES}
+        assert result.values[target][i] == pytest.approx(SCALAR[target](row), rel=1e-12)
+
+
+def test_error_codes_follow_calculator_rules():
+    nan = np.nan
+    data = {
+        'CST': [nan, nan, 50.0, -5.0, 40.0, nan, 10.0, nan],
+        'SEL': [0.0, -10.0, nan, nan, 0.0, nan, nan, 80.0],
+        'MAR': [0.0, 20.0, 100.0, 10.0, nan, 30.0, 25.0, 25.0],
+    }
+    result = fincalc.solve_margin_batch(data)
+    np.testing.assert_array_equal(result.error, [
+        fincalc.MARGIN_OK, fincalc.MARGIN_INVALID_SEL, fincalc.MARGIN_FULL, fincalc.MARGIN_NEGATIVE_COST,
+        fincalc.MARGIN_INVALID_SEL, fincalc.MARGIN_MISSING, fincalc.MARGIN_OK, fincalc.MARGIN_OK])
+    assert list(result.solved) == ['CST', 'CST', 'SEL', 'SEL', 'MAR', '', 'SEL', 'CST']
+    assert result.failed.tolist() == [False, True, True, True, True, True, False, False]
+    # Linhas com erro mantêm NaN; as válidas ficam completas
+    assert np.isnan(result.values['SEL'][2]) and np.isnan(result.values['MAR'][4])
+    assert result.values['SEL'][6] == pytest.approx(10.0 / 0.75)
+    assert result.values['CST'][7] == pytest.approx(60.0)
+    # O solver escalar falha nas mesmas condições
+    with pytest.raises(ZeroDivisionError):
+        fincalc.solve_selling_price(50.0, 100.0)
+
+
+def test_target_overrides_given_column_and_broadcasts():
+    result = fincalc.solve_margin_batch({'CST': [60.0, 70.0, 90.0], 'SEL': 100.0, 'MAR': 99.0}, 'MAR')
+    np.testing.assert_allclose(result.values['MAR'], [40.0, 30.0, 10.0])
+    assert (result.solved == 'MAR').all()
+    # Sem MAR a coluna conta como em falta
+    result = fincalc.solve_margin_batch({'CST': [60.0], 'SEL': [100.0]})
+    assert result.solved[0] == 'MAR' and result.values['MAR'][0] == pytest.approx(40.0)
+    with pytest.raises(ValueError):
+        fincalc.solve_margin_batch({'CST': [1.0]}, 'X')
+
+
+def test_catalog_chunks_match_one_batch():
+    pd = pytest.importorskip('pandas')
+    data = _catalog(5, size=25)
+    data['SEL'][::3] = np.nan
+    frame = pd.DataFrame({'SKU': [f'A{i:03d}' for i in range(25)], 'CST': data['CST'], 'SEL': data['SEL'],
+                          'MAR': data['MAR'].astype(object)})
+    frame.loc[4, 'MAR'] = 'n/d' # Texto não numérico conta como em falta
+    buffer = io.StringIO(frame.to_csv(index=False))
+    chunks = list(fincalc.iter_margin_chunks(buffer, 'catalogo.csv', chunk_size=10))
+    assert [len(chunk['SKU']) for chunk in chunks] == [10, 10, 5]
+    joined = {column: np.concatenate([chunk[column] for chunk in chunks]) for column in chunks[0]}
+    assert list(joined['SKU']) == list(frame['SKU'])
+    numeric = {name: pd.to_numeric(frame[name], errors='coerce').to_numpy(dtype=float) for name in MARGIN_VARIABLES}
+    expected = fincalc.solve_margin_batch(numeric)
+    for name in MARGIN_VARIABLES:
+        np.testing.assert_allclose(joined[name], expected.values[name], rtol=1e-12)
+    assert list(joined['Resolvido']) == list(expected.solved)
+    assert list(joined['Erro']) == [fincalc.MARGIN_ERROR_LABELS[code] for code in expected.error]
+    assert joined['Erro'][3] == 'OK' and joined['Erro'][4] == 'OK' # Linha 3 resolve SEL, linha 4 resolve MAR
+    with pytest.raises(ValueError):
+        list(fincalc.iter_margin_chunks(io.StringIO('SKU\nA\n'), 'x.csv'))
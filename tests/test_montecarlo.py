@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import fincalc
+from fincalc import FlowDistribution
+
+pytest.importorskip('scipy')
+
+AMOUNTS = np.array([-10_000.0, 2_000.0, 3_000.0])
+FREQS = np.array([1, 3, 2])
+FLOWS = [FlowDistribution('normal', 0.05), FlowDistribution('triangular', 0.0, -0.3, 0.1),
+         FlowDistribution('lognormal', 0.2)]
+
+
+def _simulate(**options):
+    settings = dict(flow_distributions=FLOWS, rate_distribution=FlowDistribution('normal', 0.1),
+                    correlation=0.4, paths=5_000, seed=7, processes=1, chunk_size=1_000)
+    settings.update(options)
+    return fincalc.simulate_npv_irr(AMOUNTS, FREQS, 8.0, **settings)
+
+
+def test_same_seed_reproduces_paths_for_any_process_count():
+    first = _simulate()
+    np.testing.assert_array_equal(_simulate().npv, first.npv)
+    parallel = _simulate(processes=2)
+    np.testing.assert_array_equal(parallel.npv, first.npv)
+    np.testing.assert_array_equal(parallel.irr, first.irr)
+    assert not np.array_equal(_simulate(seed=8).npv, first.npv)
+
+
+def test_fixed_distributions_give_the_deterministic_values():
+    result = fincalc.simulate_npv_irr(AMOUNTS, FREQS, 8.0, paths=10, processes=1)
+    np.testing.assert_allclose(result.npv, fincalc.npv_grouped(8.0, AMOUNTS, FREQS), rtol=1e-12)
+    np.testing.assert_allclose(result.irr, fincalc.irr_grouped(AMOUNTS, FREQS).irr, rtol=1e-9)
+
+
+def test_normal_flows_have_the_analytic_npv_distribution():
+    # Com a taxa fixa o NPV é linear nos fluxos: média = NPV base, desvio = raiz da soma dos quadrados
+    spread = 0.1
+    flows = [None] + [FlowDistribution('normal', spread)] * 2
+    result = fincalc.simulate_npv_irr(AMOUNTS, FREQS, 8.0, flows, paths=200_000, seed=1, processes=1)
+    weights = np.array([fincalc.npv_grouped(8.0, unit, FREQS) for unit in np.eye(3)]) # PV de 1 em cada grupo
+    sd = np.sqrt(np.sum((spread * np.abs(AMOUNTS[1:]) * weights[1:]) ** 2))
+    assert result.npv.mean() == pytest.approx(fincalc.npv_grouped(8.0, AMOUNTS, FREQS), abs=4 * sd / np.sqrt(200_000))
+    assert result.npv.std() == pytest.approx(sd, rel=0.01)
+    # Projeto convencional: NPV < 0 exatamente quando a IRR fica abaixo da taxa
+    assert np.array_equal(result.npv < 0, result.irr < 0.08)
+    assert result.prob_negative_npv == pytest.approx(np.mean(result.npv < 0))
+
+
+def test_invalid_distributions_are_rejected():
+    with pytest.raises(ValueError):
+        fincalc.simulate_npv_irr(AMOUNTS, FREQS, 8.0, [FlowDistribution('uniform', 0.1)], paths=10)
+    with pytest.raises(ValueError):
+        fincalc.simulate_npv_irr(AMOUNTS, FREQS, 8.0, [FlowDistribution('normal', -0.1)], paths=10)
+    with pytest.raises(ValueError):
+        fincalc.simulate_npv_irr(AMOUNTS, FREQS, 8.0, FLOWS, correlation=np.eye(2), paths=10)
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+import fincalc
+
+LOANS = {
+    'N': [12, 24, 36, 6, 18],
+    'I/Y': [6.0, 4.5, 0.0, 12.0, 9.0],
+    'PV': [10_000.0, 25_000.0, 3_600.0, 1_500.0, 8_000.0],
+    # Pagamento acima do necessário no último: liquidação antecipada
+    'PMT': [np.nan, np.nan, np.nan, np.nan, -900.0],
+    'BGN/END': ['END', 'BGN', 'END', 'BGN', 'END'],
+    'Origem': [0, 3, 1, 7, 2],
+    'Coorte': ['A', 'B', 'A', 'B', 'A'],
+}
+
+
+def _reference(loans, group_by=None):
+    """Soma, por grupo e período de calendário, das tabelas de amortização de cada empréstimo."""
+    portfolio = fincalc.build_portfolio(loans, origination='Origem', group_by=group_by)
+    totals = {}
+    for i in range(portfolio.size):
+        if portfolio.n[i] <= 0:
+            continue
+        mode = 'BGN' if portfolio.begin[i] else 'END'
+        table = fincalc.amortization_table(portfolio.pv[i], portfolio.rate[i], portfolio.pmt[i], int(portfolio.n[i]), mode=mode)
+        group = portfolio.group_labels[portfolio.group[i]]
+        start = int(portfolio.origination[i])
+        row = totals.setdefault((group, start), np.zeros(4))
+        row += [0.0, 0.0, portfolio.pv[i], 1]
+        for k, interest, principal, balance in zip(
+                table['Período'], table['Juros Pagos'], table['Principal Pago'], table['Saldo Final']):
+            row = totals.setdefault((group, start + k), np.zeros(4))
+            row += [interest, principal, balance, 1]
+    return totals
+
+
+def _as_rows(flows):
+    rows = {}
+    for group, period, *values in zip(flows['Grupo'], flows['Período'], flows['Juros Pagos'],
+                                      flows['Principal Pago'], flows['Saldo Final'], flows['Empréstimos Ativos']):
+        if values[-1]:
+            rows[(group, period)] = np.array(values, dtype=float)
+    return rows
+
+
+@pytest.mark.parametrize('group_by', [None, 'Coorte', 'origination'])
+def test_aggregates_match_loan_by_loan_tables(group_by):
+    portfolio = fincalc.build_portfolio(LOANS, origination='Origem', group_by=group_by)
+    got = _as_rows(fincalc.portfolio_cashflows(portfolio))
+    expected = _reference(LOANS, group_by)
+    assert got.keys() == expected.keys()
+    for key, values in expected.items():
+        np.testing.assert_allclose(got[key], values, atol=1e-6)
+
+
+def test_early_payoff_clears_balance():
+    portfolio = fincalc.build_portfolio({'N': [18], 'I/Y': [9.0], 'PV': [8_000.0], 'PMT': [-900.0]})
+    flows = fincalc.portfolio_cashflows(portfolio)
+    active = flows['Empréstimos Ativos'] > 0
+    assert flows['Período'][active].max() < 18
+    assert flows['Saldo Final'][active][-1] == 0.0
+    np.testing.assert_allclose(flows['Principal Pago'].sum(), -8_000.0)
+
+
+def test_invalid_rows_are_ignored():
+    loans = {'N': [12, np.nan, -4, 24], 'I/Y': [6.0, 6.0, 6.0, np.nan], 'PV': [1_000.0] * 4,
+             'Origem': [0, 1, 2, 3]}
+    portfolio = fincalc.build_portfolio(loans, origination='Origem')
+    np.testing.assert_array_equal(portfolio.n, [12, 0, 0, 24])
+    flows = fincalc.portfolio_cashflows(portfolio)
+    single = fincalc.portfolio_cashflows(fincalc.build_portfolio({'N': [12], 'I/Y': [6.0], 'PV': [1_000.0]}))
+    np.testing.assert_array_equal(flows['Empréstimos Ativos'], single['Empréstimos Ativos'])
+    np.testing.assert_allclose(flows['Saldo Final'], single['Saldo Final'])
+
+
+def test_monthly_cohorts_from_dates():
+    loans = {'N': [12, 12, 12], 'I/Y': [6.0] * 3, 'PV': [1_000.0] * 3,
+             'Data': np.array(['2024-01-15', '2024-03-02', 'NaT'], dtype='datetime64[D]')}
+    portfolio = fincalc.build_portfolio(loans, origination='Data', group_by='origination')
+    np.testing.assert_array_equal(portfolio.origination, [0, 2, 0])
+    np.testing.assert_array_equal(portfolio.n, [12, 12, 0])
+    assert list(portfolio.group_labels) == ['2024-01', '2024-03']
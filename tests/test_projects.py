@@ -0,0 +1,70 @@
+import numpy as np
+import numpy_financial as npf
+import pytest
+
+import fincalc
+from fincalc.projects import (PROJECT_EMPTY, PROJECT_MULTIPLE_IRR, PROJECT_NO_IRR, PROJECT_NO_SIGN_CHANGE,
+                              PROJECT_OK)
+
+PROJECTS = [
+    [-1_000.0, 300.0, 400.0, 500.0],
+    [-7_000.0, 2_000.0, 2_000.0, 2_000.0, 2_000.0, 2_000.0],
+    [-100.0, 230.0, -132.0], # IRR de 10% e 20%
+    [100.0, 50.0, 25.0], # Sem mudança de sinal
+    [-100.0, 50.0, -100.0], # Duas mudanças de sinal, sem IRR real
+    [],
+    [-500.0, 0.0, 0.0, 700.0],
+]
+
+
+def test_pad_projects_accepts_ragged_lists_and_matrices():
+    matrix, lengths = fincalc.pad_projects(PROJECTS)
+    assert matrix.shape == (7, 6)
+    np.testing.assert_array_equal(lengths, [4, 6, 3, 3, 3, 0, 4])
+    assert np.isnan(matrix[0, 4:]).all() and np.isnan(matrix[5]).all()
+    again, again_lengths = fincalc.pad_projects(matrix)
+    np.testing.assert_array_equal(again, matrix)
+    np.testing.assert_array_equal(again_lengths, lengths)
+
+
+def test_npv_batch_matches_numpy_financial():
+    rates = np.array([10.0, 5.0, 15.0, 0.0, 8.0, 10.0, -3.0])
+    got = fincalc.npv_batch(PROJECTS, rates)
+    for value, flows, rate in zip(got, PROJECTS, rates):
+        if flows:
+            assert value == pytest.approx(npf.npv(rate / 100, flows), rel=1e-12)
+        else:
+            assert np.isnan(value)
+
+
+def test_evaluate_projects_status_and_irr():
+    result = fincalc.evaluate_projects(PROJECTS, 10.0, processes=1)
+    np.testing.assert_array_equal(result.status, [
+        PROJECT_OK, PROJECT_OK, PROJECT_MULTIPLE_IRR, PROJECT_NO_SIGN_CHANGE, PROJECT_NO_IRR, PROJECT_EMPTY, PROJECT_OK])
+    np.testing.assert_array_equal(result.irr_count, [1, 1, 2, 0, 0, 0, 1])
+    for index in (0, 1, 6):
+        assert result.irr[index] == pytest.approx(npf.irr(PROJECTS[index]), rel=1e-9)
+    # Com várias IRR, a principal é a mais próxima de zero
+    assert result.irr[2] == pytest.approx(0.1, rel=1e-9)
+    assert np.isnan(result.irr[[3, 4, 5]]).all()
+
+
+def test_processes_give_the_same_results():
+    rng = np.random.default_rng(3)
+    flows = [np.concatenate(([-rng.uniform(500, 2_000)], rng.normal(200, 150, rng.integers(2, 30))))
+             for _ in range(40)]
+    serial = fincalc.evaluate_projects(flows, 7.5, processes=1)
+    parallel = fincalc.evaluate_projects(flows, 7.5, processes=2, chunk_size=8)
+    np.testing.assert_array_equal(parallel.npv, serial.npv)
+    np.testing.assert_array_equal(parallel.irr, serial.irr)
+    np.testing.assert_array_equal(parallel.status, serial.status)
+
+
+def test_metrics_batch_matches_single_project_kernel():
+    projects = [flows for flows in PROJECTS if flows]
+    rates = np.linspace(2.0, 14.0, len(projects))
+    batch = fincalc.metrics_batch(projects, rates, finance_rates_percent=6.0, reinvest_rates_percent=9.0)
+    for index, flows in enumerate(projects):
+        single = fincalc.cash_flow_metrics(flows, np.ones(len(flows)), rates[index], 6.0, 9.0)
+        for name, value in single._asdict().items():
+            np.testing.assert_allclose(getattr(batch, name)[index], value, rtol=1e-10, err_msg=name)
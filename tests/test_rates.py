@@ -0,0 +1,58 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+import fincalc
+from fincalc.rates import CONTINUOUS
+
+
+def _exact_effective(nom_percent, c_y):
+    """EFF (%) com aritmética racional exata: (1 + NOM/C/Y)^C/Y - 1."""
+    rate = Fraction(nom_percent) / 100 / c_y
+    return float(((1 + rate) ** c_y - 1) * 100)
+
+
+@pytest.mark.parametrize('nom', [12.0, 5.5, 0.001, 1e-8, -3.0])
+@pytest.mark.parametrize('c_y', [1, 2, 4, 12, 365])
+def test_nominal_to_effective_matches_exact_arithmetic(nom, c_y):
+    assert fincalc.nominal_to_effective(nom, c_y) == pytest.approx(_exact_effective(nom, c_y), rel=1e-12)
+
+
+def test_continuous_and_very_frequent_compounding():
+    # Com C/Y muito grande (1 + NOM/C/Y)^C/Y perde os algarismos; o resultado tende para a contínua
+    continuous = fincalc.nominal_to_effective(6.0, CONTINUOUS)
+    assert continuous == pytest.approx(np.expm1(0.06) * 100, rel=1e-15)
+    assert fincalc.nominal_to_effective(6.0, 1e12) == pytest.approx(continuous, rel=1e-9)
+    assert fincalc.nominal_to_effective(1e-10, 1e9) == pytest.approx(1e-10, rel=1e-9)
+    assert fincalc.effective_to_nominal(continuous, CONTINUOUS) == pytest.approx(6.0, rel=1e-14)
+
+
+def test_round_trips_and_conversion_between_frequencies():
+    nom = np.array([0.5, 4.0, 12.0, 30.0])
+    c_y = np.array([1, 2, 12, 365])
+    eff = fincalc.nominal_to_effective(nom, c_y)
+    np.testing.assert_allclose(fincalc.effective_to_nominal(eff, c_y), nom, rtol=1e-13)
+    # Semestral -> mensal pela mesma EFF
+    monthly = fincalc.convert_rate(8.0, 2, 12)
+    assert fincalc.nominal_to_effective(monthly, 12) == pytest.approx(fincalc.nominal_to_effective(8.0, 2), rel=1e-14)
+    assert fincalc.convert_rate(8.0, 2, 1) == pytest.approx(fincalc.nominal_to_effective(8.0, 2), rel=1e-14)
+
+
+def test_effective_rate_below_minus_100():
+    with pytest.raises(ValueError):
+        fincalc.effective_to_nominal(-150.0, 12)
+    values = fincalc.effective_to_nominal(np.array([-150.0, 10.0]), 12)
+    assert np.isnan(values[0]) and np.isfinite(values[1])
+
+
+def test_rate_table():
+    pd = pytest.importorskip('pandas')
+    table = pd.DataFrame({'Taxa (%)': [12.0, 6.0, 'x', 5.0], 'C/Y': [12, 'Contínua', 4, 0], 'P/Y': [12, 4, 4, 12]})
+    result = fincalc.convert_rate_table(table, target_c_y=1)
+    np.testing.assert_allclose(result['EFF (%)'][:2], [_exact_effective(12.0, 12), np.expm1(0.06) * 100], rtol=1e-12)
+    np.testing.assert_allclose(result['NOM (%) C/Y=1'][:2], result['EFF (%)'][:2], rtol=1e-14)
+    assert result['Taxa por Período (%)'][0] == pytest.approx(1.0, rel=1e-13)
+    assert result.loc[2:, 'EFF (%)'].isna().all() # Taxa inválida e C/Y = 0
+    with pytest.raises(ValueError):
+        fincalc.convert_rate_table(pd.DataFrame({'Taxa (%)': [1.0]}))
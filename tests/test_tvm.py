@@ -0,0 +1,123 @@
+import numpy as np
+import numpy_financial as npf
+import pytest
+
+import fincalc
+from fincalc.tvm import RATE_BRACKETED, RATE_INVALID, RATE_NEWTON, RATE_NO_SOLUTION, TVM_VARIABLES, solve_rate
+
+
+@pytest.mark.parametrize('n, pv, pmt, fv, mode', [
+    (386, -7133.844, -257.123, 3910.020, 'END'),
+    (327, 4513.61, 478.82, -1758.86, 'BGN'),
+    (360, -75_000.0, 425.84, 0.0, 'END'),
+    (12, 1_000.0, -90.0, 0.0, 'BGN'),
+])
+def test_solve_rate_matches_numpy_financial(n, pv, pmt, fv, mode):
+    # Inclui taxas negativas com N longo, em que a forma de valor presente tem resíduos enormes na raiz
+    solution = solve_rate(n, pv, pmt, fv, mode)
+    expected = npf.rate(n, pmt, pv, fv, 1 if mode == 'BGN' else 0)
+    assert solution.status[0] in (RATE_NEWTON, RATE_BRACKETED)
+    assert solution.rate[0] == pytest.approx(expected, rel=1e-8)
+
+
+def test_solve_iy_negative_rate_long_term():
+    assert fincalc.solve_iy(386, -7133.844, -257.123, 3910.020, 1) == pytest.approx(-6.576002168808, rel=1e-9)
+
+
+# Cenários (N, I/Y, PV, PMT, P/Y, C/Y, modo); FV é calculado com numpy-financial
+SCENARIOS = [
+    (360, 5.5, 75_000.0, -425.84, 12, 12, 'END'),
+    (60, 7.25, -20_000.0, 350.0, 12, 12, 'BGN'),
+    (300, 4.8, 250_000.0, -1_400.0, 12, 2, 'END'), # Hipoteca canadiana: capitalização semestral
+    (40, 3.0, 0.0, -500.0, 4, 12, 'BGN'),
+    (10, 6.0, -1_000.0, 0.0, 1, 365, 'END'),
+    (52, 12.0, 5_000.0, -104.0, 52, 1, 'END'),
+]
+
+
+def _scenario_rate(i_y, p_y, c_y):
+    """Taxa por período de pagamento, calculada diretamente: (1 + I/Y / C/Y) ^ (C/Y / P/Y) - 1."""
+    return (1 + i_y / 100 / c_y) ** (c_y / p_y) - 1
+
+
+def _scenario_frame():
+    rows = []
+    for n, i_y, pv, pmt, p_y, c_y, mode in SCENARIOS:
+        when = 1 if mode == 'BGN' else 0
+        fv = float(npf.fv(_scenario_rate(i_y, p_y, c_y), n, pmt, pv, when))
+        rows.append({'N': n, 'I/Y': i_y, 'PV': pv, 'PMT': pmt, 'FV': fv, 'P/Y': p_y, 'C/Y': c_y, 'BGN/END': mode})
+    return {key: np.array([row[key] for row in rows]) for key in rows[0]}
+
+
+def _scalar_solution(row, name):
+    """Variável `name` da linha calculada com as funções escalares de numpy-financial."""
+    rate = _scenario_rate(row['I/Y'], row['P/Y'], row['C/Y'])
+    when = 1 if row['BGN/END'] == 'BGN' else 0
+    if name == 'N':
+        with np.errstate(divide='ignore'): # numpy-financial divide por PMT mesmo com PMT = 0
+            return npf.nper(rate, row['PMT'], row['PV'], row['FV'], when)
+    if name == 'I/Y':
+        found = npf.rate(row['N'], row['PMT'], row['PV'], row['FV'], when)
+        return row['C/Y'] * ((1 + found) ** (row['P/Y'] / row['C/Y']) - 1) * 100
+    if name == 'PV':
+        return npf.pv(rate, row['N'], row['PMT'], row['FV'], when)
+    if name == 'PMT':
+        return npf.pmt(rate, row['N'], row['PV'], row['FV'], when)
+    return npf.fv(rate, row['N'], row['PMT'], row['PV'], when)
+
+
+@pytest.mark.parametrize('name', TVM_VARIABLES)
+def test_batch_rows_match_scalar_numpy_financial(name):
+    frame = _scenario_frame()
+    data = {key: values.copy() for key, values in frame.items()}
+    data[name] = np.full(len(SCENARIOS), np.nan)
+    result = fincalc.solve_tvm_batch(data)
+    assert not result.failed.any()
+    assert list(result.solved) == [name] * len(SCENARIOS)
+    for i in range(len(SCENARIOS)):
+        row = {key: values[i] for key, values in frame.items()}
+        expected = _scalar_solution(row, name)
+        np.testing.assert_allclose(result.values[name][i], expected, rtol=1e-8, atol=1e-8)
+        # E recupera o valor original do cenário
+        np.testing.assert_allclose(result.values[name][i], frame[name][i], rtol=1e-7, atol=1e-6)
+
+
+def test_batch_target_overrides_given_value():
+    frame = _scenario_frame()
+    data = dict(frame, PMT=np.zeros(len(SCENARIOS)))
+    result = fincalc.solve_tvm_batch(data, target='PMT')
+    assert not result.failed.any()
+    np.testing.assert_allclose(result.values['PMT'], frame['PMT'], rtol=1e-8, atol=1e-8)
+    with pytest.raises(ValueError):
+        fincalc.solve_tvm_batch(frame, target='P/Y')
+
+
+def test_batch_flags_impossible_rows():
+    nan = np.nan
+    data = {
+        'N': [nan, 360, nan, 12, 12, 24],
+        'I/Y': [6.0, nan, 6.0, 6.0, nan, 5.0],
+        'PV': [1_000.0, 1_000.0, nan, 1_000.0, 1_000.0, 1_000.0],
+        # PMT abaixo dos juros (N infinito); todos os fluxos positivos (sem taxa); duas incógnitas;
+        # P/Y = 0; linha válida; P/Y NaN
+        'PMT': [-1.0, 10.0, nan, -50.0, -100.0, nan],
+        'FV': [0.0, 10.0, 0.0, 0.0, 0.0, 0.0],
+        'P/Y': [12, 12, 12, 0, 12, nan],
+    }
+    result = fincalc.solve_tvm_batch(data)
+    np.testing.assert_array_equal(result.failed, [True, True, True, True, False, True])
+    assert list(result.solved[:4]) == ['N', 'I/Y', '', '']
+    assert np.isnan(result.values['N'][0]) and np.isnan(result.values['I/Y'][1])
+    assert np.isnan(result.values['PV'][2]) and np.isnan(result.values['PMT'][2])
+    row = {'N': 12, 'I/Y': nan, 'PV': 1_000.0, 'PMT': -100.0, 'FV': 0.0, 'P/Y': 12, 'C/Y': 12, 'BGN/END': 'END'}
+    expected = _scalar_solution(row, 'I/Y')
+    assert result.values['I/Y'][4] == pytest.approx(expected, rel=1e-9)
+
+
+def test_rate_solver_status_codes():
+    # Fluxos todos positivos: sem taxa; N = 0 e PV em falta: dados inválidos
+    solution = solve_rate([360, 12, 0, 12], [1_000.0, 1_000.0, 1_000.0, np.nan],
+                          [10.0, -100.0, -1.0, -1.0], [10.0, 0.0, 0.0, 0.0], 'END')
+    np.testing.assert_array_equal(solution.status, [RATE_NO_SOLUTION, RATE_NEWTON, RATE_INVALID, RATE_INVALID])
+    assert np.isnan(solution.rate[[0, 2, 3]]).all()
+    assert solution.rate[1] == pytest.approx(npf.rate(12, -100.0, 1_000.0, 0.0), rel=1e-10)